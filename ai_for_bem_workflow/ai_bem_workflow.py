@@ -11,46 +11,54 @@ Date: 2024
 """
 
 import os
-import sys
 import json
 import ast
-import subprocess
-import pandas as pd
-import matplotlib.pyplot as plt
-from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
-import logging
-from datetime import datetime
-import numpy as np
+from typing import Tuple
 import shutil
 import re
-from config import EPLUS_DIR, EPLUS_IDD
-sys.path.insert(0, EPLUS_DIR)
-from pyenergyplus.api import EnergyPlusAPI
+from config import energyplus_api, set_idd
 from api_clients import *
-from eppy import modeleditor
 from eppy.modeleditor import IDF
 from chat_history import *
 from error_parser import ErrorParser
 from mcp_provider import HVACTemplateMCP
 from internal_gains_generator import InternalGainsGenerator
+from geometry_compiler import GeometryCompiler, LAYOUTS, CONSTRUCTIONS, ALL_ZONES
+from building_ir import BuildingIR, load_schema
+from model_reduction import reduce_floors
+from fidelity import STAGE_PROFILES, apply_fidelity
+from epw import load_epw
 
-IDF.setiddname(EPLUS_IDD)
+OUTPUT_FORMATS = ["idf", "ir"]
 
 class BuildingEnergyWorkflow:
     """
     Main workflow class for building energy modeling using LLMs
     """
     
-    def __init__(self, client_type):
+    def __init__(self, client_type, workflow_dir="energy_workflow_output", compile_geometry=True, output_format="idf",
+                 reduce_floors=True, fidelity=None):
         """
         Initialize the workflow
         Args:
             client: LLM API client
-            workflow_dir: path to store outputs
+            workflow_dir: path to store outputs, one per concurrent workflow
+            compile_geometry: zones and surfaces of the GUI layouts come from the geometry compiler, the LLM only
+                writes the non-geometric objects
+            output_format: "idf", the LLM writes the IDF file, or "ir", the LLM writes the compact building JSON of
+                building_ir.py through structured output and the IDF is compiled from it
+            reduce_floors: identical intermediate floors of the generated models are collapsed into one floor with
+                zone multipliers (model_reduction.py)
+            fidelity: dict of simulation stage: fidelity profile (fidelity.py), overrides STAGE_PROFILES
             template_prompt
         """
-        self.workflow_dir = "energy_workflow_output"
+        self.workflow_dir = workflow_dir
+        self.compile_geometry = compile_geometry
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"output_format must be one of {OUTPUT_FORMATS}, got {output_format}")
+        self.output_format = output_format
+        self.reduce_floors = reduce_floors
+        self.stage_profiles = dict(STAGE_PROFILES, **(fidelity or {}))
         os.makedirs(self.workflow_dir, exist_ok=True)
         # self.chat_history = ChatHistory(max_messages=10, max_tokens=150000)
         self.client_type = client_type
@@ -66,6 +74,14 @@ class BuildingEnergyWorkflow:
 
         with open(os.path.join("input_files", "prompt_template.txt") , 'r') as file:
             self.template_prompt = file.read()
+        with open(os.path.join("input_files", "envelope_prompt_template.txt"), 'r') as file:
+            self.envelope_prompt = file.read()
+        with open(os.path.join("input_files", "ir_prompt_template.txt"), 'r') as file:
+            self.ir_prompt = file.read()
+        self.ir_schema = load_schema()
+        # first prompt and last IR of the run, structured outputs have no history to build on
+        self.base_prompt = None
+        self.last_ir = None
 
         self.error_parser = ErrorParser()
 
@@ -89,8 +105,20 @@ class BuildingEnergyWorkflow:
         """
         with open(os.path.join("input_files", "example_file_prompt.idf") , 'r') as file:
             idf_content = file.read()
-        building_layout = self.get_building_layout(building_description["layout"])
-        prompt = self.template_prompt.format(building_description=json.dumps(building_description),building_layout=building_layout , idf_example=idf_content)
+        if self.output_format == "ir":
+            building_layout = self.get_building_layout(building_description["layout"])
+            prompt = self.ir_prompt.format(building_description=json.dumps(building_description),
+                                           building_layout=building_layout,
+                                           constructions=", ".join(CONSTRUCTIONS.values()))
+            self.base_prompt = prompt
+            self.last_ir = None
+        elif self.uses_geometry_compiler(building_description):
+            prompt = self.envelope_prompt.format(building_description=json.dumps(building_description),
+                                                 constructions=", ".join(CONSTRUCTIONS.values()),
+                                                 all_zones=ALL_ZONES, idf_example=idf_content)
+        else:
+            building_layout = self.get_building_layout(building_description["layout"])
+            prompt = self.template_prompt.format(building_description=json.dumps(building_description),building_layout=building_layout , idf_example=idf_content)
         
         # Save prompt for reference
         prompt_file = os.path.join( self.workflow_dir, "full_prompt.txt")
@@ -99,6 +127,37 @@ class BuildingEnergyWorkflow:
 
         return prompt
 
+    def uses_geometry_compiler(self, building_description) -> bool:
+        # the IR already holds the zones of the building
+        return self.compile_geometry and self.output_format == "idf" and building_description.get("layout") in LAYOUTS
+
+    def add_geometry(self, building_description, idf_path):
+        """
+        replaces the zones and surfaces of the model with the compiled geometry of the layout
+        """
+        set_idd()
+        idf = IDF(idf_path)
+        GeometryCompiler.from_description(building_description).to_idf(idf)
+        idf.save(idf_path)
+
+    def reduce_model(self, idf_path):
+        """
+        collapses the identical intermediate floors of the model into one floor with zone multipliers
+        :return: dict of kept floor z: number of floors it represents, empty when nothing was collapsed
+        """
+        if not self.reduce_floors:
+            return {}
+        return reduce_floors(idf_path)
+
+    def set_fidelity(self, idf_path, stage):
+        """
+        applies the fidelity profile of a simulation stage (executability, screening, final) to the model
+        :return: name of the profile
+        """
+        profile = self.stage_profiles[stage]
+        apply_fidelity(idf_path, profile)
+        return profile
+
     def get_building_layout(self, layout_name: str):
         '''
         :param layout_name: Rectangular building, L-shaped building, Hollow building, U-shaped building, T-shaped building
@@ -155,6 +214,8 @@ class BuildingEnergyWorkflow:
             #"roof_area": area,"total_wall_area": wall_area,"total_window_area": window_area,}
 
     def llm_generate_idf(self, prompt: str, i: int) -> str:
+        if self.output_format == "ir":
+            return self.llm_generate_ir(prompt, i)
         # send message/history to llm
         message = self.client.call_client(prompt)
         if not message:
@@ -168,7 +229,36 @@ class BuildingEnergyWorkflow:
             file.write(message)
         return message
 
+    def llm_generate_ir(self, prompt: str, i: int, attempts=3) -> str:
+        """
+        the LLM writes the building IR, invalid IRs are sent back with their errors, then the IR is compiled
+        :return: text of the compiled llm_gen_model_{i}.idf
+        """
+        if self.last_ir is not None:
+            prompt = f"{self.base_prompt}\n\nYour previous building model:\n{self.last_ir}\n\n{prompt}"
+        file_name = os.path.join(self.workflow_dir, f"llm_gen_model_{i}.idf")
+        for _ in range(attempts):
+            message = self.client.structured_output(prompt, self.ir_schema)
+            if not message:
+                raise RuntimeError("LLM returned empty response — cannot generate IR.")
+            self.client.append_messages({"role": "user", "content": prompt})
+            self.client.append_messages({"role": "assistant", "content": message})
+            with open(os.path.join(self.workflow_dir, f"llm_gen_model_{i}.json"), "w", encoding="utf-8") as file:
+                file.write(message)
+            try:
+                building_ir = BuildingIR.from_json(message, self.ir_schema)
+            except ValueError as exc:
+                prompt = f"{self.base_prompt}\n\nYour previous building model:\n{message}\n\n" \
+                         f"It is not valid: {exc}. Fix these errors."
+                continue
+            self.last_ir = message
+            building_ir.save(file_name)
+            with open(file_name, "r", encoding="utf-8") as file:
+                return file.read()
+        raise RuntimeError(f"LLM returned no valid building model in {attempts} attempts.")
+
     def add_base_objects(self, idf_path):
+        set_idd()
         idf = IDF(idf_path)
         if len(idf.idfobjects["VERSION"]) == 0:
             idf.newidfobject("VERSION", Version_Identifier="24.1")
@@ -190,18 +280,30 @@ class BuildingEnergyWorkflow:
     def _energyplus_callback_function(self, state):
         pass
 
-    def run_energyplus(self, idf_path: str, epw_file: str) -> Tuple[bool, str]:
-        api = EnergyPlusAPI()
+    def run_energyplus(self, idf_path: str, epw_file: str, collector=None, progress=None) -> Tuple[bool, str]:
+        """
+        :param collector: optional runtime_collector.EnergyPlusDataCollector, filled with the meters and variables
+        of the run period while the simulation runs
+        :param progress: optional simulation_progress.SimulationProgress, logs the progress of the run
+        """
+        api = energyplus_api()
         state = api.state_manager.new_state()
 
         # energyplus model calling point, callback function
         api.runtime.callback_begin_system_timestep_before_predictor(state, self._energyplus_callback_function)
+        if collector is not None:
+            collector.attach(api, state)
+        if progress is not None:
+            progress.attach(api, state)
 
         # run EPlus
         # -x short form to run expandobjects for HVACtemplates. see EnergyPlusEssentials.pdf p16
         cmd_args = ['-w', epw_file, '-d', self.workflow_dir, '-x', idf_path]
         result = api.runtime.run_energyplus(state, cmd_args)
         api.state_manager.delete_state(state)
+        if progress is not None:
+            # last state of the run, its line may have been held back by the rate limit
+            progress.emit(force=True)
         success = True if result == 0 else False
         if success:
             print("Simulation executed successfully")
@@ -230,6 +332,9 @@ class BuildingEnergyWorkflow:
     def create_error_prompt(self, error_messages):
         combined = [value for d in error_messages for value in d.values()]
         errors_str = ", ".join(combined)
+        if self.output_format == "ir":
+            return f"Following errors occured after running the IDF file compiled from it: {errors_str}. " \
+                   f"Fix errors in the building model."
         prompt = f"Following errors occured after running the IDF file: {errors_str}. Fix errors and provide ONLY the" \
                  f" IDF file content, starting with the first object and ending with the last object. " \
                  f"Do not include explanation."
@@ -237,6 +342,9 @@ class BuildingEnergyWorkflow:
 
     def create_specs_prompt(self,building_description, perc_error):
         perc_error_str = {k: f"{v}%" for k, v in perc_error.items()}
+        if self.output_format == "ir":
+            return f"The model runs succesfully, but some specs deviate from the user definition. " \
+                   f"This is the percentage error in the specs {perc_error_str}. Update the building model."
         layout = self.get_building_layout(building_description["layout"])
         prompt = f"For this building description {building_description} with this ASCII layout and dimensions {layout}, you provided the previous model." \
                  f"The model runs succesfully, but some specs deviate from the user definition. " \
@@ -249,17 +357,33 @@ class BuildingEnergyWorkflow:
         gains_gen = InternalGainsGenerator(idf_path)
         gains_gen.add_gains_to_idf(building_description)
 
-    def add_hvac_templates(self, building_desc, idf_path):
-        mcp = HVACTemplateMCP(idf_path)
+    def add_hvac_templates(self, building_desc, idf_path, epw_file=None):
+        """
+        :param epw_file: weather file the sizing design days are derived from
+        """
+        mcp = HVACTemplateMCP(idf_path, epw_file=epw_file)
         idf = mcp.get_hvac_objects(building_desc)
         return idf
 
-    def add_output_objects(self, idf_path, var_names, meter_names):
+    def add_output_objects(self, idf_path, var_names, meter_names, csv_output=True, sqlite=False):
+        """
+        :param csv_output: False when the results are read in-process with a runtime collector, then no
+        eplusout.csv, eplusmtr.csv or eso/mtr files are written
+        :param sqlite: True to also write eplusout.sql, read by ModelCheckingSQL
+        """
+        set_idd()
         idf = IDF(idf_path)
         if len(idf.idfobjects["OUTPUT:TABLE:SUMMARYREPORTS"]) == 0:
             idf.newidfobject("OUTPUT:TABLE:SUMMARYREPORTS", Report_1_Name="AllSummary")
         if len(idf.idfobjects["OUTPUTCONTROL:FILES"]) == 0:
-            idf.newidfobject("OUTPUTCONTROL:FILES", Output_CSV="Yes")
+            idf.newidfobject("OUTPUTCONTROL:FILES")
+        output_files = idf.idfobjects["OUTPUTCONTROL:FILES"][0]
+        output_files.Output_CSV = "Yes" if csv_output else "No"
+        if not csv_output:
+            output_files.Output_ESO = "No"
+            output_files.Output_MTR = "No"
+        if sqlite and len(idf.idfobjects["OUTPUT:SQLITE"]) == 0:
+            idf.newidfobject("OUTPUT:SQLITE", Option_Type="SimpleAndTabular")
         if len(idf.idfobjects["OUTPUT:DIAGNOSTICS"]) == 0:
             idf.newidfobject("OUTPUT:DIAGNOSTICS", Key_1="DisplayExtrawarnings")
         for var in var_names:
@@ -278,15 +402,11 @@ class BuildingEnergyWorkflow:
         idf.save()
     
     def add_ground_temperatures(self, idf_path, epw_file):
-        with open(epw_file, "r") as f:
-            lines = f.readlines()[0:8]  # skip 8 header lines
-        ground_temps = []
-        for line in lines:
-            fields = line.strip().split(",")
-            if fields[0] == "GROUND TEMPERATURES" and fields[2] == ".5":
-                ground_temps = [float(x) for x in fields[6:18]]
-        
+        # monthly temperatures at 0.5 m of the EPW header
+        ground_temps = load_epw(epw_file).ground_temperatures(0.5) or []
+
         if len(ground_temps) == 12:
+            set_idd()
             idf = IDF(idf_path)
             while len(idf.idfobjects["SITE:GROUNDTEMPERATURE:BUILDINGSURFACE"]) > 0:
                 idf.idfobjects["SITE:GROUNDTEMPERATURE:BUILDINGSURFACE"].pop(-1)
@@ -304,21 +424,27 @@ class BuildingEnergyWorkflow:
         file_name = os.path.join(self.workflow_dir, "full_history.json")
         self.client.save_history(file_name)
 
-    def save_outputs(self):
+    def save_outputs(self, results_dir="results"):
         """
         saves simulation outputs under results folder, then emptys workflow_dir
-        :return:
+        :return: the new results/vN folder
         """
-        dir_num = 1
-        target_dir = "results/v1"
-        while os.path.exists(target_dir):
-            dir_num += 1
-            target_dir = f"results/v{dir_num}"
-        os.makedirs(target_dir, exist_ok=True)
+        os.makedirs(results_dir, exist_ok=True)
+        versions = [int(x[1:]) for x in os.listdir(results_dir) if re.fullmatch(r"v\d+", x)]
+        dir_num = max(versions, default=0) + 1
+        # makedirs fails if another process claimed the same folder in the meantime, then try the next one
+        while True:
+            target_dir = os.path.join(results_dir, f"v{dir_num}")
+            try:
+                os.makedirs(target_dir)
+                break
+            except FileExistsError:
+                dir_num += 1
         shutil.copytree(self.workflow_dir, target_dir, dirs_exist_ok=True)
         # empty workflowdir to avoid future clash
         for filename in os.listdir(self.workflow_dir):
             os.remove(os.path.join(self.workflow_dir, filename))
+        return target_dir
 
     def run_workflow(self) -> bool:
         """
@@ -2,10 +2,18 @@ import sys
 import os
 import requests
 import json
-import anthropic
-from openai import OpenAI
-from google import genai
-from api_keys import *
+try:
+    from api_keys import *
+except ImportError:
+    # no api_keys.py, e.g. CI or benchmarks against the mock server: keys come from the environment
+    claude_api_key = os.environ.get("ANTHROPIC_API_KEY", "")
+    deepseek_api_key = os.environ.get("DEEPSEEK_API_KEY", "")
+    openai_api_key = os.environ.get("OPENAI_API_KEY", "")
+    gemini_api_key = os.environ.get("GEMINI_API_KEY", "")
+    openrouter_api_key = os.environ.get("OPENROUTER_API_KEY", "")
+
+# overridden to point the clients to a local stand-in, see benchmarks/mock_openrouter.py
+OPENROUTER_BASE_URL = os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
 
 
 class ClaudeAPIClient:
@@ -14,6 +22,7 @@ class ClaudeAPIClient:
         self.api_key = claude_api_key
         self.model = model_name #"claude-sonnet-4-20250514",  # "claude-sonnet-4-20250514",  # or claude-3-opus-20240229
         self.max_tokens = max_tokens # 10000
+        import anthropic
         self.client = anthropic.Anthropic(api_key=self.api_key)
 
     def call_client(self, prompt)-> str:
@@ -30,6 +39,7 @@ class DeepseekAPIClient:
     def __init__(self, model_name):
         self.api_key = deepseek_api_key
         self.model = model_name
+        from openai import OpenAI
         self.client = OpenAI(api_key=self.api_key, base_url="https://api.deepseek.com/v1")
 
     def call_client(self, prompt)-> str:
@@ -47,6 +57,7 @@ class OpenaiAPIClient:
     def __init__(self, model_name):
         self.api_key = openai_api_key
         self.model = model_name
+        from openai import OpenAI
         self.client = OpenAI(api_key=self.api_key, base_url="")
 
     def call_client(self, prompt)-> str:
@@ -63,6 +74,7 @@ class GeminiAPIClient:
     def __init__(self, model_name):
         self.api_key = gemini_api_key
         self.model = model_name
+        from google import genai
         self.client = genai.Client(api_key=self.api_key)
 
     def call_client(self, prompt) -> str:
@@ -76,6 +88,7 @@ class GeminiChats:
     def __init__(self, model_name):
         self.api_key = gemini_api_key
         self.model = model_name
+        from google import genai
         self.client = genai.Client(api_key=self.api_key)
         self.chat = self.client.chats.create(model=self.model)
 
@@ -99,11 +112,20 @@ class OpenRouterAPIClient:
         self.messages = []
         self.max_messages = max_messages
         self.history = []
+        # token counts reported by OpenRouter, of the last request and summed over all requests
+        self.last_usage = {}
+        self.total_usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+
+    def record_usage(self, data):
+        self.last_usage = data.get("usage") or {}
+        for key in self.total_usage:
+            self.total_usage[key] += self.last_usage.get(key) or 0
 
     def call_client(self, prompt):
         self.append_messages({"role": "user", "content": prompt})
         response = self.call_api()
         data = response.json()
+        self.record_usage(data)
         if "error" in data:
             raise RuntimeError(f"OpenRouter API error: {data['error']}")
         message = data["choices"][0]["message"]["content"]
@@ -119,7 +141,7 @@ class OpenRouterAPIClient:
 
     def call_api(self):
         response = requests.post(
-            url="https://openrouter.ai/api/v1/chat/completions",
+            url=f"{OPENROUTER_BASE_URL}/chat/completions",
             headers={"Authorization": f"Bearer {self.api_key}"},
             data=json.dumps({
                 "model": self.model,
@@ -139,7 +161,7 @@ class OpenRouterAPIClient:
     def structured_output(self, prompt, schema):
         try:
             response = requests.post(
-                url="https://openrouter.ai/api/v1/chat/completions",
+                url=f"{OPENROUTER_BASE_URL}/chat/completions",
                 headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
                 json={
                     "model": self.model,
@@ -151,7 +173,9 @@ class OpenRouterAPIClient:
                 }
             )
             print(response.status_code)
-            return response.json()["choices"][0]["message"]["content"]
+            data = response.json()
+            self.record_usage(data)
+            return data["choices"][0]["message"]["content"]
         except Exception as exc:
             print(f"\n❌  LLM API error: {exc}", file=sys.stderr)
             raise RuntimeError("Openrouter API failed") from exc
@@ -160,7 +184,7 @@ class OpenRouterAPIClient:
 
     def get_all_models(self, provider = ""):
         # google, qwen, openai, anthropic, deepseek, openrouter/free
-        url = "https://openrouter.ai/api/v1/models/user"
+        url = f"{OPENROUTER_BASE_URL}/models/user"
         headers = {"Authorization": f"Bearer {self.api_key}"}
         response = requests.get(url, headers=headers)
         models = response.json()["data"]
@@ -168,7 +192,7 @@ class OpenRouterAPIClient:
         print("\n".join(fltr))
 
     def get_model_details(self, model_id):
-        url = "https://openrouter.ai/api/v1/models/user"
+        url = f"{OPENROUTER_BASE_URL}/models/user"
         headers = {"Authorization": f"Bearer {self.api_key}"}
         response = requests.get(url, headers=headers)
         models = response.json()["data"]
@@ -177,7 +201,7 @@ class OpenRouterAPIClient:
             print(f"{key}: {value}")
 
     def get_credit(self):
-        url = "https://openrouter.ai/api/v1/credits"
+        url = f"{OPENROUTER_BASE_URL}/credits"
         headers = {"Authorization": f"Bearer {self.api_key}"}
         response = requests.get(url, headers=headers)
         print(response.json())
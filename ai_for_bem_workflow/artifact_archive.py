@@ -0,0 +1,260 @@
+"""
+artifact_archive.py
+-------------------
+Compressed, de-duplicated archive of the raw run artifacts (idf trials, prompts, histories, EnergyPlus outputs).
+
+Files are cut into content-defined chunks: a chunk ends after a line whose crc32 is a multiple of AVG_CHUNK_LINES,
+so an edit only changes the chunks around it, and the chunks of the example IDF embedded in every prompt, or of
+idf trials that differ by a few objects, are identical across files and runs. Each chunk is stored once, the new
+chunks of a run are appended to one pack file, compressed with zstd in frames of FRAME_BYTES so that they share their
+compression context (a chunk of a few KB compressed alone, in a file of its own, takes more disk than the original):
+
+    archive/packs/<sha256>.pack     zstd frames, named after their content
+    archive/manifests/<run>.json    files: size, sha256 and chunk indices, chunks: sha256, pack index, frame offset
+                                    and length, offset and length of the chunk in the frame, packs: pack names
+
+ArtifactArchive.open returns the original content, so archived runs are read like the results/vN folders.
+"""
+
+import os
+import io
+import json
+import shutil
+import zlib
+import hashlib
+import zstandard as zstd
+
+ARCHIVE_DIR = os.path.join("results", "archive")
+AVG_CHUNK_LINES = 32
+MAX_CHUNK_BYTES = 1 << 20
+COMPRESSION_LEVEL = 10
+# raw bytes of the chunks compressed together in one zstd frame, a read decompresses one frame
+FRAME_BYTES = 1 << 20
+
+
+def content_chunks(data, avg_lines=AVG_CHUNK_LINES, max_bytes=MAX_CHUNK_BYTES):
+    """
+    :param data: file content, bytes
+    :return: list of chunks, bytes, joining to data
+    """
+    chunks = []
+    current = []
+    size = 0
+    for line in data.splitlines(keepends=True):
+        # binary files may have very long lines, these are cut at max_bytes
+        for start in range(0, len(line), max_bytes):
+            piece = line[start:start + max_bytes]
+            current.append(piece)
+            size += len(piece)
+            if zlib.crc32(piece) % avg_lines == 0 or size >= max_bytes:
+                chunks.append(b"".join(current))
+                current = []
+                size = 0
+    if current:
+        chunks.append(b"".join(current))
+    return chunks
+
+
+class ArtifactArchive:
+    """
+    archive_dir: root of the packs and manifests
+    """
+
+    def __init__(self, archive_dir=ARCHIVE_DIR, level=COMPRESSION_LEVEL):
+        self.archive_dir = archive_dir
+        self.packs_dir = os.path.join(archive_dir, "packs")
+        self.manifests_dir = os.path.join(archive_dir, "manifests")
+        os.makedirs(self.packs_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        self.compressor = zstd.ZstdCompressor(level=level)
+        self.decompressor = zstd.ZstdDecompressor()
+        self._manifests = {}
+        self._locations = None
+        # last decompressed frame, the chunks of a file are read in order
+        self._frame = (None, b"")
+
+    def pack_path(self, pack):
+        return os.path.join(self.packs_dir, f"{pack}.pack")
+
+    def locations(self):
+        """
+        :return: dict of chunk sha256: [pack, frame offset, frame length, offset, length] of the archived chunks
+        """
+        if self._locations is None:
+            self._locations = {}
+            for run in self.runs():
+                self._locations.update(self.manifest(run)["chunks"])
+        return self._locations
+
+    def write_pack(self, chunks):
+        """
+        appends chunks to a new pack file, in frames of about FRAME_BYTES
+        :return: pack name and dict of chunk sha256: location
+        """
+        frames, frame, size = [], [], 0
+        for digest, chunk in chunks:
+            frame.append((digest, chunk))
+            size += len(chunk)
+            if size >= FRAME_BYTES:
+                frames.append(frame)
+                frame, size = [], 0
+        if frame:
+            frames.append(frame)
+
+        hasher = hashlib.sha256()
+        tmp_path = os.path.join(self.packs_dir, f"pack.{os.getpid()}.tmp")
+        locations = {}
+        with open(tmp_path, "wb") as f:
+            for frame in frames:
+                compressed = self.compressor.compress(b"".join(x for _, x in frame))
+                offset = 0
+                for digest, chunk in frame:
+                    locations[digest] = [f.tell(), len(compressed), offset, len(chunk)]
+                    offset += len(chunk)
+                f.write(compressed)
+                hasher.update(compressed)
+        # named after the content, written then renamed so concurrent archivers never see a partial pack
+        pack = hasher.hexdigest()
+        os.replace(tmp_path, self.pack_path(pack))
+        return pack, {digest: [pack] + location for digest, location in locations.items()}
+
+    def get_chunk(self, location):
+        pack, frame_offset, frame_length, offset, length = location
+        if self._frame[0] != (pack, frame_offset):
+            with open(self.pack_path(pack), "rb") as f:
+                f.seek(frame_offset)
+                self._frame = ((pack, frame_offset), self.decompressor.decompress(f.read(frame_length)))
+        return self._frame[1][offset:offset + length]
+
+    @staticmethod
+    def disk_size(path):
+        """bytes allocated on disk to a file, its size where the file system does not tell"""
+        stat = os.stat(path)
+        blocks = getattr(stat, "st_blocks", None)
+        return blocks * 512 if blocks is not None else stat.st_size
+
+    def disk_bytes(self):
+        """bytes allocated on disk to the whole archive"""
+        return sum(self.disk_size(os.path.join(folder, x)) for folder in [self.packs_dir, self.manifests_dir]
+                   for x in os.listdir(folder))
+
+    # ── runs ──────────────────────────────────────────────────────────────────
+
+    def manifest_path(self, run):
+        return os.path.join(self.manifests_dir, f"{run}.json")
+
+    def archive_run(self, run_dir, run=None, remove_source=False):
+        """
+        :param run_dir: folder to archive, e.g. results/v12
+        :param run: archive name, defaults to the folder name
+        :param remove_source: deletes run_dir once its manifest is written
+        :return: dict with the original bytes, and the bytes on disk of its new pack and manifest
+        """
+        run = run or os.path.basename(os.path.normpath(run_dir))
+        locations = self.locations()
+        files, new_chunks = {}, {}
+        stats = {"files": 0, "original_bytes": 0, "stored_bytes": 0}
+        for root, _, filenames in os.walk(run_dir):
+            for filename in sorted(filenames):
+                file_path = os.path.join(root, filename)
+                with open(file_path, "rb") as f:
+                    data = f.read()
+                digests = []
+                for chunk in content_chunks(data):
+                    digest = hashlib.sha256(chunk).hexdigest()
+                    if digest not in locations:
+                        new_chunks.setdefault(digest, chunk)
+                    digests.append(digest)
+                files[os.path.relpath(file_path, run_dir).replace(os.sep, "/")] = {
+                    "size": len(data),
+                    "sha256": hashlib.sha256(data).hexdigest(),
+                    "chunks": digests,
+                }
+                stats["files"] += 1
+                stats["original_bytes"] += len(data)
+        chunks = {}
+        if new_chunks:
+            pack, chunks = self.write_pack(new_chunks.items())
+            stats["stored_bytes"] += self.disk_size(self.pack_path(pack))
+        for entry in files.values():
+            chunks.update({x: locations[x] for x in entry["chunks"] if x not in chunks})
+        # the chunks and packs are listed once, the files refer to them by index
+        index = {digest: i for i, digest in enumerate(chunks)}
+        packs = sorted({location[0] for location in chunks.values()})
+        pack_index = {pack: i for i, pack in enumerate(packs)}
+        tmp_path = f"{self.manifest_path(run)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"packs": packs,
+                       "chunks": [[digest, pack_index[location[0]]] + location[1:]
+                                  for digest, location in chunks.items()],
+                       "files": {name: {**entry, "chunks": [index[x] for x in entry["chunks"]]}
+                                 for name, entry in files.items()}}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.manifest_path(run))
+        stats["stored_bytes"] += self.disk_size(self.manifest_path(run))
+        self._manifests[run] = {"files": files, "chunks": chunks}
+        locations.update(chunks)
+        if remove_source:
+            shutil.rmtree(run_dir)
+        return stats
+
+    def manifest(self, run):
+        """
+        manifest of an archived run, read once
+        :return: dict of files: {file name: size, sha256, chunk sha256 list}, chunks: {chunk sha256: location}
+        """
+        if run not in self._manifests:
+            with open(self.manifest_path(run), "r") as f:
+                manifest = json.load(f)
+            table = [(x[0], [manifest["packs"][x[1]]] + x[2:]) for x in manifest["chunks"]]
+            self._manifests[run] = {
+                "files": {name: {**entry, "chunks": [table[i][0] for i in entry["chunks"]]}
+                          for name, entry in manifest["files"].items()},
+                "chunks": dict(table),
+            }
+        return self._manifests[run]
+
+    def runs(self):
+        return sorted(x[:-5] for x in os.listdir(self.manifests_dir) if x.endswith(".json"))
+
+    def list_files(self, run):
+        return list(self.manifest(run)["files"].keys())
+
+    def read_bytes(self, run, filename):
+        manifest = self.manifest(run)
+        entry = manifest["files"][filename]
+        data = b"".join(self.get_chunk(manifest["chunks"][x]) for x in entry["chunks"])
+        if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            raise IOError(f"archived {run}/{filename} is corrupted")
+        return data
+
+    def open(self, run, filename, mode="r", encoding="utf-8"):
+        """
+        file-like object with the original content, e.g. pd.read_csv(archive.open("v12", "eplusmtr.csv"))
+        """
+        data = self.read_bytes(run, filename)
+        if "b" in mode:
+            return io.BytesIO(data)
+        return io.StringIO(data.decode(encoding))
+
+    def restore_run(self, run, target_dir):
+        for filename in self.list_files(run):
+            path = os.path.join(target_dir, *filename.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(self.read_bytes(run, filename))
+        return target_dir
+
+
+def main():
+    archive = ArtifactArchive()
+    original = 0
+    for run in sorted(os.listdir("results")):
+        run_dir = os.path.join("results", run)
+        if run.startswith("v") and os.path.isdir(run_dir) and run not in archive.runs():
+            stats = archive.archive_run(run_dir)
+            original += stats["original_bytes"]
+    print(f"archived {original / 1e6:.1f} MB, archive takes {archive.disk_bytes() / 1e6:.1f} MB on disk")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+batch_runner.py
+---------------
+Headless batch of workflow runs over a table of building descriptions.
+
+The input is a .csv or .jsonl file with one building per row and the keys of the GUI form (epw_file, layout, a, b,
+c, d, ceiling_height, number_of_floors, WWR, details, ...), plus an optional job_id column. Every job runs
+workflow_pipeline.run_workflow in its own workspace folder. Jobs run in threads, LLM requests are bounded by a
+semaphore and EnergyPlus runs go to a process pool of max_simulations workers. Finished jobs are appended to
+checkpoint.jsonl, so an interrupted batch skips them when restarted, and summary.csv gathers all of them.
+Rows without an epw_file get the weather of the nearest station of the weather folder (weather_catalog.py), found
+from their latitude and longitude columns or else their location.
+With --queue the jobs go to the job service of job_queue.py instead, and run in its worker processes.
+
+    python batch_runner.py buildings.csv --batch-dir batch_runs/portfolio --client gemini
+    python batch_runner.py buildings.csv --batch-dir batch_runs/portfolio --queue
+"""
+
+import os
+import json
+import argparse
+import threading
+import traceback
+from time import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import pandas as pd
+from ai_bem_workflow import BuildingEnergyWorkflow
+from results_store import ResultsStore
+from simulation_pool import run_simulation
+from job_queue import JobQueue, start_service
+from weather_catalog import WeatherCatalog
+import workflow_pipeline
+
+CHECKPOINT_FILE = "checkpoint.jsonl"
+SUMMARY_FILE = "summary.csv"
+
+
+def read_descriptions(input_file):
+    """
+    :param input_file: .csv or .jsonl
+    :return: list of description dicts, each with a job_id
+    """
+    if input_file.endswith(".jsonl"):
+        with open(input_file, "r", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        df = pd.read_csv(input_file)
+        # empty cells are None, as the optional fields of the GUI
+        rows = [{k: (None if pd.isna(v) else v) for k, v in row.items()} for row in df.to_dict("records")]
+    descriptions = []
+    for i, row in enumerate(rows):
+        row = dict(row)
+        row["job_id"] = str(row.get("job_id") or f"job_{i + 1}")
+        descriptions.append(row)
+    return descriptions
+
+
+class BatchWorkflow(BuildingEnergyWorkflow):
+    """
+    BuildingEnergyWorkflow sharing LLM slots and a simulation process pool with the other jobs of a batch
+    """
+
+    def __init__(self, client_type, workflow_dir, llm_slots, simulation_executor, output_format="idf"):
+        super().__init__(client_type, workflow_dir, output_format=output_format)
+        self.llm_slots = llm_slots
+        self.simulation_executor = simulation_executor
+
+    def llm_generate_idf(self, prompt, i):
+        with self.llm_slots:
+            return super().llm_generate_idf(prompt, i)
+
+    def add_internal_gains(self, building_description, idf_path):
+        with self.llm_slots:
+            return super().add_internal_gains(building_description, idf_path)
+
+    def add_hvac_templates(self, building_desc, idf_path, epw_file=None):
+        with self.llm_slots:
+            return super().add_hvac_templates(building_desc, idf_path, epw_file)
+
+    def run_energyplus(self, idf_path, epw_file, collector=None, progress=None):
+        # the run happens in another process, the progress callbacks are not forwarded
+        future = self.simulation_executor.submit(run_simulation, os.path.abspath(idf_path),
+                                                 os.path.abspath(epw_file), os.path.abspath(self.workflow_dir))
+        success, _ = future.result()
+        print("Simulation executed successfully" if success else "Simulation failed")
+        return success
+
+
+class BatchRunner:
+    """
+    batch_dir: folder of the workspaces, checkpoint and summary
+    max_jobs: buildings processed at the same time
+    max_llm_calls: concurrent LLM requests
+    max_simulations: concurrent EnergyPlus runs
+    output_format: "idf" or "ir", see BuildingEnergyWorkflow
+    weather_dir: EPW files the weather of the rows without epw_file is picked from
+    """
+
+    def __init__(self, batch_dir, client_type="gemini", max_jobs=4, max_llm_calls=2, max_simulations=None,
+                 results_store=None, output_format="idf", weather_dir="input_files"):
+        self.batch_dir = batch_dir
+        self.weather_dir = weather_dir
+        self.output_format = output_format
+        self.client_type = client_type
+        self.max_jobs = max_jobs
+        self.max_simulations = max_simulations or os.cpu_count()
+        self.llm_slots = threading.BoundedSemaphore(max_llm_calls)
+        self.results_store = results_store if results_store is not None else ResultsStore()
+        self.checkpoint_file = os.path.join(batch_dir, CHECKPOINT_FILE)
+        self._checkpoint_lock = threading.Lock()
+        os.makedirs(os.path.join(batch_dir, "workspaces"), exist_ok=True)
+
+    def completed_jobs(self):
+        if not os.path.exists(self.checkpoint_file):
+            return {}
+        completed = {}
+        with open(self.checkpoint_file, "r", encoding="utf-8") as f:
+            for line in f:
+                # a line cut by an interruption is ignored, the job runs again
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                completed[record["job_id"]] = record
+        return completed
+
+    def checkpoint(self, record):
+        with self._checkpoint_lock:
+            with open(self.checkpoint_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def assign_weather(self, descriptions):
+        """
+        sets the epw_file of the descriptions without one, from their latitude and longitude or location
+        :return: number of descriptions given a weather file
+        """
+        missing = [x for x in descriptions if not x.get("epw_file")]
+        if not missing:
+            return 0
+        catalog = WeatherCatalog(self.weather_dir)
+        assigned = 0
+        for description in missing:
+            if description.get("latitude") is not None and description.get("longitude") is not None:
+                location = (float(description["latitude"]), float(description["longitude"]))
+            else:
+                location = description.get("location") or ""
+            epw_file = catalog.epw_for(location)
+            if epw_file is not None:
+                description["epw_file"] = epw_file
+                assigned += 1
+        print(f"weather assigned to {assigned} of {len(missing)} jobs without epw_file")
+        return assigned
+
+    def run_job(self, description, simulation_executor):
+        job_id = description["job_id"]
+        workspace = os.path.join(self.batch_dir, "workspaces", job_id)
+        start = time()
+        record = {"job_id": job_id}
+        try:
+            ghge_modeller = BatchWorkflow(self.client_type, workspace, self.llm_slots, simulation_executor,
+                                          self.output_format)
+            # files of a previous, interrupted attempt
+            for filename in os.listdir(workspace):
+                os.remove(os.path.join(workspace, filename))
+            if not description.get("epw_file"):
+                raise ValueError(f"no weather file found for location {description.get('location')!r}")
+            building = {k: v for k, v in description.items() if k not in ("job_id", "latitude", "longitude")}
+            log = lambda msg="": print(f"[{job_id}] {msg}")
+            summary = workflow_pipeline.run_workflow(ghge_modeller, building, log, self.results_store)
+            record.update({"status": "done", "results_summary": summary})
+        except Exception:
+            record.update({"status": "failed", "error": traceback.format_exc()})
+        record["elapsed"] = time() - start
+        self.checkpoint(record)
+        return record
+
+    def run(self, descriptions):
+        """
+        :param descriptions: list of description dicts from read_descriptions
+        :return: summary df, one row per job
+        """
+        completed = self.completed_jobs()
+        pending = [x for x in descriptions if completed.get(x["job_id"], {}).get("status") != "done"]
+        print(f"{len(descriptions) - len(pending)} jobs already done, {len(pending)} to run")
+        self.assign_weather(pending)
+        with ProcessPoolExecutor(max_workers=self.max_simulations) as simulation_executor:
+            with ThreadPoolExecutor(max_workers=self.max_jobs) as executor:
+                futures = [executor.submit(self.run_job, x, simulation_executor) for x in pending]
+                for future in as_completed(futures):
+                    record = future.result()
+                    print(f"[{record['job_id']}] {record['status']} in {record['elapsed']:.0f}s")
+        return self.write_summary(descriptions)
+
+    def submit(self, descriptions, job_queue, wait=True):
+        """
+        queues the jobs on the job service (job_queue.py) instead of running them in this process, the batch keeps
+        running if this process exits
+        :param job_queue: JobQueue, the jobs are grouped under the name of batch_dir
+        :return: summary df once all jobs finished, or the list of queued job ids if wait is False
+        """
+        completed = self.completed_jobs()
+        pending = [x for x in descriptions if completed.get(x["job_id"], {}).get("status") != "done"]
+        batch = os.path.basename(os.path.normpath(self.batch_dir))
+        self.assign_weather(pending)
+        queued = {}
+        for description in pending:
+            if not description.get("epw_file"):
+                # rejected here, the worker would fail on the missing weather file
+                self.checkpoint({"job_id": description["job_id"], "status": "failed", "elapsed": 0,
+                                 "error": f"no weather file found for location {description.get('location')!r}"})
+                continue
+            building = {k: v for k, v in description.items() if k not in ("job_id", "latitude", "longitude")}
+            queued[description["job_id"]] = job_queue.submit(building, self.client_type, description["job_id"], batch)
+        print(f"{len(descriptions) - len(pending)} jobs already done, {len(queued)} queued as batch {batch}")
+        if not wait:
+            return list(queued.values())
+        for job_id, job in zip(queued, job_queue.wait(list(queued.values()))):
+            record = {"job_id": job_id, "status": job["status"], "results_summary": job["result"],
+                      "error": job["error"], "elapsed": (job["finished"] or 0) - (job["started"] or 0)}
+            self.checkpoint(record)
+        return self.write_summary(descriptions)
+
+    def write_summary(self, descriptions):
+        completed = self.completed_jobs()
+        rows = []
+        for description in descriptions:
+            record = completed.get(description["job_id"], {})
+            summary = record.get("results_summary") or {}
+            row = {"job_id": description["job_id"],
+                   "layout": description.get("layout"),
+                   "epw_file": description.get("epw_file"),
+                   "status": record.get("status", "pending"),
+                   "success": summary.get("success"),
+                   "run_dir": summary.get("run_dir"),
+                   "trials": summary.get("trials"),
+                   "elapsed": record.get("elapsed")}
+            for group in ["model_props", "percent_error", "meters"]:
+                row.update({f"{group}.{k}": v for k, v in (summary.get(group) or {}).items()})
+            rows.append(row)
+        df = pd.DataFrame(rows)
+        df.to_csv(os.path.join(self.batch_dir, SUMMARY_FILE), index=False)
+        return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the workflow over a table of building descriptions")
+    parser.add_argument("input_file", help=".csv or .jsonl with one building description per row")
+    parser.add_argument("--batch-dir", default=os.path.join("batch_runs", "batch"))
+    parser.add_argument("--client", default="gemini")
+    parser.add_argument("--max-jobs", type=int, default=4)
+    parser.add_argument("--max-llm-calls", type=int, default=2)
+    parser.add_argument("--max-simulations", type=int, default=None)
+    parser.add_argument("--output-format", choices=["idf", "ir"], default="idf",
+                        help="LLM output, the IDF file or the compact building JSON compiled locally")
+    parser.add_argument("--weather-dir", default="input_files",
+                        help="EPW files searched for the rows without epw_file")
+    parser.add_argument("--queue", action="store_true", help="submit the jobs to the job service (job_queue.py)")
+    parser.add_argument("--no-wait", action="store_true", help="with --queue, return once the jobs are queued")
+    args = parser.parse_args()
+
+    runner = BatchRunner(args.batch_dir, args.client, args.max_jobs, args.max_llm_calls, args.max_simulations,
+                         output_format=args.output_format, weather_dir=args.weather_dir)
+    descriptions = read_descriptions(args.input_file)
+    if args.queue:
+        start_service(workers=args.max_simulations)
+        result = runner.submit(descriptions, JobQueue(), wait=not args.no_wait)
+        if args.no_wait:
+            print("\n".join(result))
+            return
+        df = result
+    else:
+        df = runner.run(descriptions)
+    print(df[["job_id", "status", "success", "run_dir"]])
+
+
+if __name__ == "__main__":
+    main()
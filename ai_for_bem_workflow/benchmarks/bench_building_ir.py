@@ -0,0 +1,32 @@
+import os
+import pytest
+from ai_bem_workflow import BuildingEnergyWorkflow
+from building_ir import BuildingIR
+from mock_openrouter import RECORDINGS_DIR
+
+pytestmark = pytest.mark.idd
+
+DESCRIPTION = {
+    "layout": "Rectangular building", "a": 30.0, "b": 20.0, "c": None, "d": None,
+    "ceiling_height": 3.0, "number_of_floors": 1, "basement_floors": 0, "WWR": 0.3,
+    "details": "small office", "location": "Ottawa", "age": "2021", "orientation": "S",
+    "zones_per_floor": "1 zone",
+}
+
+
+def bench_compile_ir(benchmark, workspace):
+    with open(os.path.join(RECORDINGS_DIR, "building_ir.json"), "r", encoding="utf-8") as f:
+        text = f.read()
+    idf = benchmark(lambda: BuildingIR.from_json(text).to_idf())
+    assert len(idf.idfobjects["FENESTRATIONSURFACE:DETAILED"]) == 4
+
+
+@pytest.mark.parametrize("output_format", ["idf", "ir"])
+def bench_llm_generation(benchmark, workspace, llm_server, output_format):
+    """one generation trial, the output tokens are those counted by the mock server"""
+    ghge_modeller = BuildingEnergyWorkflow("gemini", output_format=output_format)
+    prompt = ghge_modeller.create_prompt(DESCRIPTION)
+    model = benchmark(ghge_modeller.llm_generate_idf, prompt, 1)
+    assert "BuildingSurface:Detailed" in model
+    benchmark.extra_info["completion_tokens"] = ghge_modeller.client.last_usage["completion_tokens"]
+    benchmark.extra_info["prompt_tokens"] = ghge_modeller.client.last_usage["prompt_tokens"]
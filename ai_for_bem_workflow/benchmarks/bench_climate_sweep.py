@@ -0,0 +1,34 @@
+import itertools
+import pytest
+from climate_sweep import ClimateSweep
+
+pytestmark = pytest.mark.idd
+
+EPW_FILE = "input_files/Ottawa_CWEC_2020.epw"
+
+
+@pytest.fixture
+def climates(workspace):
+    """copies of the Ottawa file under other station names, so each one is a distinct run"""
+    with open(EPW_FILE, "r") as f:
+        lines = f.readlines()
+    epw_files = []
+    for i in range(4):
+        path = workspace / f"climate_{i}.epw"
+        fields = lines[0].split(",")
+        fields[1] = f"CLIMATE {i}"
+        with open(path, "w") as f:
+            f.write(",".join(fields))
+            f.writelines(lines[1:])
+        epw_files.append(str(path))
+    return epw_files
+
+
+def bench_climate_sweep(benchmark, example_idf, eplus_outputs, climates):
+    """model moved to 4 climates and simulated by the fake EnergyPlus, a new runs folder every round"""
+    idf_path = example_idf()
+    counter = itertools.count()
+    df = benchmark.pedantic(lambda: ClimateSweep(idf_path, climates, runs_dir=f"climate_runs_{next(counter)}")
+                            .evaluate(), rounds=3)
+    assert len(df) == 4
+    assert df["success"].all()
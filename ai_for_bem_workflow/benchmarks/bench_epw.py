@@ -0,0 +1,26 @@
+from epw import parse_epw, load_epw, read_header
+import epw
+
+EPW_FILE = "input_files/Ottawa_CWEC_2020.epw"
+
+
+def bench_parse_epw(benchmark, workspace):
+    header, data = benchmark(parse_epw, EPW_FILE)
+    assert len(data) == 8760
+    assert header["ground_temperatures"][0]["depth"] == 0.5
+
+
+def bench_load_epw_cached(benchmark, workspace):
+    """a new process loading a weather file another one already parsed: the header json and a memory-mapped npy"""
+    load_epw(EPW_FILE)
+
+    def load():
+        epw._loaded.clear()
+        return load_epw(EPW_FILE)
+    weather = benchmark(load)
+    assert len(weather) == 8760
+
+
+def bench_ground_temperatures(benchmark, workspace):
+    temperatures = benchmark(lambda: read_header(EPW_FILE)["ground_temperatures"][0]["temperatures"])
+    assert len(temperatures) == 12
@@ -0,0 +1,18 @@
+import os
+from error_parser import ErrorParser
+from synthetic_outputs import RECORDED_ERRORS
+
+
+def parse_and_filter(outcome):
+    error_parser = ErrorParser()
+    error_parser.parse(os.path.dirname(RECORDED_ERRORS[outcome]), os.path.basename(RECORDED_ERRORS[outcome]))
+    return error_parser.get_severe_fatal() + error_parser.get_non_enclosed()
+
+
+def bench_parse_failed_run(benchmark):
+    errors = benchmark(parse_and_filter, "fail")
+    assert errors
+
+
+def bench_parse_successful_run(benchmark):
+    benchmark(parse_and_filter, "success")
@@ -0,0 +1,28 @@
+import pytest
+from ai_bem_workflow import BuildingEnergyWorkflow
+from results_store import ResultsStore
+import workflow_pipeline
+
+pytestmark = pytest.mark.idd
+
+# matches the synthetic outputs: 600 m2, 3 m ceilings, 30% WWR, so the spec check passes on the first trial
+DESCRIPTION = {
+    "epw_file": "input_files/Ottawa_CWEC_2020.epw",
+    "layout": "Rectangular building", "a": 30.0, "b": 20.0, "c": None, "d": None,
+    "ceiling_height": 3.0, "number_of_floors": 1, "basement_floors": 0, "WWR": 0.3,
+    "details": "small office", "location": "Ottawa", "age": "2021", "orientation": "S",
+    "people_description": "20 m2 per person", "lighting_description": "LED, 6 W/m2",
+    "equipment_description": "8 W/m2", "hvac_description": "packaged VAV with economizer",
+    "zones_per_floor": "5 zones",
+}
+
+
+def bench_full_workflow(benchmark, workspace, llm_server, eplus_outputs):
+    def run():
+        ghge_modeller = BuildingEnergyWorkflow("gemini")
+        return workflow_pipeline.run_workflow(ghge_modeller, DESCRIPTION, log=lambda msg="": None,
+                                              results_store=ResultsStore())
+    summary = benchmark.pedantic(run, rounds=5, warmup_rounds=1)
+    assert summary["success"]
+    benchmark.extra_info["buildings_per_hour"] = 3600 / benchmark.stats.stats.mean
+    benchmark.extra_info["llm_requests"] = llm_server.requests
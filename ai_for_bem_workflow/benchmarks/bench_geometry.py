@@ -0,0 +1,72 @@
+import os
+import sys
+import shutil
+import pytest
+from config import EPLUS_IDD
+from ai_bem_workflow import BuildingEnergyWorkflow
+from geometry_compiler import GeometryCompiler, ZONING
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                "analysis_doe_model"))
+from reading_Rvalues import Building
+from batch_Rvalues import batch_envelope_analysis
+from envelope_performance import EnvelopePerformance
+
+LAYOUTS = {
+    "Rectangular building": (30, 20, None, None),
+    "L-shaped building": (30, 20, 10, 8),
+    "T-shaped building": (30, 20, 10, 8),
+    "U-shaped building": (30, 20, 10, 8),
+    "Hollow building": (30, 20, 10, 8),
+}
+
+
+def bench_groundtruth_all_layouts(benchmark, workspace):
+    ghge_modeller = BuildingEnergyWorkflow("gemini")
+
+    def groundtruth():
+        return [ghge_modeller.get_groundtruth({
+            "layout": layout, "a": a, "b": b, "c": c, "d": d, "number_of_floors": 3, "ceiling_height": 3.0,
+            "WWR": 0.3}) for layout, (a, b, c, d) in LAYOUTS.items()]
+    props = benchmark(groundtruth)
+    assert props[0]["total_floor_area"] == 1800
+
+
+@pytest.mark.parametrize("zones_per_floor", ZONING)
+def bench_compile_all_layouts(benchmark, workspace, zones_per_floor):
+    ghge_modeller = BuildingEnergyWorkflow("gemini")
+    descriptions = [{"layout": layout, "a": a, "b": b, "c": c, "d": d, "number_of_floors": 3, "ceiling_height": 3.0,
+                     "WWR": 0.3, "orientation": "S", "zones_per_floor": zones_per_floor}
+                    for layout, (a, b, c, d) in LAYOUTS.items()]
+
+    def compile_all():
+        compilers = [GeometryCompiler.from_description(x) for x in descriptions]
+        for compiler in compilers:
+            compiler.to_idf_text()
+        return compilers
+    compilers = benchmark(compile_all)
+    for compiler, description in zip(compilers, descriptions):
+        expected = ghge_modeller.get_groundtruth(description)["total_floor_area"]
+        assert compiler.floor_area * compiler.number_of_floors == pytest.approx(expected)
+
+
+@pytest.mark.idd
+def bench_batch_Rvalues(benchmark, workspace):
+    """R/U table of the DOE prototypes of DOE_MODELS_DIR if set, otherwise of the example model"""
+    models_dir = os.environ.get("DOE_MODELS_DIR")
+    if models_dir is None:
+        models_dir = str(workspace / "models")
+        os.makedirs(models_dir)
+        shutil.copy(os.path.join("input_files", "example_file_prompt.idf"), models_dir)
+    df = benchmark.pedantic(batch_envelope_analysis, args=(models_dir, EPLUS_IDD), kwargs={"max_workers": 2},
+                            rounds=1)
+    assert len(df) > 0
+    assert (df["surface_type"] == "Window").any()
+
+
+@pytest.mark.idd
+def bench_envelope_performance(benchmark, workspace):
+    def envelope():
+        building = Building(EPLUS_IDD, os.path.join("input_files", "example_file_prompt.idf"))
+        return EnvelopePerformance(building).calc()
+    summary, _ = benchmark(envelope)
+    assert summary["envelope_area"] > 0
@@ -0,0 +1,56 @@
+import pytest
+from ai_bem_workflow import BuildingEnergyWorkflow
+from design_days import read_epw_hourly, design_conditions
+
+pytestmark = pytest.mark.idd
+
+DESCRIPTION = {"layout": "Rectangular building", "a": 30, "b": 20, "c": None, "d": None,
+               "people_description": "20 m2 per person", "lighting_description": "LED, 6 W/m2",
+               "equipment_description": "8 W/m2", "hvac_description": "packaged VAV with economizer"}
+
+
+@pytest.fixture
+def modeller(workspace, llm_server):
+    return BuildingEnergyWorkflow("gemini")
+
+
+def run_rounds(benchmark, example_idf, function):
+    benchmark.pedantic(function, setup=lambda: ((example_idf(),), {}), rounds=10)
+
+
+def bench_add_base_objects(benchmark, modeller, example_idf):
+    run_rounds(benchmark, example_idf, modeller.add_base_objects)
+
+
+def bench_add_output_objects(benchmark, modeller, example_idf):
+    run_rounds(benchmark, example_idf, lambda idf_path: modeller.add_output_objects(
+        idf_path, ["Zone Mean Air Temperature"], ["Electricity:Facility", "Heating:EnergyTransfer"]))
+
+
+def bench_add_ground_temperatures(benchmark, modeller, example_idf):
+    run_rounds(benchmark, example_idf, lambda idf_path: modeller.add_ground_temperatures(
+        idf_path, "input_files/Ottawa_CWEC_2020.epw"))
+
+
+def bench_add_internal_gains(benchmark, modeller, example_idf):
+    run_rounds(benchmark, example_idf, lambda idf_path: modeller.add_internal_gains(DESCRIPTION, idf_path))
+
+
+def bench_add_hvac_templates(benchmark, modeller, example_idf):
+    run_rounds(benchmark, example_idf, lambda idf_path: modeller.add_hvac_templates(DESCRIPTION, idf_path))
+
+
+def bench_add_hvac_templates_design_days(benchmark, modeller, example_idf):
+    run_rounds(benchmark, example_idf, lambda idf_path: modeller.add_hvac_templates(
+        DESCRIPTION, idf_path, "input_files/Ottawa_CWEC_2020.epw"))
+
+
+def bench_design_conditions(benchmark, workspace):
+    weather = read_epw_hourly("input_files/Ottawa_CWEC_2020.epw")
+    conditions = benchmark(design_conditions, weather)
+    assert conditions["heating"]["dry_bulb"] < conditions["cooling"]["dry_bulb"]
+
+
+@pytest.mark.parametrize("stage", ["executability", "final"])
+def bench_set_fidelity(benchmark, modeller, example_idf, stage):
+    run_rounds(benchmark, example_idf, lambda idf_path: modeller.set_fidelity(idf_path, stage))
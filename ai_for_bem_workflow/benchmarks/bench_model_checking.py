@@ -0,0 +1,49 @@
+import os
+import pandas as pd
+import pytest
+from model_checking import ModelChecking
+from eplus_timestamps import parse_datetime_column
+from synthetic_outputs import write_output_folder, date_time_labels
+
+
+def model_checking(output_dir):
+    return ModelChecking(os.path.join(output_dir, "eplustbl.csv"),
+                         os.path.join(output_dir, "eplusout.csv"),
+                         os.path.join(output_dir, "eplusmtr.csv"),
+                         os.path.join(output_dir, "eplusout.eio"))
+
+
+@pytest.fixture(scope="module")
+def subhourly_outputs(tmp_path_factory):
+    return write_output_folder(str(tmp_path_factory.mktemp("subhourly")), timesteps_per_hour=4)
+
+
+def bench_envelope_props(benchmark, eplus_outputs):
+    props = benchmark(model_checking(eplus_outputs).get_envelope_props)
+    assert props["total_floor_area"] == pytest.approx(600)
+
+
+def bench_meters_hourly(benchmark, eplus_outputs):
+    meters = benchmark(model_checking(eplus_outputs).get_meters)
+    assert meters["Electricity EUI"] > 0
+
+
+def bench_meter_arrays_subhourly(benchmark, subhourly_outputs):
+    arrays = benchmark(model_checking(subhourly_outputs).get_meter_arrays, ["Electricity:Facility"])
+    assert len(arrays["Electricity:Facility"]) == 35040
+
+
+def bench_timestamps_multiyear_subhourly(benchmark):
+    labels = pd.Series(date_time_labels(timesteps_per_hour=4, years=3)).to_numpy()
+    timestamps, environments = benchmark(parse_datetime_column, labels)
+    assert environments.max() == 0 and timestamps.is_monotonic_increasing
+
+
+def bench_timestamps_design_day_and_run_period(benchmark):
+    """a December heating design day then the annual run period, two environments and no year rollover"""
+    design_day = [f" 12/21  {hour:02d}:00:00" for hour in range(1, 25)]
+    labels = pd.Series(design_day + date_time_labels(years=2)).to_numpy()
+    timestamps, environments = benchmark(parse_datetime_column, labels)
+    assert (environments[:24] == 0).all() and (environments[24:] == 1).all()
+    assert timestamps[24] == pd.Timestamp("2025-01-01 01:00")
+    assert timestamps[-1] == pd.Timestamp("2027-01-01 00:00")
@@ -0,0 +1,56 @@
+import pytest
+from eppy.modeleditor import IDF
+from config import set_idd
+from geometry_compiler import GeometryCompiler
+from model_reduction import FloorMultiplierReduction
+
+pytestmark = pytest.mark.idd
+
+
+@pytest.mark.parametrize("number_of_floors", [5, 10, 20])
+def bench_reduce_floors(benchmark, example_idf, number_of_floors):
+    compiler = GeometryCompiler("Rectangular building", 30, 20, number_of_floors=number_of_floors,
+                                zones_per_floor="5 zones")
+    set_idd()
+
+    def setup():
+        idf = IDF(example_idf())
+        compiler.to_idf(idf)
+        return (idf,), {}
+
+    def reduce(idf):
+        FloorMultiplierReduction(idf).reduce()
+        return idf
+    idf = benchmark.pedantic(reduce, setup=setup, rounds=5)
+    zones = idf.idfobjects["ZONE"]
+    # bottom, one intermediate and top floor
+    assert len(zones) == 3 * 5
+    assert sum(int(zone.Multiplier) for zone in zones) == number_of_floors * 5
+    benchmark.extra_info["zones_simulated"] = len(zones)
+    benchmark.extra_info["zones_described"] = number_of_floors * 5
+
+
+def bench_reduce_adjacent_runs(benchmark, example_idf):
+    """F2-F4 and F5-F7 are two runs stacked on each other, every linked surface is kept with its partner"""
+    compiler = GeometryCompiler("Rectangular building", 30, 20, number_of_floors=8)
+    set_idd()
+
+    def setup():
+        idf = IDF(example_idf())
+        compiler.to_idf(idf)
+        for surface in idf.idfobjects["BUILDINGSURFACE:DETAILED"]:
+            if surface.Zone_Name.split()[0] in ("F5", "F6", "F7") and surface.Surface_Type.lower() == "wall":
+                surface.Construction_Name = "Interior Wall"
+        return (idf,), {}
+
+    def reduce(idf):
+        return idf, FloorMultiplierReduction(idf).reduce()
+    idf, collapsed = benchmark.pedantic(reduce, setup=setup, rounds=5)
+    assert sorted(collapsed.values()) == [3, 3]
+    surfaces = {s.Name.upper(): s for s in idf.idfobjects["BUILDINGSURFACE:DETAILED"]}
+    for surface in surfaces.values():
+        if surface.Outside_Boundary_Condition.lower() != "surface":
+            continue
+        partner = surfaces.get(surface.Outside_Boundary_Condition_Object.upper())
+        assert partner is not None, surface.Name
+        assert partner.Outside_Boundary_Condition_Object.upper() == surface.Name.upper()
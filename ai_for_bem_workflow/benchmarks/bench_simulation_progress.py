@@ -0,0 +1,23 @@
+from simulation_progress import SimulationProgress
+
+MESSAGES = ["Performing Zone Sizing Simulation"] + [f"Warming up {{{i}}}" for i in range(1, 7)] + \
+           ["Starting Simulation at 01/01/2025 for RUN PERIOD 1"]
+
+
+def bench_progress_callbacks(benchmark):
+    """callbacks of one annual run, the log only gets the lines passing the rate limit"""
+    lines = []
+
+    def run():
+        lines.clear()
+        progress = SimulationProgress(lines.append)
+        for message in MESSAGES:
+            progress.on_message(message)
+        for step in range(8760 * 4):
+            progress.on_progress(step * 100 // (8760 * 4) + 1)
+        progress.emit(force=True)
+        return progress
+    benchmark(run)
+    assert 1 <= len(lines) <= 10
+    assert lines[-1] == "Bot: simulation 100% | RUN PERIOD 1"
+    benchmark.extra_info["lines_logged"] = len(lines)
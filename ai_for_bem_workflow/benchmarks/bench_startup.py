@@ -0,0 +1,51 @@
+"""
+Startup time of the entry points, measured in fresh interpreters with python -X importtime.
+
+The LLM SDKs and pyenergyplus are loaded on first use, importing the workflow modules must not pull them in.
+Run it as a script to list the slowest imports of a module:
+
+    python benchmarks/bench_startup.py batch_runner
+"""
+
+import os
+import sys
+import subprocess
+import pytest
+
+WORKFLOW_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINTS = ["ai_bem_workflow", "workflow_pipeline", "batch_runner", "simulation_pool"]
+LAZY_MODULES = ["anthropic", "openai", "google.genai", "pyenergyplus"]
+
+
+def import_times(module):
+    """
+    imports module in a fresh interpreter
+    :return: dict of imported module: cumulative import time [s]
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=WORKFLOW_DIR,
+                          env=dict(os.environ), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    times = {}
+    # import time: self [us] | cumulative | imported package
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        times[name.strip()] = int(cumulative_us) / 1e6
+    return times
+
+
+@pytest.mark.parametrize("module", ENTRY_POINTS)
+def bench_startup(benchmark, module):
+    times = benchmark.pedantic(import_times, args=(module,), rounds=3, iterations=1)
+    benchmark.extra_info["import_s"] = times[module]
+    loaded = [x for x in LAZY_MODULES if x in times]
+    assert not loaded, f"{module} imports {loaded} at startup"
+
+
+if __name__ == "__main__":
+    module = sys.argv[1] if len(sys.argv) > 1 else "ai_bem_workflow"
+    times = import_times(module)
+    for name, seconds in sorted(times.items(), key=lambda x: -x[1])[:25]:
+        print(f"{seconds:8.3f} s  {name}")
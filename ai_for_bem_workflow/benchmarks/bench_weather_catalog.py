@@ -0,0 +1,46 @@
+import os
+import shutil
+import pytest
+from weather_catalog import WeatherCatalog
+
+EPW_FILE = "input_files/Ottawa_CWEC_2020.epw"
+
+
+@pytest.fixture
+def weather_dir(workspace):
+    """library of copies of the Ottawa file spread over a grid of coordinates"""
+    folder = workspace / "weather"
+    folder.mkdir()
+    with open(EPW_FILE, "r") as f:
+        lines = f.readlines()
+    fields = lines[0].split(",")
+    for i, (lat, lon) in enumerate((lat, lon) for lat in range(-60, 70, 10) for lon in range(-180, 180, 15)):
+        fields[1], fields[6], fields[7] = f"STATION {i}", str(lat), str(lon)
+        with open(folder / f"station_{i}.epw", "w") as f:
+            f.write(",".join(fields))
+            f.writelines(lines[1:8])
+    shutil.copy(EPW_FILE, folder)
+    return str(folder)
+
+
+def bench_build_catalog(benchmark, weather_dir):
+    def build():
+        if os.path.exists(os.path.join(weather_dir, "weather_catalog.json")):
+            os.remove(os.path.join(weather_dir, "weather_catalog.json"))
+        return WeatherCatalog(weather_dir)
+    catalog = benchmark(build)
+    assert len(catalog.stations) == 13 * 24 + 1
+
+
+def bench_open_catalog(benchmark, weather_dir):
+    """catalog already indexed, no header is read"""
+    WeatherCatalog(weather_dir)
+    catalog = benchmark(WeatherCatalog, weather_dir)
+    assert len(catalog.stations) == 13 * 24 + 1
+
+
+def bench_find(benchmark, weather_dir):
+    catalog = WeatherCatalog(weather_dir)
+    station = benchmark(catalog.find, "45.4, -75.7")
+    assert station["city"] == "OTTAWA INTL A"
+    assert catalog.find("Ottawa")["city"] == "OTTAWA INTL A"
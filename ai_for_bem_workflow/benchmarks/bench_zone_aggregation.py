@@ -0,0 +1,74 @@
+"""
+Zone aggregation of a 5 zones per floor model: transform time and zones and surfaces left, as a proxy of the
+simulation time. The fake EnergyPlus of the benchmarks does not scale with the model, run it as a script with a real
+EnergyPlus install for the runtime and meter deviation of the aggregated model:
+
+    python benchmarks/bench_zone_aggregation.py model.idf input_files/Ottawa_CWEC_2020.epw
+"""
+
+import io
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import set_idd
+from geometry_compiler import GeometryCompiler
+from zone_aggregation import ZoneAggregation
+
+pytestmark = pytest.mark.idd
+
+
+def aggregated_text(idf_text):
+    from eppy.modeleditor import IDF
+    set_idd()
+    idf = IDF(io.StringIO(idf_text))
+    ZoneAggregation(idf).aggregate()
+    return idf.idfstr()
+
+
+def counts(idf):
+    return {"zones": len(idf.idfobjects["ZONE"]), "surfaces": len(idf.idfobjects["BUILDINGSURFACE:DETAILED"])}
+
+
+@pytest.mark.parametrize("number_of_floors", [4, 8])
+def bench_aggregate_zones(benchmark, example_idf, number_of_floors):
+    from eppy.modeleditor import IDF
+    set_idd()
+    compiler = GeometryCompiler("L-shaped building", 30, 20, 10, 8, number_of_floors=number_of_floors,
+                                zones_per_floor="5 zones")
+
+    def setup():
+        idf = IDF(example_idf())
+        compiler.to_idf(idf)
+        benchmark.extra_info["before"] = counts(idf)
+        return (idf,), {}
+
+    def aggregate(idf):
+        ZoneAggregation(idf).aggregate()
+        return idf
+    idf = benchmark.pedantic(aggregate, setup=setup, rounds=5)
+    benchmark.extra_info["after"] = counts(idf)
+    assert counts(idf)["zones"] < benchmark.extra_info["before"]["zones"]
+
+
+def compare(idf_path, epw_file, runs_dir="aggregation_runs"):
+    """
+    simulates a model and its aggregated version
+    :return: dict of model: elapsed time [s] and meters, and the deviation of the meters [%]
+    """
+    from simulation_pool import SimulationPool
+    with open(idf_path, "r", encoding="utf-8") as f:
+        detailed = f.read()
+    results = SimulationPool(runs_dir).run({"detailed": detailed, "aggregated": aggregated_text(detailed)}, epw_file)
+    reference, screening = results["detailed"]["meters"] or {}, results["aggregated"]["meters"] or {}
+    deviation = {k: 100 * (screening[k] - v) / v for k, v in reference.items() if k in screening and v}
+    return {name: {"elapsed": x["elapsed"], "meters": x["meters"]} for name, x in results.items()}, deviation
+
+
+if __name__ == "__main__":
+    runs, deviation = compare(sys.argv[1], sys.argv[2])
+    for name, run in runs.items():
+        print(f"{name:>10}: {run['elapsed']} s")
+    for meter, percent in deviation.items():
+        print(f"{meter:>40}: {percent:+.1f} %")
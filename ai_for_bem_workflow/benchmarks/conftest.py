@@ -0,0 +1,85 @@
+"""
+Benchmark setup: the workflow modules import the fake pyenergyplus of fake_eplus and talk to the mock OpenRouter
+server, so nothing needs API keys or an EnergyPlus install. eppy still needs an Energy+.idd, benchmarks marked idd
+are skipped when EPLUS_IDD does not exist.
+"""
+
+import os
+import sys
+import shutil
+import importlib
+import pytest
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKFLOW_DIR = os.path.dirname(BENCH_DIR)
+FAKE_EPLUS_DIR = os.path.join(BENCH_DIR, "fake_eplus")
+
+sys.path.insert(0, WORKFLOW_DIR)
+sys.path.insert(0, BENCH_DIR)
+# the idd of the real install is kept, only pyenergyplus is replaced
+import config
+os.environ.setdefault("EPLUS_IDD", config.EPLUS_IDD)
+os.environ["EPLUS_DIR"] = FAKE_EPLUS_DIR
+importlib.reload(config)
+sys.path.insert(0, FAKE_EPLUS_DIR)
+
+from mock_openrouter import MockOpenRouter
+from synthetic_outputs import write_output_folder
+
+
+def pytest_addoption(parser):
+    parser.addoption("--llm-latency", type=float, default=0.0, help="seconds added to every mock LLM response")
+    parser.addoption("--eplus-latency", type=float, default=0.0, help="seconds taken by every fake simulation")
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.path.exists(os.environ["EPLUS_IDD"]):
+        return
+    skip = pytest.mark.skip(reason=f"Energy+.idd not found at {os.environ['EPLUS_IDD']}, set EPLUS_IDD")
+    for item in items:
+        if "idd" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def llm_server(request):
+    import api_clients
+    server = MockOpenRouter(latency=request.config.getoption("--llm-latency")).start()
+    base_url = api_clients.OPENROUTER_BASE_URL
+    api_clients.OPENROUTER_BASE_URL = server.base_url
+    yield server
+    api_clients.OPENROUTER_BASE_URL = base_url
+    server.stop()
+
+
+@pytest.fixture(scope="session")
+def eplus_outputs(request, tmp_path_factory):
+    """recorded output folder replayed by the fake EnergyPlus runs"""
+    output_dir = write_output_folder(str(tmp_path_factory.mktemp("recorded_outputs")))
+    os.environ["FAKE_EPLUS_OUTPUTS"] = output_dir
+    os.environ["FAKE_EPLUS_LATENCY"] = str(request.config.getoption("--eplus-latency"))
+    return output_dir
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """empty working directory with the input_files of the workflow, as the workflow uses relative paths"""
+    target = tmp_path / "input_files"
+    try:
+        os.symlink(os.path.join(WORKFLOW_DIR, "input_files"), target, target_is_directory=True)
+    except OSError:
+        shutil.copytree(os.path.join(WORKFLOW_DIR, "input_files"), target)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def example_idf(workspace):
+    """fresh copy of the example idf, returns a function giving a new copy for every round"""
+    counter = iter(range(1_000_000))
+
+    def new_copy():
+        path = os.path.join(str(workspace), f"model_{next(counter)}.idf")
+        shutil.copyfile(os.path.join("input_files", "example_file_prompt.idf"), path)
+        return path
+    return new_copy
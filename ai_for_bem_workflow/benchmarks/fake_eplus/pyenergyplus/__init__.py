@@ -0,0 +1 @@
+"""stand-in for the pyenergyplus package of an EnergyPlus install, used by the benchmarks"""
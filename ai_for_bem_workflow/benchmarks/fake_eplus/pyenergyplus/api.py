@@ -0,0 +1,57 @@
+"""
+Fake EnergyPlusAPI replaying recorded outputs.
+
+run_energyplus copies the files of FAKE_EPLUS_OUTPUTS (an output folder, e.g. from synthetic_outputs.py) into the
+-d folder of the command line, after FAKE_EPLUS_LATENCY seconds, and returns 1 if the recorded eplusout.err has a
+fatal error. Callbacks are accepted and never called.
+"""
+
+import os
+import shutil
+import time
+
+
+class StateManager:
+    def new_state(self):
+        return {"console_output": True, "callbacks": []}
+
+    def delete_state(self, state):
+        state.clear()
+
+    def reset_state(self, state):
+        state["callbacks"] = []
+
+
+class Runtime:
+    def set_console_output_status(self, state, print_output):
+        state["console_output"] = print_output
+
+    def __getattr__(self, name):
+        # callback_begin_system_timestep_before_predictor, callback_end_zone_timestep_after_zone_reporting, ...
+        if name.startswith("callback_"):
+            return lambda state, function: state["callbacks"].append((name, function))
+        raise AttributeError(name)
+
+    def run_energyplus(self, state, command_line_args):
+        output_dir = command_line_args[command_line_args.index("-d") + 1] if "-d" in command_line_args else "."
+        recorded_dir = os.environ.get("FAKE_EPLUS_OUTPUTS")
+        time.sleep(float(os.environ.get("FAKE_EPLUS_LATENCY", "0")))
+        if not recorded_dir:
+            return 1
+        os.makedirs(output_dir, exist_ok=True)
+        for filename in os.listdir(recorded_dir):
+            shutil.copyfile(os.path.join(recorded_dir, filename), os.path.join(output_dir, filename))
+        with open(os.path.join(recorded_dir, "eplusout.err"), "r") as f:
+            return 1 if "**  Fatal  **" in f.read() else 0
+
+
+class DataExchange:
+    def api_data_fully_ready(self, state):
+        return False
+
+
+class EnergyPlusAPI:
+    def __init__(self, running_as_python_plugin=False):
+        self.state_manager = StateManager()
+        self.runtime = Runtime()
+        self.exchange = DataExchange()
@@ -0,0 +1,128 @@
+"""
+mock_openrouter.py
+------------------
+Local HTTP stand-in for the OpenRouter chat completions endpoint.
+
+Responses are replayed from recordings:
+    structured outputs (response_format json_schema): <recordings>/<schema name>.json
+    chat completions: the chat_*.txt files in turn, or input_files/example_file_prompt.idf if there is none
+
+Every response waits `latency` seconds and reports token usage, so the clients see the same payloads as from the
+real API. Point the clients to it with OPENROUTER_BASE_URL=http://127.0.0.1:<port>/api/v1.
+
+    python mock_openrouter.py --port 8765 --latency 1.5
+"""
+
+import os
+import json
+import time
+import argparse
+import itertools
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+EXAMPLE_IDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "input_files",
+                           "example_file_prompt.idf")
+
+
+class MockOpenRouter:
+    """
+    recordings_dir: folder with the recorded responses
+    latency: seconds added to every response
+    """
+
+    def __init__(self, recordings_dir=RECORDINGS_DIR, latency=0.0, host="127.0.0.1", port=0):
+        self.recordings_dir = recordings_dir
+        self.latency = latency
+        self.requests = 0
+        chat_files = sorted(x for x in os.listdir(recordings_dir) if x.startswith("chat_") and x.endswith(".txt"))
+        chats = [self._read(os.path.join(recordings_dir, x)) for x in chat_files] or [self._read(EXAMPLE_IDF)]
+        self._chats = itertools.cycle(chats)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.thread = None
+
+    @staticmethod
+    def _read(file_path):
+        with open(file_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/api/v1"
+
+    def response(self, payload):
+        """chat completion body for a request payload"""
+        with self._lock:
+            self.requests += 1
+            response_format = payload.get("response_format")
+            if response_format:
+                name = response_format["json_schema"]["name"]
+                content = self._read(os.path.join(self.recordings_dir, f"{name}.json"))
+            else:
+                content = next(self._chats)
+        prompt_chars = sum(len(str(x.get("content", ""))) for x in payload.get("messages", []))
+        # about 4 characters per token
+        usage = {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return {"id": f"mock-{self.requests}", "model": payload.get("model"),
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                "usage": usage}
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                time.sleep(mock.latency)
+                if self.path.endswith("/chat/completions"):
+                    self._send(200, mock.response(payload))
+                else:
+                    self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+
+            def do_GET(self):
+                if self.path.endswith("/credits"):
+                    self._send(200, {"data": {"total_credits": 0, "total_usage": 0}})
+                else:
+                    self._send(200, {"data": []})
+
+            def _send(self, status, body):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenRouter stand-in replaying recorded responses")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--recordings", default=RECORDINGS_DIR)
+    args = parser.parse_args()
+    mock = MockOpenRouter(args.recordings, args.latency, port=args.port)
+    print(f"serving on {mock.base_url}")
+    mock.server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
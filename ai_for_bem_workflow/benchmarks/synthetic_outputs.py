@@ -0,0 +1,117 @@
+"""
+synthetic_outputs.py
+--------------------
+Deterministic EnergyPlus output folders for the benchmarks, in the formats ModelChecking and ErrorParser read:
+eplustbl.csv (Building Area, Skylight-Roof Ratio and Window-Wall Ratio tables), eplusmtr.csv (Date/Time column and
+meters), eplusout.eio (Zone Information lines) and eplusout.err (copied from the recorded error files of
+input_files).
+"""
+
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+INPUT_FILES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "input_files")
+RECORDED_ERRORS = {
+    "success": os.path.join(INPUT_FILES, "error_file_success.err"),
+    "fail": os.path.join(INPUT_FILES, "error_file_fail.err"),
+}
+METERS = ["Heating:EnergyTransfer", "Cooling:EnergyTransfer", "Electricity:Facility", "NaturalGas:Facility"]
+DAYS_IN_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+
+def date_time_labels(timesteps_per_hour=1, years=1):
+    """Date/Time strings of an annual run, " 01/01  01:00:00" style, 24:00 ending each day"""
+    labels = []
+    step = 60 // timesteps_per_hour
+    for month, days in enumerate(DAYS_IN_MONTH, start=1):
+        for day in range(1, days + 1):
+            for minute in range(step, 24 * 60 + 1, step):
+                labels.append(f" {month:02d}/{day:02d}  {minute // 60:02d}:{minute % 60:02d}:00")
+    return labels * years
+
+
+def write_tabular(file_path, floor_area, roof_area, wall_area, wwr):
+    window_area = wall_area * wwr / 100
+    quarter = [wall_area / 4] * 4
+    lines = [
+        "Program Version:,EnergyPlus, Version 24.1.0-9d7789a3ac, YMD=2025.01.01 00:00",
+        "Tabular Output Report in Format: ,Comma",
+        "",
+        "REPORT:,Annual Building Utility Performance Summary",
+        "FOR:,Entire Facility",
+        "Building Area",
+        "",
+        ",,Area [m2]",
+        f",Total Building Area,{floor_area:.2f}",
+        f",Net Conditioned Building Area,{floor_area:.2f}",
+        f",Unconditioned Building Area,0.00",
+        "",
+        "REPORT:,Input Verification and Results Summary",
+        "FOR:,Entire Facility",
+        "ENVELOPE",
+        "Window-Wall Ratio",
+        "",
+        ",,Total,North (315 to 45 deg),East (45 to 135 deg),South (135 to 225 deg),West (225 to 315 deg)",
+        f",Gross Wall Area [m2],{wall_area:.2f}," + ",".join(f"{x:.2f}" for x in quarter),
+        f",Above Ground Wall Area [m2],{wall_area:.2f}," + ",".join(f"{x:.2f}" for x in quarter),
+        f",Window Opening Area [m2],{window_area:.2f}," + ",".join(f"{x * wwr / 100:.2f}" for x in quarter),
+        f",Gross Window-Wall Ratio [%],{wwr:.2f}," + ",".join(f"{wwr:.2f}" for _ in quarter),
+        f",Above Ground Window-Wall Ratio [%],{wwr:.2f}," + ",".join(f"{wwr:.2f}" for _ in quarter),
+        "",
+        "Skylight-Roof Ratio",
+        "",
+        ",,Total",
+        f",Gross Roof Area [m2],{roof_area:.2f}",
+        ",Skylight Area [m2],0.00",
+        ",Skylight-Roof Ratio [%],0.00",
+        "",
+    ]
+    with open(file_path, "w") as f:
+        f.write("\n".join(lines))
+
+
+def write_meters(file_path, floor_area, timesteps_per_hour=1, years=1, seed=0):
+    labels = date_time_labels(timesteps_per_hour, years)
+    n = len(labels)
+    hours = np.arange(n) / timesteps_per_hour
+    rng = np.random.default_rng(seed)
+    seasonal = np.cos(2 * np.pi * hours / 8760)
+    daily = np.clip(np.sin(2 * np.pi * (hours % 24 - 6) / 24), 0, None)
+    joules = 3.6e6 / timesteps_per_hour * floor_area / 1000
+    frequency = "Hourly" if timesteps_per_hour == 1 else "TimeStep"
+    df = pd.DataFrame({
+        "Date/Time": labels,
+        f"Heating:EnergyTransfer [J]({frequency})": joules * 30 * np.clip(seasonal, 0, None) * rng.uniform(0.8, 1.2, n),
+        f"Cooling:EnergyTransfer [J]({frequency})": joules * 20 * np.clip(-seasonal, 0, None) * rng.uniform(0.8, 1.2, n),
+        f"Electricity:Facility [J]({frequency})": joules * (5 + 10 * daily) * rng.uniform(0.9, 1.1, n),
+        f"NaturalGas:Facility [J]({frequency})": joules * 8 * np.clip(seasonal, 0, None),
+    })
+    df.to_csv(file_path, index=False)
+
+
+def write_eio(file_path, zones, ceiling_height):
+    lines = ["! <Zone Information>,Zone Name,North Angle {deg},Origin X-Coordinate {m},Origin Y-Coordinate {m},"
+             "Origin Z-Coordinate {m},Centroid X-Coordinate {m},Centroid Y-Coordinate {m},Centroid Z-Coordinate {m},"
+             "Type,Zone Multiplier,Zone List Multiplier,Minimum X {m},Maximum X {m},Minimum Y {m},Maximum Y {m},"
+             "Minimum Z {m},Maximum Z {m},Ceiling Height {m},Volume {m3}"]
+    for i in range(zones):
+        lines.append(f" Zone Information, ZONE {i + 1},0.0,0.00,0.00,0.00,5.00,5.00,{ceiling_height / 2:.2f},1,1,1,"
+                     f"0.00,10.00,0.00,10.00,0.00,{ceiling_height:.2f},{ceiling_height:.2f},{100 * ceiling_height:.2f}")
+    with open(file_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def write_output_folder(output_dir, floor_area=600.0, ceiling_height=3.0, wwr=30.0, perimeter=100.0, zones=5,
+                        timesteps_per_hour=1, years=1, outcome="success"):
+    """
+    :param outcome: "success" or "fail", the recorded eplusout.err to use
+    :return: output_dir
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    write_tabular(os.path.join(output_dir, "eplustbl.csv"), floor_area, floor_area, perimeter * ceiling_height, wwr)
+    write_meters(os.path.join(output_dir, "eplusmtr.csv"), floor_area, timesteps_per_hour, years)
+    write_eio(os.path.join(output_dir, "eplusout.eio"), zones, ceiling_height)
+    shutil.copyfile(RECORDED_ERRORS[outcome], os.path.join(output_dir, "eplusout.err"))
+    return output_dir
@@ -0,0 +1,209 @@
+"""
+building_ir.py
+--------------
+Compact building intermediate representation written by the LLM through structured_output, compiled locally into a
+full IDF through the IDD.
+
+The IR (input_files/building_ir_schema.json) only holds what the LLM has to decide:
+    zones           floor polygon, z origin, height and multiplier of every zone
+    materials       opaque layers, glazing as a simple glazing system
+    constructions   layer lists of the CONSTRUCTIONS names of geometry_compiler
+    window_to_wall_ratio per facade, infiltration per exterior area
+
+Surfaces, windows and their boundary conditions come from geometry_compiler.zone_surfaces, the fixed objects
+(version, simulation control, run period, site and design days of the example file) are added here, so the LLM
+writes a few hundred tokens of JSON instead of thousands of tokens of IDF and cannot make IDF syntax errors.
+
+    ir = BuildingIR.from_json(llm_output)      # ValueError listing every problem of the IR
+    ir.save("model.idf")
+"""
+
+import io
+import os
+import json
+from collections import Counter
+
+from config import set_idd
+from geometry_compiler import (CONSTRUCTIONS, ALL_ZONES, PRECISION, polygon_area, zone_surfaces, replace_geometry,
+                               _key)
+
+SCHEMA_FILE = os.path.join("input_files", "building_ir_schema.json")
+EXAMPLE_IDF = os.path.join("input_files", "example_file_prompt.idf")
+# objects copied from the example file, they depend on the site and not on the building
+SITE_OBJECTS = ["SITE:LOCATION", "SIZINGPERIOD:DESIGNDAY"]
+FACADES = {"north": "N", "east": "E", "south": "S", "west": "W"}
+MAX_WWR = 0.95
+# Construction objects have an outside layer and up to 9 more
+MAX_LAYERS = 10
+
+
+def load_schema(schema_file=SCHEMA_FILE):
+    with open(schema_file, 'r') as file:
+        return json.load(file)
+
+
+def check_schema(value, schema, path="ir"):
+    """
+    checks value against the subset of JSON schema used by the structured outputs (type, properties, required,
+    additionalProperties, items, enum)
+    :return: list of error messages, empty when value is valid
+    """
+    types = {"object": dict, "array": list, "string": str, "integer": int, "number": (int, float), "boolean": bool}
+    expected = schema.get("type")
+    if expected and (not isinstance(value, types[expected]) or (isinstance(value, bool) and expected != "boolean")):
+        return [f"{path}: expected {expected}, got {json.dumps(value)[:40]}"]
+    errors = []
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} not in {schema['enum']}")
+    if expected == "object":
+        properties = schema.get("properties", {})
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}: missing {key}")
+        for key, item in value.items():
+            if key in properties:
+                errors += check_schema(item, properties[key], f"{path}.{key}")
+            elif schema.get("additionalProperties") is False:
+                errors.append(f"{path}: unknown field {key}")
+    elif expected == "array" and "items" in schema:
+        for i, item in enumerate(value):
+            errors += check_schema(item, schema["items"], f"{path}[{i}]")
+    return errors
+
+
+class BuildingIR:
+    """
+    ir: dict following building_ir_schema.json
+    raises ValueError with all the schema and consistency errors, so they can be sent back to the LLM at once
+    """
+
+    def __init__(self, ir, schema=None):
+        schema = schema or load_schema()
+        errors = check_schema(ir, schema["schema"])
+        if errors:
+            raise ValueError("; ".join(errors))
+        self.ir = ir
+        self.zones = [dict(zone, polygon=self._polygon(zone)) for zone in ir["zones"]]
+        errors = self.check()
+        if errors:
+            raise ValueError("; ".join(errors))
+
+    @classmethod
+    def from_json(cls, text, schema=None):
+        try:
+            ir = json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"invalid JSON: {exc}") from exc
+        return cls(ir, schema)
+
+    @staticmethod
+    def _polygon(zone):
+        """vertices as tuples, counterclockwise and without repeated closing vertex"""
+        polygon = [tuple(float(x) for x in point) for point in zone["polygon"]]
+        if len(polygon) > 1 and _key(polygon[0]) == _key(polygon[-1]):
+            polygon = polygon[:-1]
+        if len(polygon) >= 3 and all(len(point) == 2 for point in polygon) and polygon_area(polygon) < 0:
+            polygon = polygon[::-1]
+        return polygon
+
+    def check(self):
+        """
+        :return: list of the consistency errors the schema cannot express
+        """
+        errors = []
+        names = Counter(zone["name"] for zone in self.zones)
+        errors += [f"zone name {name} used {n} times" for name, n in names.items() if n > 1]
+        for zone in self.zones:
+            if any(len(point) != 2 for point in zone["polygon"]):
+                errors.append(f"zone {zone['name']}: polygon vertices must be [x, y]")
+            elif len(zone["polygon"]) < 3 or abs(polygon_area(zone["polygon"])) < 10 ** -PRECISION:
+                errors.append(f"zone {zone['name']}: polygon needs at least 3 vertices and a non zero area")
+            if zone["height"] <= 0:
+                errors.append(f"zone {zone['name']}: height must be positive")
+            if zone["multiplier"] < 1:
+                errors.append(f"zone {zone['name']}: multiplier must be at least 1")
+
+        materials = [material["name"] for material in self.ir["materials"]]
+        glazing = self.ir["glazing"]["name"]
+        defined = Counter(construction["name"] for construction in self.ir["constructions"])
+        for name in CONSTRUCTIONS.values():
+            if defined[name] != 1:
+                errors.append(f"construction {name} defined {defined[name]} times, expected once")
+        for construction in self.ir["constructions"]:
+            layers = construction["layers"]
+            allowed = [glazing] if construction["name"] == CONSTRUCTIONS["window"] else materials
+            unknown = [layer for layer in layers if layer not in allowed]
+            if not 1 <= len(layers) <= MAX_LAYERS or unknown:
+                errors.append(f"construction {construction['name']}: layers {unknown or layers} must be among "
+                              f"{allowed}")
+        for facade, ratio in self.ir["window_to_wall_ratio"].items():
+            if not 0 <= ratio <= MAX_WWR:
+                errors.append(f"window_to_wall_ratio {facade}: {ratio} not between 0 and {MAX_WWR}")
+        return errors
+
+    # ── compilation ───────────────────────────────────────────────────────────
+
+    def geometry(self):
+        """
+        :return: dict of zones, multipliers, surfaces and windows, as GeometryCompiler.compile
+        """
+        pieces = [(zone["name"], zone["polygon"], zone["z_origin"], zone["z_origin"] + zone["height"])
+                  for zone in self.zones]
+        wwr = {FACADES[facade]: ratio for facade, ratio in self.ir["window_to_wall_ratio"].items()}
+        geometry = zone_surfaces(pieces, self.ir["north_axis"], wwr)
+        geometry["zones"] = [zone["name"] for zone in self.zones]
+        geometry["multipliers"] = {zone["name"]: zone["multiplier"] for zone in self.zones}
+        return geometry
+
+    def to_idf(self, example_idf=EXAMPLE_IDF):
+        """
+        :return: eppy IDF of the building, with the site and design days of example_idf
+        """
+        set_idd()
+        from eppy.modeleditor import IDF
+        idf = IDF(io.StringIO(""))
+        idf.newidfobject("VERSION", Version_Identifier="24.1")
+        idf.newidfobject("SIMULATIONCONTROL",
+                         Do_Zone_Sizing_Calculation="Yes",
+                         Do_System_Sizing_Calculation="Yes",
+                         Do_Plant_Sizing_Calculation="Yes",
+                         Run_Simulation_for_Sizing_Periods="No",
+                         Run_Simulation_for_Weather_File_Run_Periods="Yes",
+                         Do_HVAC_Sizing_Simulation_for_Sizing_Periods="Yes")
+        idf.newidfobject("BUILDING", Name=self.ir["building_name"], North_Axis=self.ir["north_axis"],
+                         Solar_Distribution="FullExterior")
+        idf.newidfobject("TIMESTEP", Number_of_Timesteps_per_Hour=4)
+        idf.newidfobject("RUNPERIOD", Name="run_period",
+                         Begin_Month=1, Begin_Day_of_Month=1, End_Month=12, End_Day_of_Month=31)
+        if example_idf and os.path.exists(example_idf):
+            example = IDF(example_idf)
+            for class_name in SITE_OBJECTS:
+                for obj in example.idfobjects[class_name]:
+                    idf.copyidfobject(obj)
+
+        for material in self.ir["materials"]:
+            idf.newidfobject("MATERIAL", Name=material["name"], Roughness=material["roughness"],
+                             Thickness=material["thickness"], Conductivity=material["conductivity"],
+                             Density=material["density"], Specific_Heat=material["specific_heat"])
+        glazing = self.ir["glazing"]
+        idf.newidfobject("WINDOWMATERIAL:SIMPLEGLAZINGSYSTEM", Name=glazing["name"], UFactor=glazing["u_factor"],
+                         Solar_Heat_Gain_Coefficient=glazing["shgc"],
+                         Visible_Transmittance=glazing["visible_transmittance"])
+        for construction in self.ir["constructions"]:
+            layers = construction["layers"]
+            fields = {"Name": construction["name"], "Outside_Layer": layers[0]}
+            fields.update({f"Layer_{i}": layer for i, layer in enumerate(layers[1:], start=2)})
+            idf.newidfobject("CONSTRUCTION", **fields)
+
+        replace_geometry(idf, self.geometry(), self.ir["north_axis"])
+        idf.newidfobject("ZONEINFILTRATION:DESIGNFLOWRATE", Name="infiltration",
+                         Zone_or_ZoneList_or_Space_or_SpaceList_Name=ALL_ZONES,
+                         Design_Flow_Rate_Calculation_Method="Flow/ExteriorArea",
+                         Flow_Rate_per_Exterior_Surface_Area=self.ir["infiltration_flow_per_exterior_area"],
+                         Constant_Term_Coefficient=1)
+        return idf
+
+    def save(self, idf_path, example_idf=EXAMPLE_IDF):
+        idf = self.to_idf(example_idf)
+        idf.saveas(idf_path)
+        return idf_path
@@ -0,0 +1,142 @@
+"""
+climate_sweep.py
+----------------
+One validated workflow model simulated against many weather files (other cities, future climate variants), for
+resilience and retrofit reporting.
+
+Before each run the model is moved to the climate of the weather file:
+    - Site:Location from the LOCATION header
+    - Site:GroundTemperature:BuildingSurface from the 0.5 m ground temperatures
+    - the sizing design days derived from the weather (design_days.py), when resize is set
+The runs go through SimulationPool, each in its own folder named after the hash of the model and weather file, so
+climates already simulated are read back instead of re-run. The result is one row per weather file with the climate
+(heating and cooling degree days), the meters of ModelChecking and, with a region, the GHG emissions.
+
+    sweep = ClimateSweep("results/v1/llm_gen_model_1.idf", ["input_files/Ottawa_CWEC_2020.epw", "weather/2050.epw"])
+    df = sweep.evaluate()
+"""
+
+import os
+import io
+import numpy as np
+import pandas as pd
+from eppy.modeleditor import IDF
+from config import set_idd
+from epw import load_epw
+from design_days import add_design_days
+from fidelity import apply_profile
+from ghg_emissions import EmissionsCalculator
+from model_checking_sql import model_checking_for
+from simulation_pool import SimulationPool
+
+# base temperature of the degree days [C]
+DEGREE_DAY_BASE = 18.0
+
+
+def degree_days(dry_bulb, base=DEGREE_DAY_BASE):
+    """
+    :param dry_bulb: hourly dry-bulb temperatures [C] of whole days
+    :return: heating and cooling degree days, from the daily means
+    """
+    daily_mean = np.asarray(dry_bulb, dtype=float)[:len(dry_bulb) // 24 * 24].reshape(-1, 24).mean(axis=1)
+    return float(np.sum(np.maximum(base - daily_mean, 0))), float(np.sum(np.maximum(daily_mean - base, 0)))
+
+
+class ClimateSweep:
+    """
+    idf_path: validated workflow model, with internal gains, HVAC templates and output meters
+    epw_files: weather files, one run each
+    resize: the design days are derived again from every weather file, otherwise the sizing periods of the model
+        are kept
+    fidelity: fidelity profile of the runs (fidelity.py), None to keep the settings of the model
+    region: emission factors region (ghg_emissions.py), None to skip the emissions
+    """
+
+    def __init__(self, idf_path, epw_files, runs_dir="climate_runs", max_workers=None, resize=True, fidelity=None,
+                 region=None):
+        self.idf_path = idf_path
+        self.epw_files = list(epw_files)
+        self.resize = resize
+        self.fidelity = fidelity
+        self.pool = SimulationPool(runs_dir, max_workers)
+        self.calculator = EmissionsCalculator(region) if region is not None else None
+        set_idd()
+        with open(idf_path, "r", encoding="utf-8") as f:
+            self.base_text = f.read()
+
+    @staticmethod
+    def climate_name(epw_file):
+        return os.path.splitext(os.path.basename(epw_file))[0]
+
+    def build_climate_idf(self, epw_file):
+        """
+        :return: idf content of the model moved to the climate of epw_file
+        """
+        idf = IDF(io.StringIO(self.base_text))
+        weather = load_epw(epw_file)
+        location = weather.location
+        while len(idf.idfobjects["SITE:LOCATION"]) > 0:
+            idf.idfobjects["SITE:LOCATION"].pop(-1)
+        idf.newidfobject("SITE:LOCATION", Name=f"{location['city']} {location['state']} {location['country']}",
+                         Latitude=location["latitude"], Longitude=location["longitude"],
+                         Time_Zone=location["time_zone"], Elevation=location["elevation"])
+        ground_temps = weather.ground_temperatures(0.5)
+        if ground_temps is not None:
+            while len(idf.idfobjects["SITE:GROUNDTEMPERATURE:BUILDINGSURFACE"]) > 0:
+                idf.idfobjects["SITE:GROUNDTEMPERATURE:BUILDINGSURFACE"].pop(-1)
+            ground = idf.newidfobject("SITE:GROUNDTEMPERATURE:BUILDINGSURFACE")
+            for field, value in zip(ground.fieldnames[1:], ground_temps):
+                setattr(ground, field, value)
+        if self.resize:
+            add_design_days(idf, epw_file)
+        if self.fidelity is not None:
+            apply_profile(idf, self.fidelity)
+        return idf.idfstr()
+
+    def climate_info(self, epw_file):
+        weather = load_epw(epw_file)
+        hdd, cdd = degree_days(weather["dry_bulb"])
+        return {"city": weather.location.get("city"), "latitude": weather.location.get("latitude"),
+                "longitude": weather.location.get("longitude"), "mean_dry_bulb": float(np.mean(weather["dry_bulb"])),
+                "hdd18": hdd, "cdd18": cdd}
+
+    def evaluate(self):
+        """
+        builds and simulates the model in every climate
+        :return: df with one row per weather file, its climate, meters, emissions and run info
+        """
+        # keyed by position, variants of a climate often share their file name across folders
+        jobs = {i: (self.build_climate_idf(x), x) for i, x in enumerate(self.epw_files)}
+        results = self.pool.run_jobs(jobs)
+
+        rows = []
+        for i, epw_file in enumerate(self.epw_files):
+            result = results[i]
+            row = {"climate": self.climate_name(epw_file), "epw_file": epw_file, **self.climate_info(epw_file),
+                   "success": result["success"],
+                   "run_key": result["run_key"],
+                   "cached": result["cached"],
+                   "elapsed": result["elapsed"]}
+            row.update(result["meters"] or {})
+            if self.calculator is not None and result["success"]:
+                try:
+                    row.update(self.calculator.score_model_checking(model_checking_for(result["output_dir"])))
+                except Exception as exc:
+                    row["errors"] = f"emissions not computed: {exc}"
+            if not result["success"]:
+                row["errors"] = "; ".join(x["content"] for x in result["errors"])
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+
+def main():
+    idf_path = os.path.join("results", "v1", "llm_gen_model_1.idf")
+    epw_files = [os.path.join("input_files", x) for x in sorted(os.listdir("input_files")) if x.endswith(".epw")]
+    sweep = ClimateSweep(idf_path, epw_files)
+    df = sweep.evaluate()
+    df.to_csv("climate_sweep.csv", index=False)
+    print(df)
+
+
+if __name__ == "__main__":
+    main()
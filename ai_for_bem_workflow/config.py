@@ -1,9 +1,27 @@
 import os
 import sys
 
-if sys.platform == "win32":
+if "EPLUS_DIR" in os.environ:
+    # e.g. a non-default install, or the fake pyenergyplus of the benchmarks
+    EPLUS_DIR = os.environ["EPLUS_DIR"]
+elif sys.platform == "win32":
     EPLUS_DIR = r"C:\EnergyPlusV26-1-0"
 else:
     EPLUS_DIR = "/usr/local/EnergyPlus-26-1-0"
 
-EPLUS_IDD = os.path.join(EPLUS_DIR, "Energy+.idd")
+EPLUS_IDD = os.environ.get("EPLUS_IDD", os.path.join(EPLUS_DIR, "Energy+.idd"))
+
+
+def set_idd():
+    """points eppy to the EnergyPlus idd, on first use instead of at import"""
+    from eppy.modeleditor import IDF
+    if IDF.iddname is None:
+        IDF.setiddname(EPLUS_IDD)
+
+
+def energyplus_api():
+    """new EnergyPlusAPI, pyenergyplus is only imported by the processes that run simulations"""
+    if EPLUS_DIR not in sys.path:
+        sys.path.insert(0, EPLUS_DIR)
+    from pyenergyplus.api import EnergyPlusAPI
+    return EnergyPlusAPI()
@@ -0,0 +1,145 @@
+"""
+design_days.py
+--------------
+Heating and cooling design days derived from the hourly data of an EPW file, so sizing runs two days instead of
+the whole months of SizingPeriod:WeatherFileDays and stays consistent with the simulated climate.
+
+    heating     99.6% annual dry-bulb (0.4% of the hours are colder), saturated, mean coincident wind, no sun,
+                in the coldest month
+    cooling     0.4% annual dry-bulb, mean coincident wet-bulb (MCWB), mean daily range and mean coincident wind
+                of the hottest month, clear sky
+
+The percentiles follow the ASHRAE Handbook definitions over the hours of the file instead of the multi-year
+station records, coincident values are the means over the hours beyond the design dry-bulb.
+"""
+
+import os
+import numpy as np
+
+from epw import load_epw
+
+# hourly columns of the weather used by design_conditions
+EPW_COLUMNS = ["month", "day", "hour", "dry_bulb", "dew_point", "relative_humidity", "pressure", "wind_direction",
+               "wind_speed"]
+HEATING_PERCENTILE = 0.4
+COOLING_PERCENTILE = 99.6
+DESIGN_DAY = 21
+
+
+def read_epw_hourly(epw_file):
+    """
+    :return: dict of column name: array of the hourly values, as EPW_COLUMNS
+    """
+    weather = load_epw(epw_file)
+    return {name: weather[name] for name in EPW_COLUMNS}
+
+
+def read_location_name(epw_file):
+    city = load_epw(epw_file).location.get("city")
+    return city.title() if city else os.path.basename(epw_file)
+
+
+def wet_bulb(dry_bulb, relative_humidity):
+    """
+    Stull (2011) wet-bulb temperature [C] from dry-bulb [C] and relative humidity [%], at standard pressure,
+    within 0.3 C for relative humidities of 5 to 99%
+    """
+    rh = np.clip(relative_humidity, 5, 99)
+    return (dry_bulb * np.arctan(0.151977 * np.sqrt(rh + 8.313659)) + np.arctan(dry_bulb + rh)
+            - np.arctan(rh - 1.676331) + 0.00391838 * rh ** 1.5 * np.arctan(0.023101 * rh) - 4.686035)
+
+
+def mean_direction(directions, speeds):
+    """wind direction [deg] of the mean wind vector"""
+    radians = np.radians(directions)
+    angle = np.degrees(np.arctan2(np.sum(speeds * np.sin(radians)), np.sum(speeds * np.cos(radians))))
+    return float(round(angle % 360, -1) % 360)
+
+
+def design_conditions(weather):
+    """
+    :param weather: dict of hourly arrays, as read_epw_hourly
+    :return: dict of "heating" and "cooling": design day conditions
+    """
+    dry_bulb = weather["dry_bulb"]
+    month = weather["month"].astype(int)
+    monthly_mean = np.bincount(month, weights=dry_bulb, minlength=13)[1:] / np.maximum(
+        np.bincount(month, minlength=13)[1:], 1)
+    # missing pressures are 999999
+    pressure = weather["pressure"][weather["pressure"] < 999999]
+    pressure = float(round(np.mean(pressure))) if len(pressure) else 101325.0
+    wind_speed = np.where(weather["wind_speed"] < 999, weather["wind_speed"], 0.0)
+
+    heating_db = float(np.percentile(dry_bulb, HEATING_PERCENTILE))
+    cold = dry_bulb <= heating_db
+    cooling_db = float(np.percentile(dry_bulb, COOLING_PERCENTILE))
+    hot = dry_bulb >= cooling_db
+    wb = wet_bulb(dry_bulb[hot], weather["relative_humidity"][hot])
+
+    hottest = int(np.argmax(monthly_mean)) + 1
+    days = month * 100 + weather["day"].astype(int)
+    in_month = month == hottest
+    # mean over the days of the hottest month of the daily max minus min
+    day_index = np.unique(days[in_month], return_inverse=True)[1]
+    daily_max = np.full(day_index.max() + 1, -np.inf)
+    daily_min = np.full(day_index.max() + 1, np.inf)
+    np.maximum.at(daily_max, day_index, dry_bulb[in_month])
+    np.minimum.at(daily_min, day_index, dry_bulb[in_month])
+
+    return {
+        "heating": {"month": int(np.argmin(monthly_mean)) + 1, "dry_bulb": round(heating_db, 1), "daily_range": 0.0,
+                    "wet_bulb": round(heating_db, 1), "pressure": pressure,
+                    "wind_speed": round(float(np.mean(wind_speed[cold])), 1),
+                    "wind_direction": mean_direction(weather["wind_direction"][cold], wind_speed[cold]),
+                    "sky_clearness": 0.0},
+        "cooling": {"month": hottest, "dry_bulb": round(cooling_db, 1),
+                    "daily_range": round(float(np.mean(daily_max - daily_min)), 1),
+                    "wet_bulb": round(float(np.mean(wb)), 1), "pressure": pressure,
+                    "wind_speed": round(float(np.mean(wind_speed[hot])), 1),
+                    "wind_direction": mean_direction(weather["wind_direction"][hot], wind_speed[hot]),
+                    "sky_clearness": 1.0},
+    }
+
+
+def add_design_days(idf, epw_file):
+    """
+    replaces the sizing periods of an eppy IDF with the design days of the EPW file
+    :return: list of the SizingPeriod:DesignDay objects
+    """
+    conditions = design_conditions(read_epw_hourly(epw_file))
+    location = read_location_name(epw_file)
+    for class_name in ["SIZINGPERIOD:WEATHERFILEDAYS", "SIZINGPERIOD:DESIGNDAY"]:
+        while len(idf.idfobjects[class_name]) > 0:
+            idf.idfobjects[class_name].pop(-1)
+    names = {"heating": f"{location} Ann Htg {100 - HEATING_PERCENTILE:g}% Condns DB",
+             "cooling": f"{location} Ann Clg {100 - COOLING_PERCENTILE:.1f}% Condns DB=>MWB"}
+    day_types = {"heating": "WinterDesignDay", "cooling": "SummerDesignDay"}
+    for kind, day in conditions.items():
+        idf.newidfobject("SIZINGPERIOD:DESIGNDAY",
+                         Name=names[kind],
+                         Month=day["month"],
+                         Day_of_Month=DESIGN_DAY,
+                         Day_Type=day_types[kind],
+                         Maximum_DryBulb_Temperature=day["dry_bulb"],
+                         Daily_DryBulb_Temperature_Range=day["daily_range"],
+                         Humidity_Condition_Type="WetBulb",
+                         Wetbulb_or_DewPoint_at_Maximum_DryBulb=day["wet_bulb"],
+                         Barometric_Pressure=day["pressure"],
+                         Wind_Speed=day["wind_speed"],
+                         Wind_Direction=day["wind_direction"],
+                         Rain_Indicator="No",
+                         Snow_Indicator="No",
+                         Daylight_Saving_Time_Indicator="No",
+                         Solar_Model_Indicator="ASHRAEClearSky",
+                         Sky_Clearness=day["sky_clearness"])
+    return idf.idfobjects["SIZINGPERIOD:DESIGNDAY"]
+
+
+def main():
+    epw_file = os.path.join("input_files", "Ottawa_CWEC_2020.epw")
+    for kind, day in design_conditions(read_epw_hourly(epw_file)).items():
+        print(kind, day)
+
+
+if __name__ == "__main__":
+    main()
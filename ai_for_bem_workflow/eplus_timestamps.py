@@ -0,0 +1,96 @@
+"""
+eplus_timestamps.py
+-------------------
+Vectorized parsing of the EnergyPlus Date/Time column, shared by the csv, sql and runtime readers.
+
+Formats of the csv outputs:
+    " 01/01  00:15:00"   timestep and hourly values, labelled with the end of the interval (24:00 is midnight of the
+                         next day)
+    " 01/01"             daily values
+    "January"            monthly values
+
+Every distinct string is parsed once, as all files of a batch and all years of a run repeat the same labels. A new
+environment (design day, run period) starts when the time goes backwards, except for the rollover of multi-year run
+periods, the last interval of December 31 followed by the first of January 1, which moves to the next year instead.
+A December design day followed by the annual run period is a new environment.
+"""
+
+import calendar
+import numpy as np
+import pandas as pd
+
+DEFAULT_YEAR = 2025
+MONTHS = {name.upper(): i for i, name in enumerate(calendar.month_name) if name}
+
+
+def datetimes_from_parts(year, month, day, minutes):
+    """
+    :param year, month, day: int arrays
+    :param minutes: minutes after midnight, 1440 for 24:00
+    :return: datetime64[ns] array
+    """
+    months = (np.asarray(year) - 1970) * 12 + np.asarray(month) - 1
+    dates = months.astype("datetime64[M]").astype("datetime64[D]") + (np.asarray(day) - 1).astype("timedelta64[D]")
+    return (dates.astype("datetime64[m]") + np.asarray(minutes).astype("timedelta64[m]")).astype("datetime64[ns]")
+
+
+def split_date_time(labels):
+    """
+    :param labels: unique Date/Time strings
+    :return: month, day, minutes after midnight int arrays
+    """
+    labels = np.char.upper(np.char.strip(labels.astype(str)))
+    month = np.ones(len(labels), dtype=int)
+    day = np.ones(len(labels), dtype=int)
+    minutes = np.zeros(len(labels), dtype=int)
+
+    named = np.char.isalpha(labels)
+    if named.any():
+        month[named] = [MONTHS[x] for x in labels[named]]
+    dated = ~named
+    if dated.any():
+        date, _, time = np.char.partition(labels[dated], " ").T
+        month_str, _, day_str = np.char.partition(date, "/").T
+        month[dated] = month_str.astype(int)
+        day[dated] = day_str.astype(int)
+        time = np.char.strip(time)
+        timed = np.char.str_len(time) > 0
+        hour_str, _, rest = np.char.partition(time[timed], ":").T
+        minute_str = np.char.partition(rest, ":")[:, 0]
+        dated_minutes = np.zeros(len(time), dtype=int)
+        dated_minutes[timed] = hour_str.astype(int) * 60 + minute_str.astype(int)
+        minutes[dated] = dated_minutes
+    return month, day, minutes
+
+
+def parse_datetime_column(values, year=None):
+    """
+    :param values: Date/Time column
+    :param year: year of the first values, defaults to DEFAULT_YEAR or to a leap year if Feb 29 is found
+    :return: DatetimeIndex, environment number (0, 1, ...) of each row
+    """
+    labels, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    month, day, minutes = [x[inverse] for x in split_date_time(labels)]
+    named = np.char.isalpha(np.char.strip(labels.astype(str)))[inverse]
+    if year is None:
+        year = 2024 if ((month == 2) & (day == 29)).any() else DEFAULT_YEAR
+
+    # ordering within the year, year independent
+    position = (month * 32 + day) * 1441 + minutes
+    backwards = np.zeros(len(position), dtype=bool)
+    backwards[1:] = position[1:] <= position[:-1]
+    new_year = np.zeros(len(position), dtype=bool)
+    # 12/31 24:00 (12/31 for daily values, December for monthly ones) then the first timestep, hour or day of 01/01
+    end_of_year = (month == 12) & (named | ((day == 31) & ((minutes == 1440) | (minutes == 0))))
+    start_of_year = (month == 1) & (day == 1) & (minutes <= 60)
+    new_year[1:] = backwards[1:] & end_of_year[:-1] & start_of_year[1:]
+    new_environment = backwards & ~new_year
+    environment = np.cumsum(new_environment)
+
+    # years elapsed since the start of each environment
+    years_run = np.cumsum(new_year)
+    environment_start = np.maximum.accumulate(np.where(new_environment, np.arange(len(position)), 0))
+    year_offset = years_run - years_run[environment_start]
+
+    timestamps = datetimes_from_parts(year + year_offset, month, day, minutes)
+    return pd.DatetimeIndex(timestamps), environment
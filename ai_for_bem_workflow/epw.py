@@ -0,0 +1,205 @@
+"""
+epw.py
+------
+EPW weather files parsed once into typed numpy arrays and cached, so every process reading the same weather (the
+workflow, the retrofit workers, the design days) gets it without parsing the 8760 text rows again.
+
+    weather = load_epw("input_files/Ottawa_CWEC_2020.epw")
+    weather["dry_bulb"]                     # float32 array of the hourly values, read-only
+    weather.location["latitude"]
+    weather.ground_temperatures(0.5)        # 12 monthly values [C]
+
+The cache holds, per weather file, the header as {hash}.json and the data rows as one structured array in {hash}.npy,
+the hash being the one of the file content. The .npy is opened with mmap_mode="r": processes loading the same
+weather share the pages of the operating system cache instead of each holding a copy (an .npz archive cannot be
+memory-mapped by numpy). Both files are written under a temporary name then renamed, so workers filling the cache at
+the same time never read a partial file.
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+
+CACHE_DIR = "weather_cache"
+HEADER_LINES = 8
+# data fields of the EPW rows: name, column, dtype. The uncertainty flags (5) and present weather codes (27) are skipped
+DATA_FIELDS = [
+    ("year", 0, "i2"), ("month", 1, "i1"), ("day", 2, "i1"), ("hour", 3, "i1"), ("minute", 4, "i1"),
+    ("dry_bulb", 6, "f4"), ("dew_point", 7, "f4"), ("relative_humidity", 8, "f4"), ("pressure", 9, "f4"),
+    ("extraterrestrial_horizontal", 10, "f4"), ("extraterrestrial_direct_normal", 11, "f4"),
+    ("horizontal_infrared", 12, "f4"), ("global_horizontal", 13, "f4"), ("direct_normal", 14, "f4"),
+    ("diffuse_horizontal", 15, "f4"), ("global_horizontal_illuminance", 16, "f4"),
+    ("direct_normal_illuminance", 17, "f4"), ("diffuse_horizontal_illuminance", 18, "f4"),
+    ("zenith_luminance", 19, "f4"), ("wind_direction", 20, "f4"), ("wind_speed", 21, "f4"),
+    ("total_sky_cover", 22, "f4"), ("opaque_sky_cover", 23, "f4"), ("visibility", 24, "f4"),
+    ("ceiling_height", 25, "f4"), ("present_weather_observation", 26, "f4"), ("precipitable_water", 28, "f4"),
+    ("aerosol_optical_depth", 29, "f4"), ("snow_depth", 30, "f4"), ("days_since_last_snowfall", 31, "f4"),
+    ("albedo", 32, "f4"), ("liquid_precipitation_depth", 33, "f4"), ("liquid_precipitation_quantity", 34, "f4"),
+]
+DATA_DTYPE = np.dtype([(name, dtype) for name, _, dtype in DATA_FIELDS])
+LOCATION_FIELDS = ["city", "state", "country", "source", "wmo", "latitude", "longitude", "time_zone", "elevation"]
+
+_hashes = {}
+_loaded = {}
+
+
+def _number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return text.strip()
+
+
+def epw_hash(epw_file):
+    """sha256 of the file content, computed once per file version in each process"""
+    stat = os.stat(epw_file)
+    key = (os.path.abspath(epw_file), stat.st_mtime_ns, stat.st_size)
+    if key not in _hashes:
+        with open(epw_file, "rb") as f:
+            _hashes[key] = hashlib.sha256(f.read()).hexdigest()
+    return _hashes[key]
+
+
+def parse_header(lines):
+    """
+    :param lines: the 8 header lines of an EPW file
+    :return: dict of location, design_conditions, ground_temperatures and lines (the raw header)
+    """
+    header = {"location": {}, "design_conditions": {}, "ground_temperatures": [], "lines": [x.rstrip("\r\n")
+                                                                                         for x in lines]}
+    for line in header["lines"]:
+        fields = line.split(",")
+        keyword = fields[0].strip().upper()
+        if keyword == "LOCATION":
+            values = [x.strip() for x in fields[1:10]]
+            header["location"] = {name: _number(value) if i >= 5 else value
+                                  for i, (name, value) in enumerate(zip(LOCATION_FIELDS, values))}
+        elif keyword == "DESIGN CONDITIONS" and len(fields) > 3:
+            # source, then each of Heating, Cooling, Extremes followed by its values
+            conditions = {"source": fields[2].strip()}
+            section = None
+            for field in fields[4:]:
+                if field.strip() in ("Heating", "Cooling", "Extremes"):
+                    section = field.strip().lower()
+                    conditions[section] = []
+                elif section is not None:
+                    conditions[section].append(_number(field))
+            header["design_conditions"] = conditions
+        elif keyword == "GROUND TEMPERATURES" and len(fields) > 1:
+            # per depth: depth, conductivity, density, specific heat, 12 monthly temperatures
+            for i in range(int(fields[1] or 0)):
+                block = fields[2 + 16 * i: 18 + 16 * i]
+                if len(block) < 16:
+                    break
+                header["ground_temperatures"].append({
+                    "depth": float(block[0]),
+                    "conductivity": _number(block[1]), "density": _number(block[2]),
+                    "specific_heat": _number(block[3]),
+                    "temperatures": [float(x) for x in block[4:16]],
+                })
+    return header
+
+
+def read_header(epw_file):
+    """header of an EPW file, reading its first lines only"""
+    with open(epw_file, "r") as f:
+        lines = [f.readline() for _ in range(HEADER_LINES)]
+    return parse_header(lines)
+
+
+def parse_epw(epw_file):
+    """
+    :return: header dict and structured array of the data rows, as DATA_DTYPE
+    """
+    header = read_header(epw_file)
+    data = np.loadtxt(epw_file, delimiter=",", skiprows=HEADER_LINES, usecols=[col for _, col, _ in DATA_FIELDS],
+                      dtype=DATA_DTYPE, ndmin=1)
+    return header, data
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+class Weather:
+    """
+    parsed EPW file
+    header: dict as parse_header
+    data: structured array of the hourly rows, as DATA_DTYPE
+    """
+
+    def __init__(self, header, data):
+        self.header = header
+        self.data = data
+
+    @property
+    def location(self):
+        return self.header["location"]
+
+    @property
+    def design_conditions(self):
+        return self.header["design_conditions"]
+
+    @property
+    def columns(self):
+        return list(self.data.dtype.names)
+
+    def __getitem__(self, column):
+        return self.data[column]
+
+    def __len__(self):
+        return len(self.data)
+
+    def ground_temperatures(self, depth=0.5):
+        """
+        :return: the 12 monthly ground temperatures [C] at depth [m], None if the file has none
+        """
+        for ground in self.header["ground_temperatures"]:
+            if abs(ground["depth"] - depth) < 1e-6:
+                return ground["temperatures"]
+        return None
+
+
+def load_epw(epw_file, cache_dir=CACHE_DIR):
+    """
+    parsed EPW file, from the cache when the same content was parsed before
+    :param cache_dir: folder of the cache, None to parse without caching
+    :return: Weather, its data arrays are read-only
+    """
+    key = epw_hash(epw_file)
+    if key in _loaded:
+        return _loaded[key]
+    if cache_dir is None:
+        weather = Weather(*parse_epw(epw_file))
+        weather.data.flags.writeable = False
+        _loaded[key] = weather
+        return weather
+
+    header_path = os.path.join(cache_dir, f"{key[:16]}.json")
+    data_path = os.path.join(cache_dir, f"{key[:16]}.npy")
+    # the header is written last, its presence means the data is complete
+    if not os.path.exists(header_path):
+        header, data = parse_epw(epw_file)
+        os.makedirs(cache_dir, exist_ok=True)
+        _write_atomic(data_path, lambda f: np.save(f, data))
+        _write_atomic(header_path, lambda f: f.write(json.dumps(header, indent=1).encode("utf-8")))
+    with open(header_path, "r") as f:
+        header = json.load(f)
+    weather = Weather(header, np.load(data_path, mmap_mode="r"))
+    _loaded[key] = weather
+    return weather
+
+
+def main():
+    weather = load_epw(os.path.join("input_files", "Ottawa_CWEC_2020.epw"))
+    print(weather.location)
+    print(f"{len(weather)} rows, dry-bulb {weather['dry_bulb'].min():.1f} to {weather['dry_bulb'].max():.1f} C")
+    print("ground temperatures at 0.5 m:", weather.ground_temperatures(0.5))
+
+
+if __name__ == "__main__":
+    main()
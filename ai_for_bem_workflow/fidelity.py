@@ -0,0 +1,118 @@
+"""
+fidelity.py
+-----------
+Named simulation fidelity profiles, applied to a model before each simulation stage.
+
+A profile bundles the settings that trade accuracy for run time:
+    timestep                    Timestep, per hour
+    heat_balance                HeatBalanceAlgorithm
+    convection_inside/outside   SurfaceConvectionAlgorithm:Inside / :Outside
+    solar_distribution          Building Solar Distribution
+    shadow_frequency            ShadowCalculation update period [days]
+    diagnostics                 Output:Diagnostics keys
+    sizing_days                 length of the SizingPeriod:WeatherFileDays of the HVAC templates [days]
+    run_period                  (begin month, begin day, end month, end day) of the RunPeriod
+    variable_frequency          Reporting Frequency of the Output:Variable objects, meters stay hourly
+
+    check       executability loop: input errors and warnings over one week, nothing is read from the results
+    screening   retrofit scenarios: annual meters with coarse time steps and shading
+    final       validated model: 10 minute time steps, TARP and DOE-2 convection, hourly outputs
+
+The workflow stages use STAGE_PROFILES unless BuildingEnergyWorkflow gets other ones.
+"""
+
+from config import set_idd
+
+FIDELITY_PROFILES = {
+    "check": {
+        "timestep": 2,
+        "heat_balance": "ConductionTransferFunction",
+        "convection_inside": "Simple",
+        "convection_outside": "SimpleCombined",
+        "solar_distribution": "FullExterior",
+        "shadow_frequency": 60,
+        "diagnostics": ["DisplayExtraWarnings"],
+        "sizing_days": 7,
+        "run_period": (1, 1, 1, 7),
+        "variable_frequency": "RunPeriod",
+    },
+    "screening": {
+        "timestep": 4,
+        "heat_balance": "ConductionTransferFunction",
+        "convection_inside": "Simple",
+        "convection_outside": "SimpleCombined",
+        "solar_distribution": "MinimalShadowing",
+        "shadow_frequency": 30,
+        "diagnostics": [],
+        "sizing_days": 7,
+        "run_period": (1, 1, 12, 31),
+        "variable_frequency": "Monthly",
+    },
+    "final": {
+        "timestep": 6,
+        "heat_balance": "ConductionTransferFunction",
+        "convection_inside": "TARP",
+        "convection_outside": "DOE-2",
+        "solar_distribution": "FullExterior",
+        "shadow_frequency": 20,
+        "diagnostics": ["DisplayExtraWarnings"],
+        "sizing_days": 31,
+        "run_period": (1, 1, 12, 31),
+        "variable_frequency": "Hourly",
+    },
+}
+# profile of each simulation stage of the workflow
+STAGE_PROFILES = {"executability": "check", "screening": "screening", "final": "final"}
+DAYS_IN_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+
+def _single(idf, class_name):
+    """first object of a unique class, created if missing"""
+    if len(idf.idfobjects[class_name]) == 0:
+        idf.newidfobject(class_name)
+    return idf.idfobjects[class_name][0]
+
+
+def apply_profile(idf, profile):
+    """
+    sets the fidelity settings of an eppy IDF
+    :param profile: name in FIDELITY_PROFILES or a dict with the same keys
+    """
+    settings = FIDELITY_PROFILES[profile] if isinstance(profile, str) else profile
+    _single(idf, "TIMESTEP").Number_of_Timesteps_per_Hour = settings["timestep"]
+    _single(idf, "HEATBALANCEALGORITHM").Algorithm = settings["heat_balance"]
+    _single(idf, "SURFACECONVECTIONALGORITHM:INSIDE").Algorithm = settings["convection_inside"]
+    _single(idf, "SURFACECONVECTIONALGORITHM:OUTSIDE").Algorithm = settings["convection_outside"]
+    if len(idf.idfobjects["BUILDING"]) > 0:
+        idf.idfobjects["BUILDING"][0].Solar_Distribution = settings["solar_distribution"]
+    shadow = _single(idf, "SHADOWCALCULATION")
+    shadow.Shading_Calculation_Update_Frequency_Method = "Periodic"
+    shadow.Shading_Calculation_Update_Frequency = settings["shadow_frequency"]
+
+    while len(idf.idfobjects["OUTPUT:DIAGNOSTICS"]) > 0:
+        idf.idfobjects["OUTPUT:DIAGNOSTICS"].pop(-1)
+    if settings["diagnostics"]:
+        idf.newidfobject("OUTPUT:DIAGNOSTICS", **{f"Key_{i}": key
+                                                  for i, key in enumerate(settings["diagnostics"], start=1)})
+
+    # the weather file sizing periods keep their start, the design days are left as they are
+    for period in idf.idfobjects["SIZINGPERIOD:WEATHERFILEDAYS"]:
+        month, day = int(period.Begin_Month), int(period.Begin_Day_of_Month)
+        period.End_Month = month
+        period.End_Day_of_Month = min(day + settings["sizing_days"] - 1, DAYS_IN_MONTH[month - 1])
+    begin_month, begin_day, end_month, end_day = settings["run_period"]
+    for run_period in idf.idfobjects["RUNPERIOD"]:
+        run_period.Begin_Month, run_period.Begin_Day_of_Month = begin_month, begin_day
+        run_period.End_Month, run_period.End_Day_of_Month = end_month, end_day
+    for variable in idf.idfobjects["OUTPUT:VARIABLE"]:
+        variable.Reporting_Frequency = settings["variable_frequency"]
+    return idf
+
+
+def apply_fidelity(idf_path, profile):
+    """applies a fidelity profile to an IDF file, saved in place"""
+    set_idd()
+    from eppy.modeleditor import IDF
+    idf = IDF(idf_path)
+    apply_profile(idf, profile)
+    idf.save()
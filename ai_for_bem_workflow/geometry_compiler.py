@@ -0,0 +1,440 @@
+"""
+geometry_compiler.py
+--------------------
+Deterministic geometry of the five parametric layouts of the GUI (input_files/building_layouts.txt).
+
+The footprint of the layout, in the a, b, c, d dimensions of the form, is extruded over the floors and split into
+zones per floor:
+    "1 zone"    one zone per floor
+    "2 zones"   perimeter and core zones, the perimeter band is PERIMETER_DEPTH deep (less for narrow wings)
+    "5 zones"   core zone and one perimeter zone per facade (N, E, S, W), courtyard walls join their facade zone
+
+Every floor is cut into convex-enough pieces (the whole footprint, perimeter quads along each facade, core) and
+zone_surfaces makes the walls from the piece edges: an edge shared by two zones becomes a pair of interzone walls, an
+edge on the footprint outline an exterior wall, and the floors and ceilings of stacked pieces are paired the same way.
+Windows are the above grade exterior walls scaled by sqrt(WWR) about their centroid, so each wall has the requested
+ratio. zone_surfaces takes any prismatic zones, building_ir.py uses it for the zones written by the LLM.
+
+The output uses fixed construction names (CONSTRUCTIONS), defined by the rest of the model:
+
+    compiler = GeometryCompiler.from_description(building_description)
+    compiler.to_idf(idf)                   # eppy IDF, replaces its zones and surfaces
+    text = compiler.to_idf_text()          # same objects as IDF text
+"""
+
+import io
+import math
+
+LAYOUTS = ["Rectangular building", "L-shaped building", "T-shaped building", "U-shaped building", "Hollow building"]
+ZONING = ["1 zone", "2 zones", "5 zones"]
+# compass direction faced by side a
+ORIENTATIONS = {"N": 0, "NE": 45, "E": 90, "SE": 135, "S": 180, "SW": 225, "W": 270, "NW": 315}
+# ASHRAE 90.1 Appendix G perimeter zone depth, 15 ft
+PERIMETER_DEPTH = 4.57
+ALL_ZONES = "all_zones"
+CONSTRUCTIONS = {
+    "exterior_wall": "Exterior Wall",
+    "interior_wall": "Interior Wall",
+    "roof": "Exterior Roof",
+    "ground_floor": "Exterior Floor",
+    "interior_floor": "Interior Floor",
+    "interior_ceiling": "Interior Ceiling",
+    "window": "Exterior Window",
+}
+GEOMETRY_OBJECTS = ["ZONE", "ZONELIST", "BUILDINGSURFACE:DETAILED", "FENESTRATIONSURFACE:DETAILED",
+                    "GLOBALGEOMETRYRULES"]
+PRECISION = 4
+
+
+def _key(point):
+    return tuple(round(x, PRECISION) for x in point)
+
+
+def polygon_area(points):
+    """shoelace area, positive for counterclockwise points"""
+    return 0.5 * sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]))
+
+
+def offset_ring(points, depth):
+    """
+    moves every edge of an orthogonal ring depth to its left (inside for a counterclockwise outline, outside for a
+    clockwise hole), the corners are the intersections of the moved edges
+    """
+    offset = []
+    n = len(points)
+    for i in range(n):
+        (x0, y0), (x1, y1), (x2, y2) = points[i - 1], points[i], points[(i + 1) % n]
+        # left normals of the incoming and outgoing edges, perpendicular for orthogonal outlines
+        l_in = math.hypot(x1 - x0, y1 - y0)
+        l_out = math.hypot(x2 - x1, y2 - y1)
+        nx = -(y1 - y0) / l_in - (y2 - y1) / l_out
+        ny = (x1 - x0) / l_in + (x2 - x1) / l_out
+        offset.append((x1 + depth * nx, y1 + depth * ny))
+    return offset
+
+
+def band(outer, inner):
+    """
+    quads between a ring and a ring of matching corners on its left
+    :return: list of (quad, edge of outer), quads counterclockwise
+    """
+    n = len(outer)
+    return [([outer[i], outer[(i + 1) % n], inner[(i + 1) % n], inner[i]], (outer[i], outer[(i + 1) % n]))
+            for i in range(n)]
+
+
+def _rect(x0, y0, x1, y1):
+    return [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+
+
+def facade(edge, north_axis=0):
+    """compass facade N, E, S or W of an exterior edge, interior on its left"""
+    (x0, y0), (x1, y1) = edge
+    # outward normal, azimuth clockwise from the building y axis
+    azimuth = math.degrees(math.atan2(y1 - y0, -(x1 - x0))) + north_axis
+    return "NESW"[math.floor(azimuth / 90 + 0.5) % 4]
+
+
+def _polygon_key(polygon):
+    """same key for the same counterclockwise polygon, whatever its first vertex"""
+    keys = [_key(p) for p in polygon]
+    start = keys.index(min(keys))
+    return tuple(keys[start:] + keys[:start])
+
+
+def _split_edge(p, q, points):
+    """
+    :return: consecutive segments of the edge p q, cut at the points lying on it
+    """
+    length = math.dist(p, q)
+    cuts = []
+    for point in points:
+        t = ((point[0] - p[0]) * (q[0] - p[0]) + (point[1] - p[1]) * (q[1] - p[1])) / length ** 2
+        foot = (p[0] + t * (q[0] - p[0]), p[1] + t * (q[1] - p[1]))
+        if 1e-6 < t < 1 - 1e-6 and math.dist(foot, point) < 10 ** -PRECISION:
+            cuts.append((t, point))
+    vertices = [p] + [point for _, point in sorted(cuts)] + [q]
+    return list(zip(vertices, vertices[1:]))
+
+
+def make_surface(name, surface_type, construction, zone, boundary, boundary_object, vertices):
+    exposed = boundary == "Outdoors"
+    return {"Name": name, "Surface_Type": surface_type, "Construction_Name": construction, "Zone_Name": zone,
+            "Outside_Boundary_Condition": boundary, "Outside_Boundary_Condition_Object": boundary_object,
+            "Sun_Exposure": "SunExposed" if exposed else "NoSun",
+            "Wind_Exposure": "WindExposed" if exposed else "NoWind",
+            "vertices": vertices}
+
+
+def make_window(wall, ratio):
+    """wall scaled by sqrt(ratio) about its centroid"""
+    scale = math.sqrt(ratio)
+    n = len(wall["vertices"])
+    center = [sum(v[i] for v in wall["vertices"]) / n for i in range(3)]
+    vertices = [tuple(c + scale * (x - c) for x, c in zip(v, center)) for v in wall["vertices"]]
+    return {"Name": f"{wall['Name']} Window", "Surface_Type": "Window", "Construction_Name": CONSTRUCTIONS["window"],
+            "Building_Surface_Name": wall["Name"], "vertices": vertices}
+
+
+def zone_surfaces(pieces, north_axis=0, wwr=0.0):
+    """
+    surfaces of zones given as prisms, a zone can be made of several pieces
+    walls: edges of pieces on the same level are cut where other pieces have a vertex, then an edge shared by two
+    zones is a pair of interzone walls, an edge of no other piece an exterior wall (ground contact below grade) and an
+    edge between pieces of the same zone has no wall
+    floors and ceilings: a piece with the same polygon right above or below is paired, otherwise ground floor,
+    exposed floor or roof
+    :param pieces: list of (zone name, counterclockwise polygon of (x, y), floor z, ceiling z)
+    :param wwr: window to wall ratio of the above grade exterior walls, or dict of facade (N, E, S, W): ratio
+    :return: dict of surfaces and windows, lists of dicts in IDF field names
+    """
+    surfaces, windows = [], []
+    counts = {}
+
+    def name(zone, kind):
+        counts[(zone, kind)] = counts.get((zone, kind), 0) + 1
+        return f"{zone} {kind} {counts[(zone, kind)]}"
+
+    levels = {}
+    for i, (zone, polygon, z0, z1) in enumerate(pieces):
+        levels.setdefault((round(z0, PRECISION), round(z1, PRECISION)), []).append(i)
+
+    for (z0, z1), indices in levels.items():
+        points = {_key(p): p for i in indices for p in pieces[i][1]}
+        edges = {}
+        for i in indices:
+            zone, polygon = pieces[i][:2]
+            own = {_key(p) for p in polygon}
+            others = [p for key, p in points.items() if key not in own]
+            for p, q in zip(polygon, polygon[1:] + polygon[:1]):
+                for a, b in _split_edge(p, q, others):
+                    edges[(_key(a), _key(b))] = (zone, (a, b))
+        paired = {}
+        for (a_key, b_key), (zone, (a, b)) in edges.items():
+            vertices = [(a[0], a[1], z1), (a[0], a[1], z0), (b[0], b[1], z0), (b[0], b[1], z1)]
+            other = edges.get((b_key, a_key))
+            if other is None:
+                below_grade = z1 <= 0
+                wall = make_surface(name(zone, "Wall"), "Wall", CONSTRUCTIONS["exterior_wall"], zone,
+                                    "Ground" if below_grade else "Outdoors", "", vertices)
+                surfaces.append(wall)
+                ratio = wwr.get(facade((a, b), north_axis), 0.0) if isinstance(wwr, dict) else wwr
+                if z0 >= 0 and ratio > 0:
+                    windows.append(make_window(wall, ratio))
+            elif other[0] != zone:
+                wall = make_surface(name(zone, "Wall"), "Wall", CONSTRUCTIONS["interior_wall"], zone, "Surface", "",
+                                    vertices)
+                paired[(a_key, b_key)] = wall
+                partner = paired.get((b_key, a_key))
+                if partner is not None:
+                    wall["Outside_Boundary_Condition_Object"] = partner["Name"]
+                    partner["Outside_Boundary_Condition_Object"] = wall["Name"]
+                surfaces.append(wall)
+            # edges between pieces of the same zone have no wall
+
+    # floors and ceilings, stacked pieces are matched on their polygon
+    floor_names = [name(zone, "Floor") for zone, _, _, _ in pieces]
+    ceiling_names = [name(zone, "Ceiling") for zone, _, _, _ in pieces]
+    floors = {(round(z0, PRECISION), _polygon_key(polygon)): i for i, (_, polygon, z0, _) in enumerate(pieces)}
+    ceilings = {(round(z1, PRECISION), _polygon_key(polygon)): i for i, (_, polygon, _, z1) in enumerate(pieces)}
+    for i, (zone, polygon, z0, z1) in enumerate(pieces):
+        key = _polygon_key(polygon)
+        floor_vertices = [(x, y, z0) for x, y in polygon[::-1]]
+        ceiling_vertices = [(x, y, z1) for x, y in polygon]
+        below = ceilings.get((round(z0, PRECISION), key))
+        if below is not None:
+            surfaces.append(make_surface(floor_names[i], "Floor", CONSTRUCTIONS["interior_floor"], zone, "Surface",
+                                         ceiling_names[below], floor_vertices))
+        else:
+            surfaces.append(make_surface(floor_names[i], "Floor", CONSTRUCTIONS["ground_floor"], zone,
+                                         "Ground" if z0 <= 0 else "Outdoors", "", floor_vertices))
+        above = floors.get((round(z1, PRECISION), key))
+        if above is not None:
+            surfaces.append(make_surface(ceiling_names[i], "Ceiling", CONSTRUCTIONS["interior_ceiling"], zone,
+                                         "Surface", floor_names[above], ceiling_vertices))
+        else:
+            roof_name = ceiling_names[i].replace(" Ceiling ", " Roof ")
+            surfaces.append(make_surface(roof_name, "Roof", CONSTRUCTIONS["roof"], zone, "Outdoors", "",
+                                         ceiling_vertices))
+    return {"surfaces": surfaces, "windows": windows}
+
+
+def geometry_to_idf_text(geometry):
+    """
+    :param geometry: dict of zones (list of names), surfaces, windows and optional multipliers (zone: multiplier)
+    :return: GlobalGeometryRules, Zone, ZoneList, BuildingSurface:Detailed and FenestrationSurface:Detailed
+    objects as IDF text
+    """
+    out = io.StringIO()
+    multipliers = geometry.get("multipliers") or {}
+
+    def write(class_name, fields):
+        out.write(f"{class_name},\n")
+        for i, (value, comment) in enumerate(fields):
+            end = ";" if i == len(fields) - 1 else ","
+            out.write(f"    {str(value) + end:<26}!- {comment}\n")
+        out.write("\n")
+
+    def vertex_fields(vertices):
+        fields = [(len(vertices), "Number of Vertices")]
+        for i, vertex in enumerate(vertices, start=1):
+            for axis, value in zip("XYZ", vertex):
+                fields.append((f"{round(value, PRECISION):g}", f"Vertex {i} {axis}-coordinate {{m}}"))
+        return fields
+
+    write("GlobalGeometryRules", [("UpperLeftCorner", "Starting Vertex Position"),
+                                  ("CounterClockWise", "Vertex Entry Direction"),
+                                  ("Relative", "Coordinate System")])
+    for zone in geometry["zones"]:
+        write("Zone", [(zone, "Name"), (0, "Direction of Relative North {deg}"), (0, "X Origin {m}"),
+                       (0, "Y Origin {m}"), (0, "Z Origin {m}"), (1, "Type"), (multipliers.get(zone, 1), "Multiplier"),
+                       ("autocalculate", "Ceiling Height {m}"), ("autocalculate", "Volume {m3}")])
+    write("ZoneList", [(ALL_ZONES, "Name")] + [(zone, f"Zone {i} Name")
+                                              for i, zone in enumerate(geometry["zones"], start=1)])
+    for surface in geometry["surfaces"]:
+        write("BuildingSurface:Detailed", [
+            (surface["Name"], "Name"), (surface["Surface_Type"], "Surface Type"),
+            (surface["Construction_Name"], "Construction Name"), (surface["Zone_Name"], "Zone Name"),
+            ("", "Space Name"), (surface["Outside_Boundary_Condition"], "Outside Boundary Condition"),
+            (surface["Outside_Boundary_Condition_Object"], "Outside Boundary Condition Object"),
+            (surface["Sun_Exposure"], "Sun Exposure"), (surface["Wind_Exposure"], "Wind Exposure"),
+            ("autocalculate", "View Factor to Ground")] + vertex_fields(surface["vertices"]))
+    for window in geometry["windows"]:
+        write("FenestrationSurface:Detailed", [
+            (window["Name"], "Name"), (window["Surface_Type"], "Surface Type"),
+            (window["Construction_Name"], "Construction Name"),
+            (window["Building_Surface_Name"], "Building Surface Name"), ("", "Outside Boundary Condition Object"),
+            ("autocalculate", "View Factor to Ground"), ("", "Frame and Divider Name"), (1, "Multiplier")]
+            + vertex_fields(window["vertices"]))
+    return out.getvalue()
+
+
+def replace_geometry(idf, geometry, north_axis=0):
+    """
+    replaces the geometry of an eppy IDF (zones, zone lists, surfaces, geometry rules) and sets the North Axis of
+    its Building object
+    """
+    from eppy.modeleditor import IDF
+    for class_name in GEOMETRY_OBJECTS:
+        for obj in list(idf.idfobjects[class_name]):
+            idf.removeidfobject(obj)
+    compiled = IDF(io.StringIO(geometry_to_idf_text(geometry)))
+    for class_name in GEOMETRY_OBJECTS:
+        for obj in compiled.idfobjects[class_name]:
+            idf.copyidfobject(obj)
+    if len(idf.idfobjects["BUILDING"]) == 0:
+        idf.newidfobject("BUILDING", Name="Building")
+    idf.idfobjects["BUILDING"][0].North_Axis = north_axis
+    return idf
+
+
+class GeometryCompiler:
+    """
+    layout: one of LAYOUTS; a, b, c, d: dimensions of building_layouts.txt [m]
+    number_of_floors: above grade floors; basement_floors: floors below grade, without windows
+    ceiling_height: floor to floor height [m]; WWR: window to wall ratio, 0 to 1
+    orientation: compass direction faced by side a, one of ORIENTATIONS
+    zones_per_floor: one of ZONING
+    """
+
+    def __init__(self, layout, a, b, c=None, d=None, number_of_floors=1, ceiling_height=3.0, WWR=0.3,
+                 orientation="S", zones_per_floor="1 zone", basement_floors=0, perimeter_depth=PERIMETER_DEPTH):
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown layout '{layout}', expected one of {LAYOUTS}")
+        if zones_per_floor not in ZONING:
+            raise ValueError(f"Unknown zoning '{zones_per_floor}', expected one of {ZONING}")
+        if orientation not in ORIENTATIONS:
+            raise ValueError(f"Unknown orientation '{orientation}', expected one of {list(ORIENTATIONS)}")
+        if not 0 <= WWR < 1:
+            raise ValueError("WWR must be between 0 and 1.")
+        self.layout = layout
+        self.a, self.b = float(a), float(b)
+        self.c = float(c) if c is not None else None
+        self.d = float(d) if d is not None else None
+        self.number_of_floors = int(number_of_floors)
+        self.basement_floors = int(basement_floors or 0)
+        self.ceiling_height = float(ceiling_height)
+        self.WWR = float(WWR)
+        self.orientation = orientation
+        self.zones_per_floor = zones_per_floor
+        self.outline, self.hole, widths = self._footprint()
+        if min(widths) <= 0 or self.number_of_floors < 1 or self.ceiling_height <= 0:
+            raise ValueError(f"Dimensions a={a}, b={b}, c={c}, d={d} do not make a {layout}.")
+        # the core keeps at least a third of the narrowest wing
+        self.perimeter_depth = min(perimeter_depth, min(widths) / 3)
+
+    @classmethod
+    def from_description(cls, building_description, perimeter_depth=PERIMETER_DEPTH):
+        """
+        :param building_description: dict with the keys of the GUI form
+        """
+        return cls(building_description["layout"], building_description["a"], building_description["b"],
+                   building_description.get("c"), building_description.get("d"),
+                   number_of_floors=building_description["number_of_floors"],
+                   ceiling_height=building_description["ceiling_height"],
+                   WWR=building_description["WWR"],
+                   orientation=building_description.get("orientation") or "S",
+                   zones_per_floor=building_description.get("zones_per_floor") or "1 zone",
+                   basement_floors=building_description.get("basement_floors") or 0,
+                   perimeter_depth=perimeter_depth)
+
+    # ── footprint ─────────────────────────────────────────────────────────────
+
+    def _footprint(self):
+        """
+        :return: outline (counterclockwise), courtyard (counterclockwise) or None, widths of the wings
+        """
+        a, b, c, d = self.a, self.b, self.c, self.d
+        if self.layout == "Rectangular building":
+            return _rect(0, 0, a, b), None, [a, b]
+        if c is None or d is None:
+            raise ValueError(f"Dimensions c and d are required for {self.layout}.")
+        if self.layout == "L-shaped building":
+            # c x d cut off the top right corner
+            outline = [(0, 0), (a, 0), (a, b - d), (a - c, b - d), (a - c, b), (0, b)]
+            return outline, None, [a - c, b - d, c, d]
+        if self.layout == "T-shaped building":
+            # d wide and c high stem centered on top of the a x b base
+            x0, x1 = (a - d) / 2, (a + d) / 2
+            outline = [(0, 0), (a, 0), (a, b), (x1, b), (x1, b + c), (x0, b + c), (x0, b), (0, b)]
+            return outline, None, [b, c, d, x0]
+        if self.layout == "U-shaped building":
+            # d wide and c deep notch centered on the top side
+            x0, x1 = (a - d) / 2, (a + d) / 2
+            outline = [(0, 0), (a, 0), (a, b), (x1, b), (x1, b - c), (x0, b - c), (x0, b), (0, b)]
+            return outline, None, [x0, b - c, c, d]
+        # Hollow building: c x d courtyard centered
+        x0, x1 = (a - c) / 2, (a + c) / 2
+        y0, y1 = (b - d) / 2, (b + d) / 2
+        return _rect(0, 0, a, b), _rect(x0, y0, x1, y1), [x0, y0]
+
+    @property
+    def floor_area(self):
+        """footprint area of one floor [m2]"""
+        return polygon_area(self.outline) - (polygon_area(self.hole) if self.hole else 0)
+
+    @property
+    def perimeter(self):
+        """length of the exterior walls of one floor, courtyard included [m]"""
+        rings = [self.outline] + ([self.hole] if self.hole else [])
+        return sum(math.dist(p, q) for ring in rings for p, q in zip(ring, ring[1:] + ring[:1]))
+
+    @property
+    def north_axis(self):
+        """Building North Axis, side a is the -y side of the footprint"""
+        return (ORIENTATIONS[self.orientation] - 180) % 360
+
+    def floor_plan(self):
+        """
+        :return: list of (zone label, counterclockwise polygon) of one floor
+        """
+        hole = self.hole
+        if self.zones_per_floor == "1 zone":
+            if hole is None:
+                return [("Zone", self.outline)]
+            return [("Zone", quad) for quad, _ in band(self.outline, hole)]
+
+        depth = self.perimeter_depth
+        rings = [self.outline] + ([hole[::-1]] if hole else [])
+        pieces = []
+        for ring in rings:
+            for quad, edge in band(ring, offset_ring(ring, depth)):
+                label = "Perimeter" if self.zones_per_floor == "2 zones" else f"Perimeter {facade(edge, self.north_axis)}"
+                pieces.append((label, quad))
+        core = offset_ring(self.outline, depth)
+        if hole is None:
+            pieces.append(("Core", core))
+        else:
+            # the courtyard ring grows by depth, counterclockwise again
+            pieces += [("Core", quad) for quad, _ in band(core, offset_ring(hole[::-1], depth)[::-1])]
+        return pieces
+
+    # ── surfaces ──────────────────────────────────────────────────────────────
+
+    def levels(self):
+        """
+        :return: list of (level name, floor z) from the lowest basement up
+        """
+        h = self.ceiling_height
+        basements = [(f"B{i}", -i * h) for i in range(self.basement_floors, 0, -1)]
+        return basements + [(f"F{i + 1}", i * h) for i in range(self.number_of_floors)]
+
+    def compile(self):
+        """
+        :return: dict of zones (list of names), surfaces and windows (lists of dicts in IDF field names)
+        """
+        plan = self.floor_plan()
+        zones, pieces = [], []
+        for level, z in self.levels():
+            zones += [f"{level} {label}" for label in dict.fromkeys(label for label, _ in plan)]
+            pieces += [(f"{level} {label}", polygon, z, z + self.ceiling_height) for label, polygon in plan]
+        geometry = zone_surfaces(pieces, self.north_axis, self.WWR)
+        geometry["zones"] = zones
+        return geometry
+
+    def to_idf_text(self):
+        return geometry_to_idf_text(self.compile())
+
+    def to_idf(self, idf):
+        """replaces the geometry of an eppy IDF with the compiled one"""
+        return replace_geometry(idf, self.compile(), self.north_axis)
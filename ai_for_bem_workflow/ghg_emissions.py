@@ -0,0 +1,164 @@
+"""
+ghg_emissions.py
+----------------
+Operational GHG emissions from hourly EnergyPlus meters.
+
+Grid emission factors are read from one CSV per province or region in input_files/emission_factors/<region>.csv,
+in gCO2e/kWh, either hourly or monthly:
+
+    hour,average,marginal[,is_peak]        8760 rows, hour 1 to 8760
+    month,average,marginal[,is_peak]       12 rows, month 1 to 12
+
+Lines starting with # are comments, for the source of the factors. ON.csv ships with indicative monthly factors of
+the Ontario grid.
+
+Monthly profiles are expanded to the hours of the year. is_peak (0/1) marks the grid peak hours, otherwise the
+hours with the highest marginal factors are used. Electricity is multiplied with the hourly factors and fuels with
+constant combustion factors, as matrix products over all scenarios at once.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from model_checking import ModelChecking
+
+EMISSION_FACTORS_DIR = os.path.join("input_files", "emission_factors")
+ELECTRICITY_METER = "Electricity:Facility"
+# combustion factors [gCO2e/kWh], NIR Canada defaults
+FUEL_EMISSION_FACTORS = {
+    "NaturalGas:Facility": 179.0,
+    "Propane:Facility": 215.0,
+    "FuelOilNo2:Facility": 257.0,
+}
+DAYS_IN_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+# month (0-11) of every hour of a non-leap year
+HOUR_MONTH = np.repeat(np.arange(12), np.array(DAYS_IN_MONTH) * 24)
+
+
+def available_regions(factors_dir=EMISSION_FACTORS_DIR):
+    """regions with an emission factors file in factors_dir"""
+    if not os.path.isdir(factors_dir):
+        return []
+    return sorted(x[:-4] for x in os.listdir(factors_dir) if x.lower().endswith(".csv"))
+
+
+def load_grid_factors(region, factors_dir=EMISSION_FACTORS_DIR):
+    """
+    :param region: file name without extension, e.g. "ON"
+    :return: dict of hourly arrays (8760,): average, marginal [gCO2e/kWh] and is_peak (None if not given)
+    """
+    path = os.path.join(factors_dir, f"{region}.csv")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"no emission factors for region {region}, expected {path}, available regions: "
+                                f"{', '.join(available_regions(factors_dir)) or 'none'}")
+    df = pd.read_csv(path, comment="#")
+    if "hour" in df.columns:
+        df = df.sort_values("hour")
+        if len(df) != 8760:
+            raise ValueError(f"hourly emission factors of {region} must have 8760 rows, found {len(df)}")
+        index = np.arange(8760)
+    elif "month" in df.columns:
+        df = df.sort_values("month")
+        if len(df) != 12:
+            raise ValueError(f"monthly emission factors of {region} must have 12 rows, found {len(df)}")
+        index = HOUR_MONTH
+    else:
+        raise ValueError(f"emission factors of {region} need an hour or a month column")
+    factors = {
+        "average": df["average"].to_numpy(dtype=float)[index],
+        "marginal": df["marginal"].to_numpy(dtype=float)[index],
+        "is_peak": df["is_peak"].to_numpy(dtype=bool)[index] if "is_peak" in df.columns else None,
+    }
+    return factors
+
+
+class EmissionsCalculator:
+    """
+    scores the meters of one or many runs against the grid emission factors of a region
+    peak_fraction: share of the hours with the highest marginal factors considered peak hours, when the CSV
+    does not flag them
+    """
+
+    def __init__(self, region, factors_dir=EMISSION_FACTORS_DIR, peak_fraction=0.1, fuel_factors=None):
+        self.region = region
+        factors = load_grid_factors(region, factors_dir)
+        self.average = factors["average"]
+        self.marginal = factors["marginal"]
+        if factors["is_peak"] is not None:
+            self.peak_hours = factors["is_peak"]
+        else:
+            self.peak_hours = self.marginal >= np.quantile(self.marginal, 1 - peak_fraction)
+        self.fuel_factors = fuel_factors if fuel_factors is not None else FUEL_EMISSION_FACTORS
+
+    def score(self, electricity, fuels=None, floor_area=None, hour_of_year=None):
+        """
+        :param electricity: kWh, array (n_steps,) or (n_runs, n_steps)
+        :param fuels: dict of fuel meter name: kWh array of the same shape
+        :param floor_area: m2, scalar or (n_runs,), for the intensity
+        :param hour_of_year: hour (0-8759) of each step, defaults to an annual hourly run starting on Jan 1
+        :return: dict of arrays (n_runs,)
+        """
+        electricity = np.atleast_2d(np.asarray(electricity, dtype=float))
+        n_steps = electricity.shape[1]
+        hours = np.asarray(hour_of_year) if hour_of_year is not None else np.arange(n_steps) % 8760
+        average = self.average[hours]
+        marginal = self.marginal[hours]
+
+        # g = kWh x g/kWh, summed over the hours for every run
+        elec_average = electricity @ average
+        elec_marginal = electricity @ marginal
+        elec_peak = electricity @ np.where(self.peak_hours[hours], average, 0)
+        fuel_g = np.zeros(electricity.shape[0])
+        for name, values in (fuels or {}).items():
+            fuel_g += np.atleast_2d(np.asarray(values, dtype=float)).sum(axis=1) * self.fuel_factors[name]
+
+        total_average = elec_average + fuel_g
+        results = {
+            "electricity_tCO2e_average": elec_average / 1e6,
+            "electricity_tCO2e_marginal": elec_marginal / 1e6,
+            "fuel_tCO2e": fuel_g / 1e6,
+            "total_tCO2e_average": total_average / 1e6,
+            "total_tCO2e_marginal": (elec_marginal + fuel_g) / 1e6,
+            "peak_tCO2e": elec_peak / 1e6,
+            "peak_share": np.divide(elec_peak, total_average, out=np.zeros_like(elec_peak), where=total_average > 0),
+        }
+        if floor_area is not None:
+            results["intensity_kgCO2e_m2"] = total_average / 1e3 / np.asarray(floor_area, dtype=float)
+        return results
+
+    def score_runs(self, runs, floor_areas=None):
+        """
+        :param runs: list of ModelChecking.get_meter_arrays outputs, all with the same time steps
+        :param floor_areas: list of floor areas [m2]
+        :return: df with one row per run
+        """
+        electricity = np.vstack([x[ELECTRICITY_METER] for x in runs])
+        fuels = {name: np.vstack([x.get(name, np.zeros(electricity.shape[1])) for x in runs])
+                 for name in self.fuel_factors if any(name in x for x in runs)}
+        results = self.score(electricity, fuels, floor_areas, runs[0]["hour_of_year"])
+        return pd.DataFrame(results)
+
+    def score_model_checking(self, my_check):
+        """
+        :param my_check: ModelChecking of a finished run
+        :return: dict of scalars
+        """
+        meter_arrays = my_check.get_meter_arrays([ELECTRICITY_METER] + list(self.fuel_factors.keys()))
+        fuels = {name: meter_arrays[name] for name in self.fuel_factors}
+        results = self.score(meter_arrays[ELECTRICITY_METER], fuels, my_check.get_building_area(),
+                             meter_arrays["hour_of_year"])
+        return {k: float(v[0]) for k, v in results.items()}
+
+
+def main():
+    scenario = 1
+    my_check = ModelChecking(os.path.join("results", f"v{scenario}", "eplustbl.csv"),
+                             os.path.join("results", f"v{scenario}", "eplusout.csv"),
+                             os.path.join("results", f"v{scenario}", "eplusmtr.csv"),
+                             os.path.join("results", f"v{scenario}", "eplusout.eio"))
+    calculator = EmissionsCalculator("ON")
+    print(calculator.score_model_checking(my_check))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
 import os
+import queue
 import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from typing import Optional
 from PIL import Image, ImageTk
+from job_queue import FINISHED, start_service
+from weather_catalog import WeatherCatalog
 
+JOB_POLL_MS = 1000
+# the messages of the workflow threads are written to the log at most this often
+LOG_POLL_MS = 200
 
 LAYOUTS = [
     "Rectangular building",
@@ -36,7 +42,8 @@ SECONDARY_DIMS_REQUIRED = {
     "Hollow building": True,
 }
 
-_DEFAULT_EPW = os.path.join("input_files", "CAN_ON_Ottawa.716280_CWEC.epw")
+_DEFAULT_EPW = os.path.join("input_files", "Ottawa_CWEC_2020.epw")
+WEATHER_DIR = "input_files"
 
 defaults = {
     "layout": "Rectangular building",
@@ -72,10 +79,14 @@ defaults = {
 
 
 class BuildingInputGUI:
-    def __init__(self, root: tk.Tk, on_submit=None):
+    def __init__(self, root: tk.Tk, on_submit=None, job_queue=None, client_type: str = "gemini"):
         self.root = root
         self.on_submit = on_submit
+        self.job_queue = job_queue
+        self.client_type = client_type
         self.result: Optional[dict] = None
+        self.weather_catalog = None  # built on the first weather search
+        self.log_queue = queue.Queue()
 
         root.title("GHGe Modeller")
         root.resizable(True, True)
@@ -130,6 +141,7 @@ class BuildingInputGUI:
         self.log_text.grid(row=0, column=1, sticky="nsew", pady=4)
         log_scroll.grid(row=0, column=2, sticky="ns", pady=4)
         log_frame.columnconfigure(1, weight=1)
+        self.root.after(LOG_POLL_MS, self._drain_log)
 
         self._on_layout_change()
 
@@ -153,6 +165,8 @@ class BuildingInputGUI:
         ttk.Label(frame, text="Location:").grid(row=row, column=0, sticky="w", pady=4)
         self.location_var = tk.StringVar(value=defaults["location"])
         ttk.Entry(frame, textvariable=self.location_var, width=30).grid(row=row, column=1, columnspan=2, sticky="ew", pady=4)
+        ttk.Button(frame, text="Find weather", command=self._find_epw).grid(
+            row=row, column=3, sticky="w", padx=(8, 0))
         row += 1
 
         # Age
@@ -465,6 +479,18 @@ class BuildingInputGUI:
         if path:
             self.epw_var.set(os.path.relpath(path))
 
+    def _find_epw(self):
+        """sets the weather file of the station matching the location, a place name or latitude, longitude"""
+        location = self.location_var.get().strip()
+        if self.weather_catalog is None:
+            self.weather_catalog = WeatherCatalog(WEATHER_DIR)
+        station = self.weather_catalog.find(location)
+        if station is None:
+            messagebox.showwarning("Weather file", f"No weather station found for '{location}' in {WEATHER_DIR}, "
+                                                   f"enter coordinates or browse for the file.")
+            return
+        self.epw_var.set(os.path.relpath(station["file"]))
+
     def _on_layout_change(self, *_):
         needs_secondary = SECONDARY_DIMS_REQUIRED[self.layout_var.get()]
         state = "normal" if needs_secondary else "disabled"
@@ -586,13 +612,20 @@ class BuildingInputGUI:
             "AHUs": self.ahus_var.get(),
         }
 
+        if self.job_queue is not None:
+            # the workflow runs in the job service, the form stays available for the next building. Its workers exit
+            # when idle, so it is started again if none is alive
+            start_service(self.job_queue.db_file, self.job_queue.jobs_dir)
+            job_id = self.job_queue.submit(self.result, self.client_type)
+            self._append_log(f"Job {job_id} queued\n")
+            self._poll_job(job_id, 0)
+            return
+
         self.generate_btn.config(state="disabled")
 
         def log(msg=""):
-            # schedules self._append_log(str(msg) + "\n") to be called on the main (GUI) thread
-            # root.after() hand work back to the main thread's event loop
-            # 0ms: run as soon as main thread event loop is free
-            self.root.after(0, self._append_log, str(msg) + "\n")
+            # called from the worker thread, the main (GUI) thread writes the queued messages in _drain_log
+            self.log_queue.put(str(msg) + "\n")
 
         if self.on_submit:
             # Main thread: Tkinter event loop, keeps the GUI responsive
@@ -602,6 +635,29 @@ class BuildingInputGUI:
         else:
             self.root.destroy()
 
+    def _poll_job(self, job_id: str, last_event: int):
+        """shows the new progress messages of a queued job, polled from the main thread until the job finishes"""
+        for event_id, _, message in self.job_queue.events(job_id, last_event):
+            self._append_log(f"[{job_id}] {message}\n")
+            last_event = event_id
+        job = self.job_queue.status(job_id)
+        if job is None or job["status"] in FINISHED:
+            self._append_log(f"[{job_id}] {job['status'] if job else 'removed'}\n")
+        else:
+            self.root.after(JOB_POLL_MS, self._poll_job, job_id, last_event)
+
+    def _drain_log(self):
+        """writes the messages queued by the workflow threads in one go, then runs again after LOG_POLL_MS"""
+        messages = []
+        while True:
+            try:
+                messages.append(self.log_queue.get_nowait())
+            except queue.Empty:
+                break
+        if messages:
+            self._append_log("".join(messages))
+        self.root.after(LOG_POLL_MS, self._drain_log)
+
     def _append_log(self, msg: str):
         self.log_text.config(state="normal")
         self.log_text.insert("end", msg)
@@ -609,10 +665,13 @@ class BuildingInputGUI:
         self.log_text.config(state="disabled")
 
 
-def run_with_gui(workflow_fn) -> None:
-    """Open the tabbed input form; on submit runs workflow_fn(description, log) in a background thread."""
+def run_with_gui(workflow_fn=None, job_queue=None, client_type: str = "gemini") -> None:
+    """
+    Open the tabbed input form; on submit queues the description on job_queue, or, without a queue, runs
+    workflow_fn(description, log) in a background thread of the GUI.
+    """
     root = tk.Tk()
-    BuildingInputGUI(root, on_submit=workflow_fn)
+    BuildingInputGUI(root, on_submit=workflow_fn, job_queue=job_queue, client_type=client_type)
     root.mainloop()
 
 
@@ -4,15 +4,19 @@ from time import time
 
 from ai_bem_workflow import *
 from model_checking import ModelChecking
+from runtime_collector import EnergyPlusDataCollector
+from weather_catalog import WeatherCatalog
 
 
-epw_file = os.path.join("input_files", 'Ottawa_CWEC_2020.epw')
+# weather of the building location (Toronto), the Ottawa file if the library has no Toronto station
+epw_file = WeatherCatalog("input_files", save_index=False).epw_for(
+    "Toronto", default=os.path.join("input_files", 'Ottawa_CWEC_2020.epw'))
 ghge_modeller = BuildingEnergyWorkflow("gemini")
 user_description = {"layout": "Rectangular building", "a":24, "b":18, "c": None, "d":None, "ceiling_height":4,
                     "number_of_floors":1, "WWR": 0.33,
                     "details": "It is a small office building. create 4 perimeter zones and 1 core zone. the envelope is relevant for a Toronto building built in 2024. It has occupant density of 30 m2 per occupant, LED lights and common office equipment.  The HVAC system consists of AHU with an economizer and VAV boxes with reheat coils."}
 
-ghge_modeller.epw_file = os.path.join("input_files", 'CAN_ON_Toronto.716240_CWEC.epw')
+ghge_modeller.epw_file = epw_file
 
 enable_llm_loop = True  # used for testing
 enable_hvac = True
@@ -22,7 +26,7 @@ for i in range(1):
     prompt = ghge_modeller.create_prompt(user_description)
     var_names = ["Site Outdoor Air Drybulb Temperature", "Zone Mean Air Temperature"]
     # TODO: add specialized meters depending on the existing HVAC system
-    meter_names = ["Heating:EnergyTransfer", "Cooling:EnergyTransfer","Electricity:Facility"]
+    meter_names = ["Heating:EnergyTransfer", "Cooling:EnergyTransfer", "Electricity:Facility", "NaturalGas:Facility"]
     models_count = 0
     for j in range(3):  # spec compliance loop
         for i in range(4):  # executability loop
@@ -64,14 +68,16 @@ for i in range(1):
             ghge_modeller.add_internal_gains(user_description, idf_path)
 
             # Step 7: add outputs
-            ghge_modeller.add_output_objects(idf_path, var_names, meter_names)
+            # meters are read in-process, no csv round trip
+            ghge_modeller.add_output_objects(idf_path, var_names, meter_names, csv_output=False)
+            collector = EnergyPlusDataCollector(var_names, meter_names)
 
             # Step 8: add HVAC, then run model
             if enable_hvac:
                 print("Bot: adding HVAC components...\n")
                 idf = ghge_modeller.add_hvac_templates(user_description, idf_path)
                 print("Bot: executing simulation...\n")
-                success = ghge_modeller.run_energyplus(idf_path, epw_file)
+                success = ghge_modeller.run_energyplus(idf_path, epw_file, collector)
 
         if success:
             # Step 9: compare bldg props and meters
@@ -83,7 +89,7 @@ for i in range(1):
                                          )
                 model_props = my_check.get_envelope_props()
                 print(f"Model geometrical specs: {model_props}\n")
-                meters = my_check.get_meters()
+                meters = collector.get_meters(my_check.get_building_area())
                 print(meters)
             except Exception as e:
                 print("model specs: error found\n")
@@ -33,12 +33,11 @@ import textwrap
 import ast
 from typing import Any
 from api_clients import *
-from config import EPLUS_IDD
+from config import set_idd
 
 from eppy import modeleditor
 from eppy.modeleditor import IDF
 
-IDF.setiddname(EPLUS_IDD)
 
 class InternalGainsGenerator:
     """
@@ -48,10 +47,12 @@ class InternalGainsGenerator:
     It returns an idf file after manipulating it and adding people, light, equipment and schedules objects.
     """
 
-    def __init__(self, idf_path):
+    def __init__(self, idf_path, idf=None):
         self.idf_path = idf_path
         self.request_client = OpenRouterAPIClient("google/gemini-3.1-flash-lite-preview")
-        self.idf = IDF(idf_path)
+        # an already loaded idf can be passed to avoid re-reading the file
+        set_idd()
+        self.idf = idf if idf is not None else IDF(idf_path)
         request_template_path = os.path.join("input_files", "internal_gains_schema.json")
         with open(request_template_path, 'r') as file:
             self.request_schema = json.load(file)
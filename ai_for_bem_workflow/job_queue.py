@@ -0,0 +1,469 @@
+"""
+job_queue.py
+------------
+Local job service of the workflow: a persistent queue in SQLite, a pool of worker processes and a status/progress
+API, shared by the GUI and the batch runner.
+
+    jobs        one row per building: description, status (queued, running, done, failed, cancelled), progress,
+                workspace, worker, heartbeat, results summary or traceback
+    job_events  progress messages of the jobs, in order (the log of workflow_pipeline.run_workflow)
+    workers     worker processes and their last heartbeat
+
+Jobs are kept in the database file, so they survive restarts of the GUI and of the service. Workers beat every
+HEARTBEAT_INTERVAL seconds; a running job whose heartbeat is older than STALE_AFTER, e.g. after a crash or a reboot,
+is queued again (up to MAX_ATTEMPTS times). Every job runs in its own workspace folder, jobs_dir/<job_id>.
+
+    python job_queue.py serve --workers 8                 # worker pool, one job per process
+    python job_queue.py submit buildings.csv --batch portfolio
+    python job_queue.py status
+    python job_queue.py status portfolio/job_3 --events
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+import traceback
+import subprocess
+import multiprocessing
+
+JOBS_DB = os.path.join("results", "jobs.db")
+JOBS_DIR = "jobs"
+HEARTBEAT_INTERVAL = 10
+STALE_AFTER = 60
+MAX_ATTEMPTS = 3
+POLL_INTERVAL = 2.0
+FINISHED = ("done", "failed", "cancelled")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    batch TEXT,
+    client_type TEXT NOT NULL,
+    description TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress TEXT,
+    workspace TEXT NOT NULL,
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    submitted REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    heartbeat REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, submitted);
+CREATE TABLE IF NOT EXISTS job_events (
+    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    time REAL NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_events_job ON job_events (job_id, event_id);
+CREATE TABLE IF NOT EXISTS workers (
+    worker TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    started REAL NOT NULL,
+    heartbeat REAL NOT NULL
+);
+"""
+
+
+class JobQueue:
+    """
+    db_file: SQLite file of the queue, shared by every process using it
+    jobs_dir: parent folder of the job workspaces
+    """
+
+    def __init__(self, db_file=JOBS_DB, jobs_dir=JOBS_DIR):
+        self.db_file = db_file
+        self.jobs_dir = jobs_dir
+        os.makedirs(os.path.dirname(os.path.abspath(db_file)), exist_ok=True)
+        with self._connect() as conn:
+            # WAL: readers (GUI polling, status) do not block the workers writing progress
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # autocommit, transactions are opened explicitly where a read and a write must be atomic
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return _Connection(conn)
+
+    @staticmethod
+    def _job(row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["description"] = json.loads(job["description"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    # ── submission ────────────────────────────────────────────────────────────
+
+    def submit(self, description, client_type="gemini", job_id=None, batch=None):
+        """
+        queues a building, resubmitting a job id already done, queued or running does nothing, a failed or
+        cancelled one is queued again
+        :param description: dict with the keys of the GUI form, including epw_file
+        :param job_id: unique id, defaults to a timestamp; "<batch>/<job_id>" when a batch is given
+        :return: job_id
+        """
+        job_id = job_id or time.strftime("%Y%m%d_%H%M%S_") + os.urandom(3).hex()
+        if batch:
+            job_id = f"{batch}/{job_id}"
+        workspace = os.path.abspath(os.path.join(self.jobs_dir, *job_id.split("/")))
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT status FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                conn.execute("INSERT INTO jobs (job_id, batch, client_type, description, status, progress, workspace, "
+                             "submitted) VALUES (?, ?, ?, ?, 'queued', 'queued', ?, ?)",
+                             (job_id, batch, client_type, json.dumps(description, default=str), workspace, time.time()))
+            elif row["status"] in ("failed", "cancelled"):
+                conn.execute("UPDATE jobs SET status = 'queued', progress = 'queued', description = ?, client_type = ?, "
+                             "attempts = 0, worker = NULL, started = NULL, finished = NULL, result = NULL, error = NULL "
+                             "WHERE job_id = ?", (json.dumps(description, default=str), client_type, job_id))
+            conn.execute("COMMIT")
+        return job_id
+
+    def cancel(self, job_id):
+        """
+        cancels a queued job, running jobs are left to finish
+        :return: True if the job was cancelled
+        """
+        with self._connect() as conn:
+            cursor = conn.execute("UPDATE jobs SET status = 'cancelled', progress = 'cancelled', finished = ? "
+                                  "WHERE job_id = ? AND status = 'queued'", (time.time(), job_id))
+        return cursor.rowcount > 0
+
+    # ── status and progress ───────────────────────────────────────────────────
+
+    def status(self, job_id):
+        """
+        :return: job dict, with description and result decoded, or None for an unknown job
+        """
+        with self._connect() as conn:
+            return self._job(conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone())
+
+    def jobs(self, batch=None, status=None):
+        """
+        :return: list of job dicts, oldest first
+        """
+        query, params = "SELECT * FROM jobs WHERE 1 = 1", []
+        if batch is not None:
+            query, params = query + " AND batch = ?", params + [batch]
+        if status is not None:
+            query, params = query + " AND status = ?", params + [status]
+        with self._connect() as conn:
+            return [self._job(x) for x in conn.execute(query + " ORDER BY submitted", params).fetchall()]
+
+    def counts(self, batch=None):
+        """
+        :return: dict of status: number of jobs
+        """
+        query, params = "SELECT status, COUNT(*) FROM jobs", []
+        if batch is not None:
+            query, params = query + " WHERE batch = ?", [batch]
+        with self._connect() as conn:
+            return dict(conn.execute(query + " GROUP BY status", params).fetchall())
+
+    def events(self, job_id, after=0):
+        """
+        :param after: last event_id already read, to poll for new messages only
+        :return: list of (event_id, time, message)
+        """
+        with self._connect() as conn:
+            return [tuple(x) for x in conn.execute("SELECT event_id, time, message FROM job_events WHERE job_id = ? "
+                                                   "AND event_id > ? ORDER BY event_id", (job_id, after)).fetchall()]
+
+    def wait(self, job_ids, poll_interval=POLL_INTERVAL):
+        """
+        blocks until all jobs are finished
+        :return: list of job dicts
+        """
+        while True:
+            jobs = [self.status(x) for x in job_ids]
+            if all(x is None or x["status"] in FINISHED for x in jobs):
+                return jobs
+            time.sleep(poll_interval)
+
+    # ── worker side ───────────────────────────────────────────────────────────
+
+    def claim(self, worker):
+        """
+        marks the oldest queued job as running on worker
+        :return: job dict, None if the queue is empty
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY submitted LIMIT 1").fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = time.time()
+            conn.execute("UPDATE jobs SET status = 'running', progress = 'started', worker = ?, attempts = attempts + 1, "
+                         "started = ?, heartbeat = ? WHERE job_id = ?", (worker, now, now, row["job_id"]))
+            conn.execute("COMMIT")
+        return self.status(row["job_id"])
+
+    def log(self, job_id, message):
+        message = str(message)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT INTO job_events (job_id, time, message) VALUES (?, ?, ?)", (job_id, now, message))
+            # the last line is the progress shown by the status listings
+            progress = message.strip().splitlines()[-1][:200] if message.strip() else None
+            conn.execute("UPDATE jobs SET progress = COALESCE(?, progress), heartbeat = ? WHERE job_id = ?",
+                         (progress, now, job_id))
+
+    def finish(self, job_id, result):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = 'done', progress = 'done', finished = ?, result = ? WHERE job_id = ?",
+                         (time.time(), json.dumps(result, default=str), job_id))
+
+    def fail(self, job_id, error):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = 'failed', progress = 'failed', finished = ?, error = ? "
+                         "WHERE job_id = ?", (time.time(), error, job_id))
+
+    def beat(self, worker, job_id=None):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT INTO workers (worker, pid, started, heartbeat) VALUES (?, ?, ?, ?) "
+                         "ON CONFLICT (worker) DO UPDATE SET heartbeat = excluded.heartbeat",
+                         (worker, os.getpid(), now, now))
+            if job_id is not None:
+                conn.execute("UPDATE jobs SET heartbeat = ? WHERE job_id = ? AND worker = ?", (now, job_id, worker))
+
+    def retire(self, worker):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM workers WHERE worker = ?", (worker,))
+
+    def live_workers(self):
+        """
+        :return: list of workers that beat within STALE_AFTER seconds
+        """
+        with self._connect() as conn:
+            return [x[0] for x in conn.execute("SELECT worker FROM workers WHERE heartbeat > ?",
+                                               (time.time() - STALE_AFTER,)).fetchall()]
+
+    def requeue_stale(self):
+        """
+        queues again the running jobs of dead workers, jobs lost MAX_ATTEMPTS times fail
+        :return: list of requeued job ids
+        """
+        cutoff = time.time() - STALE_AFTER
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            stale = conn.execute("SELECT job_id, worker, attempts FROM jobs WHERE status = 'running' AND heartbeat < ?",
+                                 (cutoff,)).fetchall()
+            requeued = []
+            for job_id, worker, attempts in stale:
+                message = f"worker {worker} lost"
+                if attempts >= MAX_ATTEMPTS:
+                    conn.execute("UPDATE jobs SET status = 'failed', progress = 'failed', finished = ?, error = ? "
+                                 "WHERE job_id = ?", (time.time(), f"{message}, {attempts} attempts", job_id))
+                else:
+                    conn.execute("UPDATE jobs SET status = 'queued', progress = 'requeued', worker = NULL "
+                                 "WHERE job_id = ?", (job_id,))
+                    requeued.append(job_id)
+                conn.execute("INSERT INTO job_events (job_id, time, message) VALUES (?, ?, ?)",
+                             (job_id, time.time(), message))
+            conn.execute("DELETE FROM workers WHERE heartbeat < ?", (cutoff,))
+            conn.execute("COMMIT")
+        return requeued
+
+
+class _Connection:
+    """sqlite3 connection closed on exit of the with block (sqlite3's own context manager only commits)"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+        self.conn.close()
+
+
+# ── workers ───────────────────────────────────────────────────────────────────
+
+def run_job(job_queue, job):
+    """runs the workflow of one claimed job in its workspace"""
+    job_id = job["job_id"]
+    try:
+        # imported here, the GUI and the status commands do not need the workflow modules
+        from ai_bem_workflow import BuildingEnergyWorkflow
+        from results_store import ResultsStore
+        import workflow_pipeline
+
+        os.makedirs(job["workspace"], exist_ok=True)
+        # files of a previous, interrupted attempt
+        for filename in os.listdir(job["workspace"]):
+            file_path = os.path.join(job["workspace"], filename)
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+        ghge_modeller = BuildingEnergyWorkflow(job["client_type"], job["workspace"])
+        log = lambda msg="": job_queue.log(job_id, msg)
+        summary = workflow_pipeline.run_workflow(ghge_modeller, job["description"], log, ResultsStore())
+        job_queue.finish(job_id, summary)
+    except Exception:
+        job_queue.log(job_id, "Job failed")
+        job_queue.fail(job_id, traceback.format_exc())
+
+
+def worker_loop(db_file=JOBS_DB, jobs_dir=JOBS_DIR, poll_interval=POLL_INTERVAL, idle_exit=None):
+    """
+    worker process: claims and runs jobs one at a time
+    :param idle_exit: seconds without any queued job after which the worker stops, None to run forever
+    """
+    job_queue = JobQueue(db_file, jobs_dir)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    current = {"job_id": None}
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                job_queue.beat(worker, current["job_id"])
+            except sqlite3.Error:
+                pass
+
+    job_queue.beat(worker)
+    threading.Thread(target=heartbeat, daemon=True).start()
+    idle_since = time.time()
+    try:
+        while True:
+            job_queue.requeue_stale()
+            job = job_queue.claim(worker)
+            if job is None:
+                if idle_exit is not None and time.time() - idle_since > idle_exit:
+                    break
+                time.sleep(poll_interval)
+                continue
+            current["job_id"] = job["job_id"]
+            run_job(job_queue, job)
+            current["job_id"] = None
+            idle_since = time.time()
+    finally:
+        stop.set()
+        job_queue.retire(worker)
+
+
+class JobService:
+    """
+    Pool of worker processes over one queue, a worker that dies is replaced and its job requeued.
+    workers: number of processes, defaults to the number of cores
+    """
+
+    def __init__(self, db_file=JOBS_DB, jobs_dir=JOBS_DIR, workers=None, idle_exit=None):
+        self.db_file = db_file
+        self.jobs_dir = jobs_dir
+        self.workers = workers or os.cpu_count()
+        self.idle_exit = idle_exit
+        self.processes = []
+
+    def _start_worker(self):
+        process = multiprocessing.Process(target=worker_loop,
+                                          args=(self.db_file, self.jobs_dir, POLL_INTERVAL, self.idle_exit))
+        process.start()
+        return process
+
+    def serve(self):
+        """runs until interrupted, or until all workers stopped after idle_exit seconds without jobs"""
+        JobQueue(self.db_file, self.jobs_dir).requeue_stale()
+        self.processes = [self._start_worker() for _ in range(self.workers)]
+        print(f"{self.workers} workers on {self.db_file}")
+        try:
+            while self.processes:
+                time.sleep(POLL_INTERVAL)
+                for i, process in enumerate(self.processes):
+                    if process.is_alive():
+                        continue
+                    # exit code 0: idle_exit reached, anything else is a crash
+                    self.processes[i] = self._start_worker() if process.exitcode != 0 else None
+                self.processes = [x for x in self.processes if x is not None]
+        except KeyboardInterrupt:
+            for process in self.processes:
+                process.terminate()
+            for process in self.processes:
+                process.join()
+
+
+def start_service(db_file=JOBS_DB, jobs_dir=JOBS_DIR, workers=None, idle_exit=600):
+    """
+    starts a detached service if no worker is alive, so jobs keep running when the caller (e.g. the GUI) exits
+    :return: True if a service was started
+    """
+    if JobQueue(db_file, jobs_dir).live_workers():
+        return False
+    command = [sys.executable, os.path.abspath(__file__), "--db", db_file, "--jobs-dir", jobs_dir, "serve",
+               "--idle-exit", str(idle_exit)]
+    if workers:
+        command += ["--workers", str(workers)]
+    if sys.platform == "win32":
+        flags = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        subprocess.Popen(command, creationflags=flags, close_fds=True)
+    else:
+        subprocess.Popen(command, start_new_session=True, close_fds=True,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Job queue and worker service of the workflow")
+    parser.add_argument("--db", default=JOBS_DB)
+    parser.add_argument("--jobs-dir", default=JOBS_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run the worker pool")
+    serve.add_argument("--workers", type=int, default=None)
+    serve.add_argument("--idle-exit", type=float, default=None, help="stop after this many idle seconds")
+    submit = commands.add_parser("submit", help="queue the buildings of a .csv or .jsonl file")
+    submit.add_argument("input_file")
+    submit.add_argument("--batch", default=None)
+    submit.add_argument("--client", default="gemini")
+    status = commands.add_parser("status", help="list the jobs, or show one")
+    status.add_argument("job_id", nargs="?")
+    status.add_argument("--batch", default=None)
+    status.add_argument("--events", action="store_true", help="print the progress messages of the job")
+    cancel = commands.add_parser("cancel", help="cancel queued jobs")
+    cancel.add_argument("job_ids", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        JobService(args.db, args.jobs_dir, args.workers, args.idle_exit).serve()
+        return
+    job_queue = JobQueue(args.db, args.jobs_dir)
+    if args.command == "submit":
+        from batch_runner import read_descriptions
+        for description in read_descriptions(args.input_file):
+            job_id = description.pop("job_id")
+            print(job_queue.submit(description, args.client, job_id, args.batch))
+    elif args.command == "cancel":
+        for job_id in args.job_ids:
+            print(job_id, "cancelled" if job_queue.cancel(job_id) else "not queued")
+    elif args.job_id:
+        job = job_queue.status(args.job_id)
+        if job is None:
+            sys.exit(f"unknown job {args.job_id}")
+        print(json.dumps({k: v for k, v in job.items() if k != "description"}, indent=2, default=str))
+        if args.events:
+            for _, event_time, message in job_queue.events(args.job_id):
+                print(time.strftime("%H:%M:%S", time.localtime(event_time)), message)
+    else:
+        for job in job_queue.jobs(batch=args.batch):
+            print(f"{job['job_id']:<40} {job['status']:<10} {job['progress'] or ''}")
+        print(job_queue.counts(args.batch), "workers:", len(job_queue.live_workers()))
+
+
+if __name__ == "__main__":
+    main()
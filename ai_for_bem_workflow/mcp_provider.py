@@ -8,9 +8,9 @@ import ast
 from eppy import modeleditor
 from eppy.modeleditor import IDF
 from api_clients import *
-from config import EPLUS_IDD
+from config import set_idd
+from design_days import add_design_days
 
-IDF.setiddname(EPLUS_IDD)
 
 class HVACTemplateMCP:
     """
@@ -21,10 +21,16 @@ class HVACTemplateMCP:
     It returns the errors in json format and saves them to json file for future retrieval
     """
 
-    def __init__(self, idf_path):
+    def __init__(self, idf_path, idf=None, epw_file=None, control_zone=None):
         # self.request_client = GeminiChats("gemini-2.5-flash")
         self.request_client = OpenRouterAPIClient("google/gemini-3.1-flash-lite-preview")
-        self.idf = IDF(idf_path)
+        # an already loaded idf can be passed to avoid re-reading the file
+        set_idd()
+        self.idf = idf if idf is not None else IDF(idf_path)
+        # sizing uses the design days of this weather file, or the weather file days of January and July without it
+        self.epw_file = epw_file
+        # control zone of the unitary systems, a random zone without it
+        self.control_zone = control_zone
         request_template_path = os.path.join("input_files", "hvac_request_schema.json")
         with open(request_template_path, 'r') as file:
             self.request_schema = json.load(file)
@@ -152,6 +158,9 @@ class HVACTemplateMCP:
         self.idf.idfobjects["SIMULATIONCONTROL"][-1].Do_HVAC_Sizing_Simulation_for_Sizing_Periods = "Yes"
 
         # add sizing
+        if self.epw_file is not None:
+            add_design_days(self.idf, self.epw_file)
+            return
         self.idf.newidfobject("SIZINGPERIOD:WEATHERFILEDAYS")
         self.idf.idfobjects["SIZINGPERIOD:WEATHERFILEDAYS"][-1].Name = "heating sizing"
         self.idf.idfobjects["SIZINGPERIOD:WEATHERFILEDAYS"][-1].Begin_Month = 1
@@ -235,7 +244,7 @@ class HVACTemplateMCP:
         self.add_thermostat(thermostat_name)
 
         system_name = "heatpump1"
-        ctrl_zone = random.choice(zone_names)
+        ctrl_zone = self.control_zone or random.choice(zone_names)
         self.idf.newidfobject("HVACTEMPLATE:SYSTEM:UNITARYHEATPUMP:AIRTOAIR")
         self.idf.idfobjects["HVACTEMPLATE:SYSTEM:UNITARYHEATPUMP:AIRTOAIR"][-1].Name = system_name
         self.idf.idfobjects["HVACTEMPLATE:SYSTEM:UNITARYHEATPUMP:AIRTOAIR"][-1].System_Availability_Schedule_Name = "Always On"
@@ -270,7 +279,7 @@ class HVACTemplateMCP:
         self.add_thermostat(thermostat_name)
 
         system_name = "RTU1"
-        ctrl_zone = random.choice(zone_names)
+        ctrl_zone = self.control_zone or random.choice(zone_names)
         self.idf.newidfobject("HVACTEMPLATE:SYSTEM:UNITARY")
         self.idf.idfobjects["HVACTEMPLATE:SYSTEM:UNITARY"][-1].Name = system_name
         self.idf.idfobjects["HVACTEMPLATE:SYSTEM:UNITARY"][-1].System_Availability_Schedule_Name = "Always On"
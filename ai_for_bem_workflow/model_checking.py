@@ -1,10 +1,18 @@
 import os
 import numpy as np
 import pandas as pd
-import datetime as dt
 import warnings
+from eplus_timestamps import parse_datetime_column
 
 J_2_kwh = 1/3600000
+# annual meters reported by get_meters, the gas meter only exists in models with gas equipment
+METER_LABELS = {
+    "Heating:EnergyTransfer": "Heating load",
+    "Cooling:EnergyTransfer": "Cooling load",
+    "Electricity:Facility": "Electricity EUI",
+    "NaturalGas:Facility": "Gas EUI",
+}
+OPTIONAL_METERS = ["NaturalGas:Facility"]
 
 class ModelChecking:
     def __init__(self, summary_table, variables_file, meters_file, eio_file=None):
@@ -101,28 +109,53 @@ class ModelChecking:
                 break
         return total_area
 
-    def parse_timestamp(self, ts_str):
-        return dt.datetime.strptime("2025/{}".format(ts_str.replace("24:", "00:")),"%Y/ %m/%d %H:%M:%S") + pd.Timedelta(days=1 if '24:00' in ts_str else 0)
-
     def generate_datetime_index(self, df):
-        start_ts = self.parse_timestamp(df["Date/Time"][0])
-        sec_ts = self.parse_timestamp(df["Date/Time"][1])
-        trd_ts = self.parse_timestamp(df["Date/Time"][2])
-        end_ts = self.parse_timestamp(df["Date/Time"].iloc[-1])
-        freq = pd.infer_freq([start_ts, sec_ts, trd_ts])
-        df["timestamps"] = pd.date_range(start=start_ts, end=end_ts, freq=freq)
-        df.set_index("timestamps", inplace=True)
+        """
+        indexes df by the parsed Date/Time column, the environment (design days, run period) of each row is kept
+        in an environment column
+        """
+        df.index, df["environment"] = parse_datetime_column(df["Date/Time"].to_numpy())
+        df.index.name = "timestamps"
         return df
 
+    def read_meters(self):
+        """
+        :return: df of the meters, indexed by timestamps, columns as in eplusmtr.csv e.g. "Electricity:Facility [J](Hourly)"
+        """
+        df = self.generate_datetime_index(pd.read_csv(self.meters_file))
+        # the run period is the last environment, sizing periods come first
+        df = df[df["environment"] == df["environment"].max()]
+        return df.drop(columns=["Date/Time", "environment"])
+
     def get_meters(self):
         area = self.get_building_area()
-        df = pd.read_csv(self.meters_file)
-        df = self.generate_datetime_index(df)
-        heat_load = df["Heating:EnergyTransfer [J](Hourly)"].sum() * J_2_kwh / area
-        cool_load = df["Cooling:EnergyTransfer [J](Hourly)"].sum() * J_2_kwh / area
-        elct_eui = df["Electricity:Facility [J](Hourly)"].sum() * J_2_kwh / area
-        # gas_eui = df["NaturalGas:Facility [J](Hourly)"].sum() * J_2_kwh / area
-        return {"Heating load": heat_load, "Cooling load": cool_load, "Electricity EUI": elct_eui}  # ,"Gas EUI": gas_eui
+        df = self.read_meters()
+        meters = {}
+        for meter, label in METER_LABELS.items():
+            column = f"{meter} [J](Hourly)"
+            if meter in OPTIONAL_METERS and column not in df.columns:
+                continue
+            meters[label] = df[column].sum() * J_2_kwh / area
+        return meters
+
+    def get_meter_arrays(self, meter_names):
+        """
+        reads meters as numpy arrays in kWh, meters missing from the file are zeros
+        :param meter_names: e.g. ["Electricity:Facility", "NaturalGas:Facility"]
+        :return: dict of meter name: array, plus "hour_of_year" with the hour (0-8759) each value belongs to
+        """
+        df = self.read_meters()
+        # E+ labels a value with the end of its interval, 01:00 holds the energy of the first hour
+        interval_start = df.index - pd.Timedelta(seconds=1)
+        hour_of_year = (interval_start.dayofyear.values - 1) * 24 + interval_start.hour.values
+        arrays = {"hour_of_year": np.minimum(hour_of_year, 8759)}
+        for name in meter_names:
+            column = [x for x in df.columns if x.startswith(f"{name} [")]
+            if column:
+                arrays[name] = df[column[0]].to_numpy(dtype=float) * J_2_kwh
+            else:
+                arrays[name] = np.zeros(len(df))
+        return arrays
 
     def get_ceiling_height(self):
         ceiling_height = []
@@ -0,0 +1,136 @@
+"""
+model_checking_sql.py
+---------------------
+ModelChecking backend reading eplusout.sql instead of the text outputs.
+
+The tabular reports, the zone table and the report data are queried with SQL, so the values do not depend on line
+positions in eplustbl.csv, the Date/Time strings of eplusmtr.csv or column numbers of eplusout.eio. The model needs
+OUTPUT:SQLITE with SimpleAndTabular (add_output_objects(..., sqlite=True)). The public methods are the ones of
+ModelChecking, model_checking_for picks the backend from the files found in a run folder.
+"""
+
+import os
+import contextlib
+import sqlite3
+import warnings
+import numpy as np
+import pandas as pd
+from model_checking import ModelChecking
+from eplus_timestamps import datetimes_from_parts, DEFAULT_YEAR
+
+SQL_FILE = "eplusout.sql"
+# EnvironmentPeriods.EnvironmentType of the run period with the weather file
+RUN_PERIOD_WEATHER = 3
+
+
+class ModelCheckingSQL(ModelChecking):
+    """
+    sql_file: eplusout.sql of a run
+    """
+
+    def __init__(self, sql_file):
+        super().__init__(sql_file, None, None)
+        self.sql_file = sql_file
+
+    def query(self, sql, params=()):
+        # read only, several processes can query the same run
+        with contextlib.closing(sqlite3.connect(f"file:{self.sql_file}?mode=ro", uri=True)) as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def tabular_value(self, report, table, row, column, report_for="Entire Facility"):
+        df = self.query("SELECT Value FROM TabularDataWithStrings "
+                        "WHERE ReportName = ? AND ReportForString = ? AND TableName = ? AND RowName = ? "
+                        "AND ColumnName = ?", (report, report_for, table, row, column))
+        if df.empty:
+            raise KeyError(f"{report} / {table} / {row} / {column} not found in {self.sql_file}")
+        return float(df["Value"].iloc[0])
+
+    def get_roof_area(self):
+        return self.tabular_value("InputVerificationandResultsSummary", "Skylight-Roof Ratio", "Gross Roof Area",
+                                  "Total")
+
+    def get_WWR_table(self):
+        """
+        same layout as the csv table: first column is the row name with its units, e.g. "Window Opening Area [m2]"
+        """
+        df = self.query("SELECT RowName, ColumnName, Units, Value FROM TabularDataWithStrings "
+                        "WHERE ReportName = 'InputVerificationandResultsSummary' "
+                        "AND ReportForString = 'Entire Facility' AND TableName = 'Window-Wall Ratio'")
+        df["row"] = df["RowName"] + " [" + df["Units"] + "]"
+        df["Value"] = pd.to_numeric(df["Value"].str.strip(), errors="coerce")
+        table = df.pivot_table(index="row", columns="ColumnName", values="Value", aggfunc="first", sort=False)
+        return table.reset_index()
+
+    def get_building_area(self):
+        return self.tabular_value("AnnualBuildingUtilityPerformanceSummary", "Building Area", "Total Building Area",
+                                  "Area")
+
+    def get_ceiling_height(self):
+        ceiling_height = self.query("SELECT CeilingHeight FROM Zones")["CeilingHeight"].to_numpy()
+        if len(np.unique(ceiling_height)) > 1:
+            warnings.warn("Different ceiling heights found!!", UserWarning)
+            print(ceiling_height)
+        return float(ceiling_height[0])
+
+    def read_meters(self, frequency="Hourly"):
+        """
+        meters of the run period, same columns and timestamps as ModelChecking.read_meters
+        """
+        df = self.query(
+            "SELECT t.Month, t.Day, t.Hour, t.Minute, d.Name, d.Units, d.ReportingFrequency, r.Value "
+            "FROM ReportData r "
+            "JOIN ReportDataDictionary d ON r.ReportDataDictionaryIndex = d.ReportDataDictionaryIndex "
+            "JOIN Time t ON r.TimeIndex = t.TimeIndex "
+            "JOIN EnvironmentPeriods e ON t.EnvironmentPeriodIndex = e.EnvironmentPeriodIndex "
+            "WHERE d.IsMeter = 1 AND d.ReportingFrequency = ? AND e.EnvironmentType = ? "
+            "AND (t.WarmupFlag IS NULL OR t.WarmupFlag = 0)", (frequency, RUN_PERIOD_WEATHER))
+        df["column"] = df["Name"] + " [" + df["Units"] + "](" + df["ReportingFrequency"] + ")"
+        # Hour is 1-24 with Minute 0 at the end of an hour, otherwise Hour - 1 and the end Minute of the timestep
+        minutes = np.where(df["Minute"] == 0, df["Hour"] * 60, (df["Hour"] - 1) * 60 + df["Minute"])
+        df["timestamps"] = datetimes_from_parts(DEFAULT_YEAR, df["Month"], df["Day"], minutes)
+        meters = df.pivot_table(index="timestamps", columns="column", values="Value", aggfunc="sum")
+        meters.columns.name = None
+        return meters.sort_index()
+
+
+def model_checking_for(output_dir):
+    """
+    :param output_dir: EnergyPlus output folder
+    :return: ModelCheckingSQL if the run wrote eplusout.sql, otherwise the csv based ModelChecking
+    """
+    sql_file = os.path.join(output_dir, SQL_FILE)
+    if os.path.exists(sql_file):
+        return ModelCheckingSQL(sql_file)
+    return ModelChecking(os.path.join(output_dir, "eplustbl.csv"),
+                         os.path.join(output_dir, "eplusout.csv"),
+                         os.path.join(output_dir, "eplusmtr.csv"),
+                         os.path.join(output_dir, "eplusout.eio"))
+
+
+def query_runs(run_dirs, sql, params=()):
+    """
+    runs the same query on many runs
+    :param run_dirs: dict of run name: output folder with eplusout.sql
+    :return: df of all results with a run column
+    """
+    frames = []
+    for run, output_dir in run_dirs.items():
+        df = ModelCheckingSQL(os.path.join(output_dir, SQL_FILE)).query(sql, params)
+        df.insert(0, "run", run)
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def main():
+    runs = {x: os.path.join("results", x) for x in os.listdir("results")
+            if os.path.exists(os.path.join("results", x, SQL_FILE))}
+    df = query_runs(runs, "SELECT Value FROM TabularDataWithStrings WHERE ReportName = "
+                          "'AnnualBuildingUtilityPerformanceSummary' AND TableName = 'Building Area' "
+                          "AND RowName = 'Total Building Area' AND ColumnName = 'Area'")
+    print(df)
+    for run, output_dir in runs.items():
+        print(run, model_checking_for(output_dir).get_meters())
+
+
+if __name__ == "__main__":
+    main()
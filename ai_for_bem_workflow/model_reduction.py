@@ -0,0 +1,211 @@
+"""
+model_reduction.py
+------------------
+Floor multiplier reduction of multi-storey models (rule 8 of the prompt, applied whatever the LLM did).
+
+The zones are grouped into levels by the height of their floors. Consecutive intermediate levels (neither the bottom
+nor the top level) that are identical once moved to the same height are collapsed into the lowest of them:
+    - its zones get the Multiplier of the whole run
+    - the zones of the other levels are removed with their surfaces, windows and the objects naming them
+    - the floors of the level above the run now face the ceilings of the kept level, and the other way around
+
+Two levels are identical when their zones have the same surfaces (type, construction, boundary condition, vertices
+relative to the floor), the same windows and the same zone fields and attached objects, so the thermal response of
+every collapsed level is the one of the kept level. Floor areas, wall areas and window areas of the tabular reports
+include the multipliers, the spec check against get_groundtruth is unchanged.
+
+    reduction = FloorMultiplierReduction(idf)
+    collapsed = reduction.reduce()       # {kept level z: number of levels it stands for}
+    idf.save()
+"""
+
+from collections import Counter
+
+from config import set_idd
+
+SURFACES = "BUILDINGSURFACE:DETAILED"
+WINDOWS = "FENESTRATIONSURFACE:DETAILED"
+# rounding of the coordinates [m] when levels are compared
+PRECISION = 3
+
+
+def _round(values):
+    return tuple(round(float(x), PRECISION) for x in values)
+
+
+class FloorMultiplierReduction:
+    """
+    idf: eppy IDF, edited in place
+    """
+
+    def __init__(self, idf):
+        self.idf = idf
+        relative = [x.Coordinate_System.lower() for x in idf.idfobjects["GLOBALGEOMETRYRULES"]]
+        self.relative = not relative or relative[0] != "world"
+        self.zones = {zone.Name.upper(): zone for zone in idf.idfobjects["ZONE"]}
+        self.surfaces = {s.Name.upper(): s for s in idf.idfobjects[SURFACES]}
+        self.windows = {}
+        for window in idf.idfobjects[WINDOWS]:
+            self.windows.setdefault(window.Building_Surface_Name.upper(), []).append(window)
+        self.zone_surfaces = {name: [] for name in self.zones}
+        for surface in self.surfaces.values():
+            self.zone_surfaces.setdefault(surface.Zone_Name.upper(), []).append(surface)
+        self.levels = self._levels()
+        self.level_of = {zone: i for i, (_, zones) in enumerate(self.levels) for zone in zones}
+
+    def _z_origin(self, zone_name):
+        zone = self.zones.get(zone_name)
+        return float(zone.Z_Origin or 0) if self.relative and zone is not None else 0.0
+
+    def _levels(self):
+        """
+        :return: list of (floor z, zone names) from the lowest level up
+        """
+        levels = {}
+        for name, surfaces in self.zone_surfaces.items():
+            if name not in self.zones or not surfaces:
+                continue
+            z = min(float(v[2]) for s in surfaces for v in s.coords) + self._z_origin(name)
+            levels.setdefault(round(z, PRECISION), []).append(name)
+        return sorted(levels.items())
+
+    def attached_objects(self):
+        """
+        :return: dict of zone name: objects other than the geometry that name the zone
+        """
+        attached = {}
+        skip = {"ZONE", "ZONELIST", SURFACES, WINDOWS}
+        for class_name, objects in self.idf.idfobjects.items():
+            if class_name.upper() in skip:
+                continue
+            for obj in objects:
+                for value in obj.obj[1:]:
+                    if isinstance(value, str) and value.upper() in self.zones:
+                        attached.setdefault(value.upper(), []).append(obj)
+                        break
+        return attached
+
+    def _surface_key(self, surface, zone_name, z):
+        """surface moved to the floor height z, linked boundaries as the level offset of the linked zone"""
+        dz = self._z_origin(zone_name) - z
+        vertices = tuple(_round((x, y, float(h) + dz)) for x, y, h in surface.coords)
+        boundary = surface.Outside_Boundary_Condition.lower()
+        linked = surface.Outside_Boundary_Condition_Object.upper()
+        if boundary == "surface":
+            partner = self.surfaces.get(linked)
+            partner_zone = partner.Zone_Name.upper() if partner is not None else ""
+            linked = self.level_of.get(partner_zone, -1) - self.level_of[zone_name]
+        elif boundary == "zone":
+            linked = self.level_of.get(linked, -1) - self.level_of[zone_name]
+        windows = sorted((w.Surface_Type.lower(), w.Construction_Name.upper(), w.Multiplier,
+                          tuple(_round((x, y, float(h) + dz)) for x, y, h in w.coords))
+                         for w in self.windows.get(surface.Name.upper(), []))
+        return (surface.Surface_Type.lower(), surface.Construction_Name.upper(), boundary, linked,
+                surface.Sun_Exposure.lower(), surface.Wind_Exposure.lower(), vertices, tuple(windows))
+
+    def zone_signature(self, zone_name, z, attached):
+        """
+        :return: hashable description of the zone moved to the floor height z
+        """
+        zone = self.zones[zone_name]
+        # every field but the name and the height of the zone
+        fields = tuple(str(x).lower() for i, x in enumerate(zone.obj[2:]) if zone.fieldnames[i + 2] != "Z_Origin")
+        surfaces = tuple(sorted(self._surface_key(s, zone_name, z) for s in self.zone_surfaces[zone_name]))
+        objects = tuple(sorted((obj.key.upper(),) + tuple(str(x).upper() for x in obj.obj[2:] if str(x).upper()
+                                                          != zone_name) for obj in attached.get(zone_name, [])))
+        return fields, surfaces, objects
+
+    def runs(self):
+        """
+        :return: list of runs of identical intermediate levels, as lists of level indices
+        """
+        attached = self.attached_objects()
+        signatures = [Counter(self.zone_signature(name, z, attached) for name in zones) for z, zones in self.levels]
+        runs, current = [], []
+        for i in range(1, len(self.levels) - 1):
+            if current and signatures[i] == signatures[current[0]]:
+                current.append(i)
+                continue
+            if len(current) > 1:
+                runs.append(current)
+            current = [i]
+        if len(current) > 1:
+            runs.append(current)
+        return runs
+
+    def _pairs(self, kept, removed, attached):
+        """
+        :return: dict of removed zone or surface name: matching name in the kept level
+        """
+        z_kept, z_removed = self.levels[kept][0], self.levels[removed][0]
+        by_signature = {}
+        for name in self.levels[kept][1]:
+            by_signature.setdefault(self.zone_signature(name, z_kept, attached), []).append(name)
+        names = {}
+        for name in self.levels[removed][1]:
+            twin = by_signature[self.zone_signature(name, z_removed, attached)].pop()
+            names[name] = twin
+            surfaces = sorted(self.zone_surfaces[name], key=lambda s: self._surface_key(s, name, z_removed))
+            twins = sorted(self.zone_surfaces[twin], key=lambda s: self._surface_key(s, twin, z_kept))
+            names.update({s.Name.upper(): t.Name for s, t in zip(surfaces, twins)})
+        return names
+
+    def reduce(self):
+        """
+        collapses the runs of identical intermediate levels
+        :return: dict of kept level floor z: number of levels it represents
+        """
+        attached = self.attached_objects()
+        collapsed = {}
+        removed_zones, renamed = set(), {}
+        for run in self.runs():
+            kept = run[0]
+            for level in run[1:]:
+                renamed.update(self._pairs(kept, level, attached))
+                removed_zones.update(self.levels[level][1])
+            for name in self.levels[kept][1]:
+                zone = self.zones[name]
+                zone.Multiplier = int(float(zone.Multiplier or 1)) * len(run)
+            collapsed[self.levels[kept][0]] = len(run)
+        if not collapsed:
+            return collapsed
+
+        # the floors above a run face the ceilings of its kept level, the kept ceilings are re-linked with them. The
+        # ceilings of a kept level facing up into their own run are left to the floors above, which may be the kept
+        # level of the next run
+        remaining = [s for s in self.surfaces.values() if s.Zone_Name.upper() not in removed_zones]
+        for surface in remaining:
+            linked = surface.Outside_Boundary_Condition_Object.upper()
+            if surface.Outside_Boundary_Condition.lower() != "surface" or linked not in renamed:
+                continue
+            twin = self.surfaces[renamed[linked].upper()]
+            level = self.level_of.get(surface.Zone_Name.upper())
+            if level is None or level != self.level_of.get(twin.Zone_Name.upper()):
+                surface.Outside_Boundary_Condition_Object = twin.Name
+                twin.Outside_Boundary_Condition_Object = surface.Name
+
+        for name in removed_zones:
+            for surface in self.zone_surfaces[name]:
+                for window in self.windows.get(surface.Name.upper(), []):
+                    self.idf.removeidfobject(window)
+                self.idf.removeidfobject(surface)
+            for obj in attached.get(name, []):
+                self.idf.removeidfobject(obj)
+            self.idf.removeidfobject(self.zones[name])
+        for zone_list in self.idf.idfobjects["ZONELIST"]:
+            zone_list.obj = zone_list.obj[:2] + [x for x in zone_list.obj[2:] if str(x).upper() not in removed_zones]
+        return collapsed
+
+
+def reduce_floors(idf_path):
+    """
+    floor multiplier reduction of an IDF file, saved in place
+    :return: dict of kept level floor z: number of levels it represents
+    """
+    set_idd()
+    from eppy.modeleditor import IDF
+    idf = IDF(idf_path)
+    collapsed = FloorMultiplierReduction(idf).reduce()
+    if collapsed:
+        idf.save()
+    return collapsed
@@ -0,0 +1,147 @@
+"""
+results_store.py
+----------------
+Columnar store of the workflow runs, next to the raw results/vN folders.
+
+Every run is written as Parquet files partitioned by run id (hive layout, run_id=vN), so a whole table is read with
+one pd.read_parquet call and can be filtered on the run id without opening the other runs:
+
+    catalog/    one row per run: model, client type, weather file, trials, success, timings
+    metrics/    run metrics in long format: group (meters, model_props, user_def_props, percent_error), name, value
+    errors/     severe/fatal errors and warnings of the failed trials
+    meters/     hourly meters in long format: timestamp, meter, value [kWh]
+"""
+
+import os
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from model_checking import J_2_kwh
+
+RESULTS_STORE_DIR = os.path.join("results", "store")
+TABLES = ["catalog", "metrics", "errors", "meters"]
+METRIC_GROUPS = ["meters", "model_props", "user_def_props", "percent_error"]
+# fixed column types: a run without metrics or errors writes an empty partition, its columns must not be null
+# typed, as read_parquet takes the schema of the dataset from the first partition
+SCHEMAS = {
+    "metrics": pa.schema([("group", pa.string()), ("name", pa.string()), ("value", pa.float64())]),
+    "errors": pa.schema([("type", pa.string()), ("content", pa.string())]),
+}
+CATALOG_DTYPES = {"model": "string", "client_type": "string", "epw_file": "string", "trials": "Int64",
+                  "success": "bool"}
+
+
+class ResultsStore:
+    """
+    store_dir: root of the Parquet tables
+    """
+
+    def __init__(self, store_dir=RESULTS_STORE_DIR):
+        self.store_dir = store_dir
+        for table in TABLES:
+            os.makedirs(os.path.join(self.store_dir, table), exist_ok=True)
+
+    def _write(self, table, run_id, df):
+        partition = os.path.join(self.store_dir, table, f"run_id={run_id}")
+        os.makedirs(partition, exist_ok=True)
+        df.to_parquet(os.path.join(partition, "part-0.parquet"), index=False, schema=SCHEMAS.get(table))
+
+    def _read(self, table, run_ids=None, columns=None):
+        table_dir = os.path.join(self.store_dir, table)
+        if not any(x.startswith("run_id=") for x in os.listdir(table_dir)):
+            return pd.DataFrame()
+        filters = [("run_id", "in", list(run_ids))] if run_ids is not None else None
+        df = pd.read_parquet(table_dir, columns=columns, filters=filters)
+        df["run_id"] = df["run_id"].astype(str)
+        return df
+
+    # ── writing ───────────────────────────────────────────────────────────────
+
+    def write_run(self, run_id, results_summary, run_info, errors=None, meters_df=None):
+        """
+        :param run_id: name of the run folder, e.g. "v12"
+        :param results_summary: dict with success and the METRIC_GROUPS dicts, as saved in results_summary.json
+        :param run_info: dict with model, client_type, epw_file, trials and timings (dict of name: seconds)
+        :param errors: list of error dicts from ErrorParser
+        :param meters_df: df of hourly meters in J, e.g. ModelChecking.read_meters()
+        """
+        timings = run_info.get("timings") or {}
+        catalog = {
+            "created": datetime.now(),
+            "model": run_info.get("model"),
+            "client_type": run_info.get("client_type"),
+            "epw_file": run_info.get("epw_file"),
+            "trials": run_info.get("trials"),
+            "success": bool(results_summary.get("success")),
+        }
+        catalog.update({f"time_{k}": float(v) for k, v in timings.items()})
+        self._write("catalog", run_id, pd.DataFrame([catalog]).astype(CATALOG_DTYPES))
+
+        metrics = [{"group": group, "name": name, "value": float(value)}
+                   for group in METRIC_GROUPS for name, value in (results_summary.get(group) or {}).items()]
+        self._write("metrics", run_id, pd.DataFrame(metrics, columns=["group", "name", "value"]))
+
+        errors_df = pd.DataFrame([{"type": str(x.get("type")), "content": str(x.get("content"))} for x in errors or []],
+                                 columns=["type", "content"])
+        self._write("errors", run_id, errors_df)
+
+        if meters_df is not None and not meters_df.empty:
+            values = meters_df.to_numpy(dtype=float) * J_2_kwh
+            meters = pd.DataFrame({
+                "timestamp": np.repeat(meters_df.index.to_numpy(), values.shape[1]),
+                # column names without units and frequency, e.g. "Electricity:Facility"
+                "meter": np.tile([x.split(" [")[0] for x in meters_df.columns], values.shape[0]),
+                "value": values.ravel(),
+            })
+            meters["meter"] = meters["meter"].astype("category")
+            self._write("meters", run_id, meters)
+
+    # ── queries ───────────────────────────────────────────────────────────────
+
+    def catalog(self, run_ids=None):
+        return self._read("catalog", run_ids)
+
+    def metrics(self, run_ids=None, wide=True):
+        """
+        :param wide: one row per run and one "group.name" column per metric, otherwise the long format
+        """
+        df = self._read("metrics", run_ids)
+        if not wide or df.empty:
+            return df
+        df["metric"] = df["group"] + "." + df["name"]
+        return df.pivot_table(index="run_id", columns="metric", values="value", aggfunc="first").reset_index()
+
+    def errors(self, run_ids=None):
+        return self._read("errors", run_ids)
+
+    def meters(self, run_ids=None, meter_names=None, wide=False):
+        """
+        :param meter_names: optional list of meters to keep
+        :param wide: one column per meter, indexed by run_id and timestamp
+        """
+        df = self._read("meters", run_ids)
+        if meter_names is not None and not df.empty:
+            df = df[df["meter"].isin(meter_names)]
+        if not wide or df.empty:
+            return df
+        return df.pivot_table(index=["run_id", "timestamp"], columns="meter", values="value", observed=True)
+
+    def runs(self, run_ids=None):
+        """catalog joined with the wide metrics, one row per run"""
+        catalog = self.catalog(run_ids)
+        if catalog.empty:
+            return catalog
+        return catalog.merge(self.metrics(run_ids), on="run_id", how="left")
+
+
+def main():
+    store = ResultsStore()
+    runs = store.runs()
+    print(runs)
+    if not runs.empty:
+        print(runs.groupby("model")[["success", "trials", "time_total"]].mean())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+retrofit_scenarios.py
+---------------------
+Parametric retrofit scenarios on a validated workflow model.
+
+Energy conservation measures (ECMs) are declared in RETROFIT_MEASURES, each with a set of options. Every
+combination of options (including leaving a measure out) is applied to a copy of the base IDF, identical IDFs are
+de-duplicated, and the remaining scenarios are simulated in parallel through SimulationPool, which also caches
+finished runs on disk.
+"""
+
+import os
+import sys
+import io
+import itertools
+import pandas as pd
+from eppy.modeleditor import IDF
+from config import set_idd
+from mcp_provider import HVACTemplateMCP
+from internal_gains_generator import InternalGainsGenerator
+from simulation_pool import SimulationPool
+from zone_aggregation import ZoneAggregation
+from fidelity import apply_profile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from edit_idf_files import INFILTRATION_RATES
+
+
+BASELINE = "baseline"
+
+RETROFIT_MEASURES = {
+    "insulation": {
+        "description": "exterior insulation added to the outdoor walls and roofs, thermal resistance [m2-K/W]",
+        "options": {"average": 1.76, "good": 3.52},
+    },
+    "windows": {
+        "description": "window replacement with a simple glazing system, U-factor [W/m2-K] and SHGC",
+        "options": {"double_low_e": {"U_factor": 1.8, "SHGC": 0.40},
+                    "triple_low_e": {"U_factor": 1.0, "SHGC": 0.30}},
+    },
+    "infiltration": {
+        "description": "air sealing, flow rate per exterior surface area [m3/s-m2]",
+        "options": {"average": INFILTRATION_RATES["average"], "good": INFILTRATION_RATES["good"]},
+    },
+    "hvac": {
+        "description": "HVAC swap through the HVACTemplateMCP templates",
+        "options": {"heat_pump": "Heat_pump_air2air"},
+    },
+    "lighting": {
+        "description": "LED lighting, lighting power density [W/m2]",
+        "options": {"LED": 5.0},
+    },
+}
+
+
+class RetrofitScenarioEngine:
+    """
+    base_idf: validated workflow model, with internal gains, HVAC templates and output meters
+    epw_file: weather file of the simulations
+    measures: dict in the format of RETROFIT_MEASURES, defaults to all measures
+    aggregate_zones: screening mode, zones with the same orientation, exposure and use are merged before the
+        measures are applied (zone_aggregation.py)
+    fidelity: fidelity profile of the scenario runs (fidelity.py), None to keep the settings of the base model
+    """
+
+    def __init__(self, base_idf, epw_file, measures=None, runs_dir="retrofit_runs", max_workers=None,
+                 aggregate_zones=False, fidelity="screening"):
+        self.base_idf = base_idf
+        self.epw_file = epw_file
+        self.measures = measures if measures is not None else RETROFIT_MEASURES
+        self.pool = SimulationPool(runs_dir, max_workers)
+        set_idd()
+        with open(base_idf, "r", encoding="utf-8") as f:
+            self.base_text = f.read()
+        if aggregate_zones or fidelity is not None:
+            idf = IDF(io.StringIO(self.base_text))
+            if aggregate_zones:
+                ZoneAggregation(idf).aggregate()
+            if fidelity is not None:
+                apply_profile(idf, fidelity)
+            self.base_text = idf.idfstr()
+
+    # ── measures ──────────────────────────────────────────────────────────────
+
+    def apply_insulation(self, idf, r_value):
+        material_name = f"retrofit insulation R{r_value}"
+        idf.newidfobject("MATERIAL:NOMASS", Name=material_name, Roughness="MediumRough",
+                         Thermal_Resistance=r_value)
+        retrofitted = {}
+        for surface in idf.idfobjects["BUILDINGSURFACE:DETAILED"]:
+            if surface.Outside_Boundary_Condition != "Outdoors" or surface.Surface_Type not in ["Wall", "Roof"]:
+                continue
+            name = surface.Construction_Name
+            if name not in retrofitted:
+                construction = [x for x in idf.idfobjects["CONSTRUCTION"] if x.Name == name]
+                if not construction:
+                    continue
+                layer_fields = [x for x in construction[0].fieldnames if "Layer" in x]
+                layers = [getattr(construction[0], x) for x in layer_fields if getattr(construction[0], x)]
+                if len(layers) >= len(layer_fields):
+                    continue
+                # insulation is added on the outside, as in an exterior insulation retrofit
+                new_layers = dict(zip(layer_fields, [material_name] + layers))
+                idf.newidfobject("CONSTRUCTION", Name=f"{name} retrofit", **new_layers)
+                retrofitted[name] = f"{name} retrofit"
+            surface.Construction_Name = retrofitted[name]
+
+    def apply_windows(self, idf, glazing):
+        idf.newidfobject("WINDOWMATERIAL:SIMPLEGLAZINGSYSTEM", Name="retrofit glazing",
+                         UFactor=glazing["U_factor"], Solar_Heat_Gain_Coefficient=glazing["SHGC"])
+        idf.newidfobject("CONSTRUCTION", Name="retrofit window", Outside_Layer="retrofit glazing")
+        for window in idf.idfobjects["FENESTRATIONSURFACE:DETAILED"]:
+            if window.Surface_Type in ["Window", "GlassDoor"]:
+                window.Construction_Name = "retrofit window"
+        for window in idf.idfobjects["WINDOW"]:
+            window.Construction_Name = "retrofit window"
+
+    def apply_infiltration(self, idf, flow_rate):
+        for infiltration in idf.idfobjects["ZONEINFILTRATION:DESIGNFLOWRATE"]:
+            infiltration.Design_Flow_Rate_Calculation_Method = "Flow/ExteriorArea"
+            infiltration.Design_Flow_Rate = ""
+            infiltration.Flow_Rate_per_Floor_Area = ""
+            infiltration.Flow_Rate_per_Exterior_Surface_Area = flow_rate
+            infiltration.Air_Changes_per_Hour = ""
+
+    def apply_hvac(self, idf, template_id):
+        # remove the existing templates and the sizing periods the templates come with
+        for key in list(idf.idfobjects.keys()):
+            if key.startswith("HVACTEMPLATE:") or key == "SIZINGPERIOD:WEATHERFILEDAYS":
+                while len(idf.idfobjects[key]) > 0:
+                    idf.idfobjects[key].pop(-1)
+        # a fixed control zone, so the same scenario always gives the same idf and hits the SimulationPool cache
+        control_zone = min((x.Name for x in idf.idfobjects["ZONE"]), key=str.upper, default=None)
+        mcp = HVACTemplateMCP(self.base_idf, idf=idf, epw_file=self.epw_file, control_zone=control_zone)
+        mcp.generate_eplus_objects(mcp.get_hvac_template({"template_id": template_id}))
+
+    def apply_lighting(self, idf, lighting_density):
+        while len(idf.idfobjects["LIGHTS"]) > 0:
+            idf.idfobjects["LIGHTS"].pop(-1)
+        gains_gen = InternalGainsGenerator(self.base_idf, idf=idf)
+        gains_gen.build_lights_obj({"lights_density": {"calculation_method": "Watts/Area", "value": lighting_density}})
+
+    # ── scenarios ─────────────────────────────────────────────────────────────
+
+    def expand_scenarios(self):
+        """
+        :return: list of dicts measure: option, one for each combination, the first one is the baseline
+        """
+        names = list(self.measures.keys())
+        options = [[BASELINE] + list(self.measures[x]["options"].keys()) for x in names]
+        return [dict(zip(names, combination)) for combination in itertools.product(*options)]
+
+    @staticmethod
+    def scenario_name(scenario):
+        upgrades = [f"{k}={v}" for k, v in scenario.items() if v != BASELINE]
+        return "|".join(upgrades) if upgrades else BASELINE
+
+    def build_scenario_idf(self, scenario):
+        idf = IDF(io.StringIO(self.base_text))
+        for measure, option in scenario.items():
+            if option != BASELINE:
+                getattr(self, f"apply_{measure}")(idf, self.measures[measure]["options"][option])
+        return idf.idfstr()
+
+    def evaluate(self, scenarios=None):
+        """
+        builds, de-duplicates and simulates the scenarios
+        :param scenarios: list of dicts measure: option, defaults to all combinations
+        :return: df with one row per scenario, its options, meters and run info
+        """
+        scenarios = scenarios if scenarios is not None else self.expand_scenarios()
+        idf_texts = {self.scenario_name(x): self.build_scenario_idf(x) for x in scenarios}
+        results = self.pool.run(idf_texts, self.epw_file)
+
+        rows = []
+        first_of_key = {}
+        for scenario in scenarios:
+            name = self.scenario_name(scenario)
+            result = results[name]
+            first_of_key.setdefault(result["run_key"], name)
+            row = {"scenario": name, **scenario,
+                   "success": result["success"],
+                   "run_key": result["run_key"],
+                   "duplicate_of": None if first_of_key[result["run_key"]] == name else first_of_key[result["run_key"]],
+                   "cached": result["cached"],
+                   "elapsed": result["elapsed"]}
+            row.update(result["meters"] or {})
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+
+def main():
+    base_idf = os.path.join("results", "v1", "llm_gen_model_1.idf")
+    epw_file = os.path.join("input_files", "Ottawa_CWEC_2020.epw")
+    engine = RetrofitScenarioEngine(base_idf, epw_file)
+    df = engine.evaluate()
+    df.to_csv("retrofit_scenarios.csv", index=False)
+    print(df)
+
+
+if __name__ == "__main__":
+    main()
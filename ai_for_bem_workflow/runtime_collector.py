@@ -0,0 +1,151 @@
+"""
+runtime_collector.py
+--------------------
+In-process metering through the pyenergyplus data exchange API.
+
+The collector is attached to an EnergyPlus state before the run. Once the API data is ready it resolves one handle
+per output variable key and per meter, then reads them at the end of every zone timestep of the run period into
+preallocated NumPy buffers. The values are available as soon as run_energyplus returns, so eplusout.csv and
+eplusmtr.csv do not have to be written and parsed again (see add_output_objects(..., csv_output=False)).
+
+Variables must still be declared with OUTPUT:VARIABLE (add_output_objects does it) so EnergyPlus sets them up,
+unless their keys are given explicitly in variable_keys.
+"""
+
+import numpy as np
+import pandas as pd
+from model_checking import METER_LABELS, J_2_kwh
+from eplus_timestamps import datetimes_from_parts
+
+# kind_of_sim of the run period with the weather file; design days (1, 2) and sizing runs are not recorded
+RUN_PERIOD_WEATHER = 3
+
+
+class EnergyPlusDataCollector:
+    """
+    var_names: output variable names, recorded for every key, e.g. "Zone Mean Air Temperature"
+    meter_names: meter names, e.g. "Electricity:Facility"
+    variable_keys: optional list of (variable name, key) pairs requested from the API before the run
+    year: year of the timestamps
+    """
+
+    def __init__(self, var_names, meter_names, variable_keys=None, year=2025):
+        self.var_names = list(var_names)
+        self.meter_names = list(meter_names)
+        self.variable_keys = variable_keys or []
+        self.year = year
+        self.api = None
+        self.handles_ready = False
+        self.columns = []
+        self.handles = []
+        self.is_meter = None
+        self.values = None
+        self.time = None
+        self.n_steps = 0
+
+    def attach(self, api, state):
+        """registers the requests and the callback on a new state, call before run_energyplus"""
+        self.api = api
+        self.handles_ready = False
+        self.n_steps = 0
+        for name, key in self.variable_keys:
+            api.exchange.request_variable(state, name, key)
+        api.runtime.callback_end_zone_timestep_after_zone_reporting(state, self.callback)
+
+    def resolve_handles(self, state):
+        exchange = self.api.exchange
+        var_names = {x.upper(): x for x in self.var_names}
+        variables = [(var_names[x.name.upper()], x.key) for x in exchange.get_api_data(state)
+                     if x.what == "OutputVariable" and x.name.upper() in var_names]
+        self.columns, self.handles, is_meter = [], [], []
+        for name, key in variables:
+            handle = exchange.get_variable_handle(state, name, key)
+            if handle >= 0:
+                self.columns.append(f"{key}:{name}")
+                self.handles.append(handle)
+                is_meter.append(False)
+        for name in self.meter_names:
+            handle = exchange.get_meter_handle(state, name)
+            if handle >= 0:
+                self.columns.append(name)
+                self.handles.append(handle)
+                is_meter.append(True)
+            else:
+                print(f"Warning, meter {name} not found in the model")
+        self.is_meter = np.array(is_meter, dtype=bool)
+
+        # one year of timesteps, buffers only grow for longer run periods
+        capacity = 366 * 24 * exchange.num_time_steps_in_hour(state)
+        self.values = np.zeros((capacity, len(self.handles)))
+        # month, day, hour (0-23) at the start of the step, minutes at the end of the step
+        self.time = np.zeros((capacity, 4), dtype=np.int16)
+        self.handles_ready = True
+
+    def grow(self):
+        self.values = np.concatenate([self.values, np.zeros_like(self.values)])
+        self.time = np.concatenate([self.time, np.zeros_like(self.time)])
+
+    def callback(self, state):
+        exchange = self.api.exchange
+        if not self.handles_ready:
+            if not exchange.api_data_fully_ready(state):
+                return
+            self.resolve_handles(state)
+        if exchange.warmup_flag(state) or exchange.kind_of_sim(state) != RUN_PERIOD_WEATHER:
+            return
+        if self.n_steps == len(self.values):
+            self.grow()
+        row = self.values[self.n_steps]
+        for i, (handle, meter) in enumerate(zip(self.handles, self.is_meter)):
+            row[i] = exchange.get_meter_value(state, handle) if meter else exchange.get_variable_value(state, handle)
+        self.time[self.n_steps] = (exchange.month(state), exchange.day_of_month(state), exchange.hour(state),
+                                   exchange.minutes(state))
+        self.n_steps += 1
+
+    # ── results ───────────────────────────────────────────────────────────────
+
+    def timestamps(self):
+        """end of each timestep, like the Date/Time column of eplusout.csv (24:00 is midnight of the next day)"""
+        time = self.time[:self.n_steps].astype(int)
+        return pd.DatetimeIndex(datetimes_from_parts(self.year, time[:, 0], time[:, 1], time[:, 2] * 60 + time[:, 3]))
+
+    def get_results(self):
+        """
+        :return: df indexed by timestamps, meters in J per timestep, variables as reported at each timestep
+        """
+        if self.values is None:
+            return pd.DataFrame()
+        df = pd.DataFrame(self.values[:self.n_steps], columns=self.columns, index=self.timestamps())
+        df.index.name = "timestamps"
+        return df
+
+    def get_hourly_results(self):
+        """meters summed and variables averaged over each hour"""
+        df = self.get_results()
+        meters = [x for x, meter in zip(self.columns, self.is_meter) if meter]
+        variables = [x for x, meter in zip(self.columns, self.is_meter) if not meter]
+        # timesteps are labelled by their end, the hour ending at 01:00 is the first one
+        hourly = df.resample("h", label="right", closed="right")
+        return pd.concat([hourly[meters].sum(), hourly[variables].mean()], axis=1)[self.columns]
+
+    def get_meter_arrays(self, meter_names):
+        """
+        same output as ModelChecking.get_meter_arrays, from the hourly meters
+        :return: dict of meter name: kWh array, and "hour_of_year"
+        """
+        df = self.get_hourly_results()
+        arrays = {name: df[name].to_numpy() * J_2_kwh if name in df.columns else np.zeros(len(df))
+                  for name in meter_names}
+        start = pd.Timestamp(year=self.year, month=1, day=1)
+        hours = ((df.index - pd.Timedelta(seconds=1) - start) // pd.Timedelta(hours=1)).to_numpy()
+        arrays["hour_of_year"] = np.minimum(hours, 8759)
+        return arrays
+
+    def get_meters(self, area):
+        """
+        same output as ModelChecking.get_meters
+        :param area: total building area [m2], e.g. ModelChecking.get_building_area()
+        :return: dict of annual meters [kWh/m2]
+        """
+        totals = dict(zip(self.columns, self.values[:self.n_steps].sum(axis=0)))
+        return {label: totals[meter] * J_2_kwh / area for meter, label in METER_LABELS.items() if meter in totals}
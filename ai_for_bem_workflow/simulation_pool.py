@@ -0,0 +1,122 @@
+import os
+import json
+import hashlib
+from time import time
+from concurrent.futures import ProcessPoolExecutor
+from config import energyplus_api
+from error_parser import ErrorParser
+from model_checking_sql import model_checking_for
+
+
+def run_simulation(idf_path, epw_file, output_dir):
+    """
+    runs one EnergyPlus simulation in its own output directory
+    :return: success, elapsed time [s]
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    api = energyplus_api()
+    state = api.state_manager.new_state()
+    api.runtime.set_console_output_status(state, False)
+    start = time()
+    # -x short form to run expandobjects for HVACtemplates
+    result = api.runtime.run_energyplus(state, ['-w', epw_file, '-d', output_dir, '-x', idf_path])
+    api.state_manager.delete_state(state)
+    return result == 0, time() - start
+
+
+def simulate_and_evaluate(idf_path, epw_file, output_dir):
+    """
+    worker entry point: simulates the model then reads its meters, or its errors if the run failed
+    :return: dict of results, json serializable
+    """
+    success, elapsed = run_simulation(idf_path, epw_file, output_dir)
+    result = {"success": success, "elapsed": elapsed, "output_dir": output_dir, "meters": None, "errors": []}
+    if success:
+        try:
+            my_check = model_checking_for(output_dir)
+            result["meters"] = my_check.get_meters()
+        except Exception as exc:
+            result["errors"] = [{"type": "Reading", "content": str(exc)}]
+    elif os.path.exists(os.path.join(output_dir, "eplusout.err")):
+        error_parser = ErrorParser()
+        error_parser.parse(output_dir, "eplusout.err")
+        result["errors"] = error_parser.get_severe_fatal()
+    return result
+
+
+class SimulationPool:
+    """
+    Runs many models through EnergyPlus in parallel processes.
+    Every run directory is named after the hash of the idf content and of the weather file, so identical
+    models are simulated once and finished runs are read back from result.json instead of re-simulated.
+    """
+
+    def __init__(self, runs_dir="simulation_runs", max_workers=None):
+        self.runs_dir = runs_dir
+        self.max_workers = max_workers
+        os.makedirs(self.runs_dir, exist_ok=True)
+        self._epw_hashes = {}
+
+    def file_hash(self, file_path):
+        if file_path not in self._epw_hashes:
+            with open(file_path, "rb") as f:
+                self._epw_hashes[file_path] = hashlib.sha256(f.read()).hexdigest()
+        return self._epw_hashes[file_path]
+
+    def run_key(self, idf_text, epw_file):
+        sha = hashlib.sha256(idf_text.encode("utf-8"))
+        sha.update(self.file_hash(epw_file).encode("utf-8"))
+        return sha.hexdigest()[:16]
+
+    def cached_result(self, key):
+        result_file = os.path.join(self.runs_dir, key, "result.json")
+        if os.path.exists(result_file):
+            with open(result_file, "r") as f:
+                return json.load(f)
+        return None
+
+    def run(self, idf_texts, epw_file):
+        """
+        :param idf_texts: dict of name: idf content
+        :param epw_file: weather file, shared by all models
+        :return: dict of name: result, with run_key and cached flags added
+        """
+        return self.run_jobs({name: (text, epw_file) for name, text in idf_texts.items()})
+
+    def run_jobs(self, jobs):
+        """
+        :param jobs: dict of name: (idf content, weather file)
+        :return: dict of name: result, with run_key and cached flags added
+        """
+        keys = {name: self.run_key(text, epw_file) for name, (text, epw_file) in jobs.items()}
+        results = {}
+        pending = {}
+        for name, key in keys.items():
+            cached = self.cached_result(key)
+            if cached is not None:
+                results[key] = dict(cached, cached=True)
+            elif key not in pending:
+                run_dir = os.path.abspath(os.path.join(self.runs_dir, key))
+                os.makedirs(run_dir, exist_ok=True)
+                idf_path = os.path.join(run_dir, "model.idf")
+                idf_text, epw_file = jobs[name]
+                with open(idf_path, "w", encoding="utf-8") as f:
+                    f.write(idf_text)
+                pending[key] = (idf_path, os.path.abspath(epw_file), run_dir)
+
+        if pending:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {key: executor.submit(simulate_and_evaluate, idf_path, epw_file, run_dir)
+                           for key, (idf_path, epw_file, run_dir) in pending.items()}
+                for key, future in futures.items():
+                    try:
+                        result = future.result()
+                    except Exception as exc:
+                        result = {"success": False, "elapsed": None, "output_dir": pending[key][2], "meters": None,
+                                  "errors": [{"type": "Worker", "content": str(exc)}]}
+                    if result["success"]:
+                        with open(os.path.join(self.runs_dir, key, "result.json"), "w") as f:
+                            json.dump(result, f, indent=4)
+                    results[key] = dict(result, cached=False)
+
+        return {name: dict(results[key], run_key=key) for name, key in keys.items()}
@@ -0,0 +1,93 @@
+"""
+simulation_progress.py
+----------------------
+Live progress of an EnergyPlus run, read from the pyenergyplus progress and message callbacks and forwarded to the
+log callback of the workflow (GUI log, job_queue events, print).
+
+EnergyPlus calls the progress callback with the percent done of the current environment and the message callback
+with every line of its console output, "Warming up {3}", "Starting Simulation at 01/01/2025 for RUN PERIOD 1", ...
+These come many times a second, so the state is only kept up to date in the callbacks and a line is logged at most
+every min_interval seconds, when it changed:
+
+    Bot: simulation 37% | RUN PERIOD 1
+    Bot: simulation 0% | WINTER DESIGN DAY, warmup day 4
+
+    progress = SimulationProgress(log)
+    ghge_modeller.run_energyplus(idf_path, epw_file, progress=progress)    # calls progress.emit(force=True) at the end
+"""
+
+import re
+from time import monotonic
+
+# seconds between two logged lines of one simulation
+MIN_INTERVAL = 2.0
+ENVIRONMENT = re.compile(r"(?:Starting|Continuing) Simulation at .* for (.+)$")
+SIZING = re.compile(r"Performing (Zone|System|Plant) Sizing Simulation")
+WARMUP = re.compile(r"Warming up(?: \{\s*(\d+)\s*\})?")
+
+
+class SimulationProgress:
+    """
+    log: callback taking one message, as in workflow_pipeline.run_workflow
+    min_interval: minimum time [s] between two logged lines
+    """
+
+    def __init__(self, log, min_interval=MIN_INTERVAL):
+        self.log = log
+        self.min_interval = min_interval
+        self.percent = 0
+        self.environment = None
+        self.warmup_day = 0
+        self._last_line = None
+        self._last_time = None
+
+    def attach(self, api, state):
+        """registers the callbacks on a new state, call before run_energyplus"""
+        self.percent, self.environment, self.warmup_day = 0, None, 0
+        self._last_line, self._last_time = None, None
+        api.runtime.callback_progress(state, self.on_progress)
+        api.runtime.callback_message(state, self.on_message)
+
+    def on_progress(self, percent):
+        self.percent = int(percent)
+        self.emit()
+
+    def on_message(self, message):
+        if isinstance(message, bytes):
+            message = message.decode("utf-8", errors="replace")
+        message = message.strip()
+        environment = ENVIRONMENT.search(message)
+        sizing = SIZING.search(message)
+        warmup = WARMUP.search(message)
+        if environment is not None:
+            self.environment, self.warmup_day = environment.group(1).strip(), 0
+        elif sizing is not None:
+            self.environment, self.warmup_day = f"{sizing.group(1)} sizing", 0
+        elif warmup is not None:
+            self.warmup_day = int(warmup.group(1)) if warmup.group(1) else self.warmup_day + 1
+        else:
+            return
+        self.emit()
+
+    def line(self):
+        line = f"Bot: simulation {self.percent}%"
+        if self.environment:
+            line += f" | {self.environment}"
+        if self.warmup_day:
+            line += f", warmup day {self.warmup_day}"
+        return line
+
+    def emit(self, force=False):
+        """logs the current state if it changed and min_interval passed since the last line"""
+        line = self.line()
+        now = monotonic()
+        if line == self._last_line:
+            return
+        if not force and self._last_time is not None and now - self._last_time < self.min_interval:
+            return
+        self._last_line, self._last_time = line, now
+        try:
+            self.log(line)
+        except Exception:
+            # a closed GUI or queue does not stop the simulation
+            pass
@@ -0,0 +1,228 @@
+"""
+surrogate_model.py
+------------------
+Fast surrogate of the EnergyPlus annual run, trained on the accumulated workflow results.
+
+The training set is built from every successful results/vN folder: the meters of the run (ModelChecking.get_meters)
+are the targets, and the envelope, internal gains and HVAC parameters of its final IDF are the features. A gradient
+boosting (quantile) or Gaussian process regressor predicts the heating/cooling loads and the electricity EUI with an
+uncertainty, so large retrofit spaces can be pre-screened and only the most promising or the most uncertain
+scenarios are simulated.
+"""
+
+import os
+import io
+import re
+import sys
+import json
+import pickle
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import ConstantKernel, RBF, WhiteKernel
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from config import EPLUS_IDD
+from model_checking import ModelChecking
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "analysis_doe_model"))
+from reading_Rvalues import Building
+from envelope_performance import EnvelopePerformance
+
+TARGETS = ["Heating load", "Cooling load", "Electricity EUI"]
+HVAC_TEMPLATES = {
+    "hvac_packaged_vav": "HVACTEMPLATE:SYSTEM:PACKAGEDVAV",
+    "hvac_heat_pump": "HVACTEMPLATE:SYSTEM:UNITARYHEATPUMP:AIRTOAIR",
+    "hvac_unitary": "HVACTEMPLATE:SYSTEM:UNITARY",
+}
+# z-score of the 10% and 90% quantiles
+QUANTILE_Z = 1.2816
+
+
+def _mean_field(objects, method_field, method, value_field):
+    values = [float(getattr(x, value_field)) for x in objects
+              if getattr(x, method_field) == method and getattr(x, value_field) != ""]
+    return np.mean(values) if values else 0.0
+
+
+def extract_idf_features(idf_source):
+    """
+    :param idf_source: idf path, or io.StringIO with the idf content
+    :return: dict of numerical features
+    """
+    building = Building(EPLUS_IDD, idf_source)
+    idf = building.idf
+    envelope, _ = EnvelopePerformance(building).calc()
+    features = {
+        "UA_total": envelope["UA_total"],
+        "envelope_area": envelope["envelope_area"],
+        "window_area": envelope["window_area"],
+        "window_UA_fraction": envelope["window_UA_fraction"],
+        "wall_U": envelope["Wall_U_effective"],
+        "roof_U": envelope["Roof_U_effective"],
+        "window_U": envelope["Window_U_effective"],
+        "infiltration": _mean_field(idf.idfobjects["ZONEINFILTRATION:DESIGNFLOWRATE"],
+                                    "Design_Flow_Rate_Calculation_Method", "Flow/ExteriorArea",
+                                    "Flow_Rate_per_Exterior_Surface_Area"),
+        "lighting_density": _mean_field(idf.idfobjects["LIGHTS"], "Design_Level_Calculation_Method",
+                                        "Watts/Area", "Watts_per_Floor_Area"),
+        "equipment_density": _mean_field(idf.idfobjects["ELECTRICEQUIPMENT"], "Design_Level_Calculation_Method",
+                                         "Watts/Area", "Watts_per_Floor_Area"),
+        "people_density": _mean_field(idf.idfobjects["PEOPLE"], "Number_of_People_Calculation_Method",
+                                      "People/Area", "People_per_Floor_Area"),
+    }
+    area_per_person = _mean_field(idf.idfobjects["PEOPLE"], "Number_of_People_Calculation_Method",
+                                  "Area/Person", "Floor_Area_per_Person")
+    if area_per_person > 0:
+        features["people_density"] = 1 / area_per_person
+    for feature, template in HVAC_TEMPLATES.items():
+        features[feature] = float(len(idf.idfobjects[template]) > 0)
+    # unknown U-values (e.g. no roof) are set to 0, the matching areas are 0 too
+    return {k: 0.0 if pd.isna(v) else float(v) for k, v in features.items()}
+
+
+def final_model_path(run_dir):
+    """the last generated model of a run, the one gains and HVAC were added to"""
+    models = [x for x in os.listdir(run_dir) if re.fullmatch(r"llm_gen_model_\d+\.idf", x)]
+    if not models:
+        return None
+    return os.path.join(run_dir, max(models, key=lambda x: int(re.findall(r"\d+", x)[0])))
+
+
+def build_training_set(results_dir="results", output_file=None):
+    """
+    :param results_dir: folder with the vN run folders
+    :param output_file: optional .csv to store the training set
+    :return: df with the run name, the features and the targets
+    """
+    rows = []
+    for run in sorted(os.listdir(results_dir)):
+        run_dir = os.path.join(results_dir, run)
+        summary_file = os.path.join(run_dir, "results_summary.json")
+        if not os.path.exists(summary_file):
+            continue
+        with open(summary_file, "r") as f:
+            summary = json.load(f)
+        idf_path = final_model_path(run_dir)
+        if not summary.get("success") or idf_path is None:
+            continue
+        try:
+            my_check = ModelChecking(os.path.join(run_dir, "eplustbl.csv"),
+                                     os.path.join(run_dir, "eplusout.csv"),
+                                     os.path.join(run_dir, "eplusmtr.csv"),
+                                     os.path.join(run_dir, "eplusout.eio"))
+            row = {"run": run}
+            row.update(extract_idf_features(idf_path))
+            row.update(my_check.get_meters())
+            rows.append(row)
+        except Exception as exc:
+            print(f"Warning, run {run} skipped: {exc}")
+    df = pd.DataFrame(rows)
+    if output_file:
+        df.to_csv(output_file, index=False)
+    return df
+
+
+class SurrogateModel:
+    """
+    one regressor per target
+    method: "gbr" for gradient boosting with 10/50/90% quantiles, or "gp" for a Gaussian process
+    """
+
+    def __init__(self, method="gbr", targets=None):
+        if method not in ["gbr", "gp"]:
+            raise ValueError("method must be gbr or gp")
+        self.method = method
+        self.targets = targets if targets is not None else TARGETS
+        self.features = None
+        self.models = {}
+
+    def _new_gbr(self, alpha):
+        return GradientBoostingRegressor(loss="quantile", alpha=alpha, n_estimators=300, max_depth=3,
+                                         learning_rate=0.05, subsample=0.8, random_state=0)
+
+    def fit(self, df, features=None):
+        """
+        :param df: training set from build_training_set
+        :param features: feature columns, defaults to every numerical column that is not a meter
+        """
+        self.features = features if features is not None else [
+            x for x in df.select_dtypes("number").columns if not x.endswith(("EUI", "load"))]
+        X = df[self.features].to_numpy(dtype=float)
+        for target in self.targets:
+            y = df[target].to_numpy(dtype=float)
+            if self.method == "gbr":
+                self.models[target] = {q: self._new_gbr(q).fit(X, y) for q in [0.1, 0.5, 0.9]}
+            else:
+                kernel = ConstantKernel() * RBF(length_scale=np.ones(X.shape[1])) + WhiteKernel()
+                gp = GaussianProcessRegressor(kernel=kernel, normalize_y=True, n_restarts_optimizer=2, random_state=0)
+                self.models[target] = make_pipeline(StandardScaler(), gp).fit(X, y)
+        return self
+
+    def predict(self, df):
+        """
+        :param df: features, one row per candidate
+        :return: df with {target} mean and {target} std columns
+        """
+        X = df[self.features].to_numpy(dtype=float)
+        predictions = {}
+        for target in self.targets:
+            if self.method == "gbr":
+                low, mid, high = [self.models[target][q].predict(X) for q in [0.1, 0.5, 0.9]]
+                predictions[f"{target} mean"] = mid
+                predictions[f"{target} std"] = np.abs(high - low) / (2 * QUANTILE_Z)
+            else:
+                scaler, gp = self.models[target].named_steps.values()
+                mean, std = gp.predict(scaler.transform(X), return_std=True)
+                predictions[f"{target} mean"] = mean
+                predictions[f"{target} std"] = std
+        return pd.DataFrame(predictions, index=df.index)
+
+    def prescreen(self, df, objective, n_best=5, n_uncertain=5):
+        """
+        selects the candidates worth a full simulation
+        :param df: candidate features
+        :param objective: target to minimize, or a function of the predictions df returning a series
+        :return: df of the selected candidates with their predictions and the selection reason
+        """
+        predictions = self.predict(df)
+        if callable(objective):
+            score = objective(predictions)
+            spread = predictions[[f"{x} std" for x in self.targets]].sum(axis=1)
+        else:
+            score = predictions[f"{objective} mean"]
+            spread = predictions[f"{objective} std"]
+        best = score.nsmallest(n_best).index
+        uncertain = spread.drop(best).nlargest(n_uncertain).index
+        selected = pd.concat([df, predictions], axis=1).loc[best.append(uncertain)]
+        selected["reason"] = ["best"] * len(best) + ["uncertain"] * len(uncertain)
+        return selected
+
+    def save(self, file_path):
+        with open(file_path, "wb") as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(file_path):
+        with open(file_path, "rb") as f:
+            return pickle.load(f)
+
+
+def scenario_features(idf_texts):
+    """
+    :param idf_texts: dict of scenario name: idf content, e.g. from RetrofitScenarioEngine
+    :return: df of features indexed by scenario
+    """
+    return pd.DataFrame({name: extract_idf_features(io.StringIO(text)) for name, text in idf_texts.items()}).T
+
+
+def main():
+    df = build_training_set("results", "surrogate_training_set.csv")
+    print(f"training set: {len(df)} runs")
+    surrogate = SurrogateModel("gbr").fit(df)
+    surrogate.save("surrogate_model.pkl")
+    print(surrogate.predict(df).head())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+tracing.py
+----------
+Stage-level tracing of the generation workflow.
+
+Each stage runs inside a span that records its start, duration, thread and attributes (trial number, tokens, bytes
+written, ...). The spans are exported in the Chrome trace event format (complete "X" events, timestamps in
+microseconds), which chrome://tracing, Perfetto and speedscope open directly:
+
+    tracer = Tracer("v12")
+    with tracer.span("llm_call", trial=1) as span:
+        ...
+        span["total_tokens"] = 1500
+    tracer.export_chrome("results/v12/trace.json")
+"""
+
+import os
+import json
+import threading
+from time import time, perf_counter
+from contextlib import contextmanager
+
+TRACE_FILE = "trace.json"
+
+
+class Tracer:
+    """
+    name: process name shown in the trace viewer, e.g. the building or job id
+    """
+
+    def __init__(self, name="workflow"):
+        self.name = name
+        self.events = []
+        self._lock = threading.Lock()
+        # wall clock origin, spans are timed with perf_counter relative to it
+        self._origin_wall = time()
+        self._origin = perf_counter()
+
+    def _now_us(self):
+        return (self._origin_wall + perf_counter() - self._origin) * 1e6
+
+    @contextmanager
+    def span(self, name, category="workflow", **attributes):
+        """
+        times the enclosed block, the yielded dict takes attributes known only at the end (tokens, bytes, ...)
+        the span is recorded even if the block raises, with the error attribute set
+        """
+        args = dict(attributes)
+        start = self._now_us()
+        try:
+            yield args
+        except BaseException as exc:
+            args["error"] = repr(exc)
+            raise
+        finally:
+            event = {"name": name, "cat": category, "ph": "X", "ts": start, "dur": self._now_us() - start,
+                     "pid": os.getpid(), "tid": threading.get_ident(), "args": args}
+            with self._lock:
+                self.events.append(event)
+
+    def instant(self, name, category="workflow", **attributes):
+        with self._lock:
+            self.events.append({"name": name, "cat": category, "ph": "i", "s": "t", "ts": self._now_us(),
+                                "pid": os.getpid(), "tid": threading.get_ident(), "args": attributes})
+
+    def durations(self):
+        """
+        :return: dict of span name: total duration [s]
+        """
+        totals = {}
+        for event in self.events:
+            if event["ph"] == "X":
+                totals[event["name"]] = totals.get(event["name"], 0.0) + event["dur"] / 1e6
+        return totals
+
+    def export_chrome(self, file_path):
+        metadata = [{"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": self.name}}]
+        with self._lock:
+            events = metadata + sorted(self.events, key=lambda x: x["ts"])
+        with open(file_path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+        return file_path
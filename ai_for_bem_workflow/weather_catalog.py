@@ -0,0 +1,151 @@
+"""
+weather_catalog.py
+------------------
+Index of a folder of EPW files by the station of their LOCATION header, to pick the weather file of a building from
+its location instead of browsing for it.
+
+    catalog = WeatherCatalog("input_files")
+    catalog.find("Ottawa")              # station dict of the first station named Ottawa
+    catalog.find("45.4, -75.7")         # nearest station to the coordinates
+    catalog.epw_for("Toronto, ON")      # path of its EPW file, None if nothing matches
+
+The index is saved as weather_catalog.json in the folder. Only the files added or modified since (size, mtime) have
+their header read again, so opening the catalog of a large weather library does not read the EPW files. Stations are
+placed on the unit sphere and queried with a KD-tree, the nearest station by chord is the nearest by great circle.
+"""
+
+import os
+import re
+import json
+import numpy as np
+from scipy.spatial import cKDTree
+
+from epw import read_header
+
+INDEX_FILE = "weather_catalog.json"
+EARTH_RADIUS = 6371.0  # km
+COORDINATES = re.compile(r"^\s*(-?\d+(?:\.\d*)?)\s*[,; ]\s*(-?\d+(?:\.\d*)?)\s*$")
+
+
+def _unit_vectors(latitudes, longitudes):
+    lat, lon = np.radians(latitudes), np.radians(longitudes)
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def _normalize(text):
+    return re.sub(r"[^a-z0-9]+", " ", str(text).lower()).strip()
+
+
+class WeatherCatalog:
+    """
+    weather_dir: folder of the EPW files, searched recursively
+    save_index: the updated index is written to index_file, otherwise it is only read
+    stations: list of dicts with file (path of the EPW), city, state, country, wmo, latitude, longitude, elevation
+    """
+
+    def __init__(self, weather_dir="input_files", index_file=None, save_index=True):
+        self.weather_dir = weather_dir
+        self.save_index = save_index
+        self.index_file = index_file or os.path.join(weather_dir, INDEX_FILE)
+        self.stations = []
+        self._tree = None
+        self.build()
+
+    def _epw_files(self):
+        for folder, _, files in os.walk(self.weather_dir):
+            for filename in sorted(files):
+                if filename.lower().endswith(".epw"):
+                    yield os.path.join(folder, filename)
+
+    def build(self):
+        """
+        updates the index with the EPW files of weather_dir, reading the header of new or modified files only
+        :return: number of headers read
+        """
+        indexed = {}
+        if os.path.exists(self.index_file):
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                indexed = {x["file"]: x for x in json.load(f)}
+        stations, read = [], 0
+        for epw_file in self._epw_files():
+            stat = os.stat(epw_file)
+            station = indexed.get(epw_file)
+            if station is None or station["size"] != stat.st_size or station["mtime"] != stat.st_mtime:
+                location = read_header(epw_file)["location"]
+                read += 1
+                if not isinstance(location.get("latitude"), float) or not isinstance(location.get("longitude"), float):
+                    continue
+                station = {"file": epw_file, "size": stat.st_size, "mtime": stat.st_mtime,
+                           **{k: location.get(k) for k in ["city", "state", "country", "wmo", "latitude",
+                                                           "longitude", "elevation"]}}
+            stations.append(station)
+        self.stations = stations
+        self._tree = cKDTree(_unit_vectors([x["latitude"] for x in stations],
+                                           [x["longitude"] for x in stations])) if stations else None
+        if self.save_index and (read or len(stations) != len(indexed)):
+            with open(self.index_file, "w", encoding="utf-8") as f:
+                json.dump(stations, f, indent=1)
+        return read
+
+    def nearest(self, latitude, longitude, k=1):
+        """
+        :return: list of up to k (station, distance [km]), the nearest first
+        """
+        if self._tree is None:
+            return []
+        k = min(k, len(self.stations))
+        chords, indices = self._tree.query(_unit_vectors([latitude], [longitude])[0], k=k)
+        chords, indices = np.atleast_1d(chords), np.atleast_1d(indices)
+        return [(self.stations[i], float(2 * EARTH_RADIUS * np.arcsin(min(chord / 2, 1.0))))
+                for chord, i in zip(chords, indices)]
+
+    def by_name(self, name):
+        """
+        stations whose city, or file name, contains every word of the first part of name, the other parts
+        ("Ottawa, ON, CAN") have to match the state or country
+        """
+        parts = [_normalize(x) for x in str(name).split(",") if _normalize(x)]
+        if not parts:
+            return []
+        words = parts[0].split()
+        matches = []
+        for station in self.stations:
+            city = _normalize(station["city"]) + " " + _normalize(os.path.basename(station["file"]))
+            region = {_normalize(station["state"]), _normalize(station["country"])}
+            if all(word in city.split() for word in words) and all(part in region for part in parts[1:]):
+                matches.append(station)
+        return matches
+
+    def find(self, location):
+        """
+        :param location: "latitude, longitude", a place name, or a (latitude, longitude) tuple
+        :return: station dict, None if the name matches no station
+        """
+        if isinstance(location, (tuple, list)):
+            latitude, longitude = location
+        else:
+            match = COORDINATES.match(str(location))
+            if match is None:
+                stations = self.by_name(location)
+                return stations[0] if stations else None
+            latitude, longitude = float(match.group(1)), float(match.group(2))
+        nearest = self.nearest(latitude, longitude)
+        return nearest[0][0] if nearest else None
+
+    def epw_for(self, location, default=None):
+        """
+        :return: path of the EPW file of the station found for location, default if none
+        """
+        station = self.find(location)
+        return station["file"] if station is not None else default
+
+
+def main():
+    catalog = WeatherCatalog("input_files")
+    print(f"{len(catalog.stations)} stations")
+    for location in ["Ottawa", "45.4, -75.7", "Toronto, ON"]:
+        print(location, "->", catalog.epw_for(location))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+workflow_pipeline.py
+--------------------
+Headless generation workflow of one building: LLM generation, floor multiplier reduction and executability loop,
+internal gains, outputs and HVAC, simulation and spec compliance loop, then results saving. Used by the job service
+(job_queue.py) and the batch runner.
+
+The executability loop simulates with the "check" fidelity profile and the final simulation with the "final" one
+(fidelity.py), unless the workflow is given other stage profiles.
+"""
+
+import os
+import json
+from time import time
+
+from model_checking_sql import model_checking_for
+from tracing import Tracer, TRACE_FILE
+from simulation_progress import SimulationProgress
+
+
+def prep_log(in_dict):
+    if not in_dict:
+        return str(in_dict)
+    return json.dumps({k: round(v, 2) for k, v in in_dict.items()}, indent=2)
+
+
+def run_workflow(ghge_modeller, user_description: dict, log=print, results_store=None):
+    """
+    generation, simulation and spec compliance loops for one building, without any GUI
+    :param ghge_modeller: BuildingEnergyWorkflow, its workflow_dir is the workspace of the run
+    :param user_description: dict with the keys of the GUI form, including epw_file
+    :param log: function receiving the progress messages
+    :param results_store: optional ResultsStore the run is written to
+    :return: results_summary, with the run_dir and the timings added
+    """
+    user_description = dict(user_description)
+    epw_file = user_description.pop("epw_file")
+    tracer = Tracer(os.path.basename(ghge_modeller.workflow_dir))
+
+    with tracer.span("prompt_build"):
+        prompt = ghge_modeller.create_prompt(user_description)
+    var_names = ["Site Outdoor Air Drybulb Temperature", "Zone Mean Air Temperature"]
+    meter_names = ["Heating:EnergyTransfer", "Cooling:EnergyTransfer", "Electricity:Facility", "NaturalGas:Facility"]
+    models_count = 0
+    sim_success = False
+    model_props = None
+    user_def_props = None
+    percent_error = None
+    valid_model = False
+    compliant = False
+    meters = None
+    meters_df = None
+    all_errors = []
+
+    with tracer.span("workflow", client_type=ghge_modeller.client_type):
+        for _ in range(3):  # spec compliance loop
+            for _ in range(4):  # executability loop
+                models_count += 1
+                start = time()
+                log(f"{'-'*50}\nBot: Thinking...  trial no: {models_count}")
+                try:
+                    with tracer.span("llm_call", "llm", trial=models_count, prompt_chars=len(prompt)) as span:
+                        model = ghge_modeller.llm_generate_idf(prompt, models_count)
+                        span.update(ghge_modeller.client.last_usage)
+                        span["bytes_written"] = len(model.encode("utf-8"))
+                except:
+                    log("LLM API failure!")
+                    continue
+                log(f"Time taken: {time() - start:.1f}s")
+
+                idf_path = os.path.join(ghge_modeller.workflow_dir, f"llm_gen_model_{models_count}.idf")
+                if ghge_modeller.uses_geometry_compiler(user_description):
+                    with tracer.span("geometry", trial=models_count):
+                        try:
+                            ghge_modeller.add_geometry(user_description, idf_path)
+                        except Exception as exc:
+                            # unreadable LLM output, left to EnergyPlus and the error loop
+                            log(f"Bot: geometry not added: {exc}")
+                with tracer.span("model_reduction", trial=models_count) as span:
+                    try:
+                        collapsed = ghge_modeller.reduce_model(idf_path)
+                        span["floors_removed"] = sum(n - 1 for n in collapsed.values())
+                        if collapsed:
+                            log(f"Bot: {span['floors_removed']} identical floors replaced by zone multipliers")
+                    except Exception as exc:
+                        log(f"Bot: model not reduced: {exc}")
+                log("Bot: executing simulation...")
+                with tracer.span("fidelity", trial=models_count) as span:
+                    try:
+                        span["profile"] = ghge_modeller.set_fidelity(idf_path, "executability")
+                    except Exception as exc:
+                        log(f"Bot: fidelity profile not applied: {exc}")
+                with tracer.span("simulation", "energyplus", trial=models_count) as span:
+                    sim_success = ghge_modeller.run_energyplus(idf_path, epw_file, progress=SimulationProgress(log))
+                    span["success"] = sim_success
+
+                log("Bot: checking errors...")
+                with tracer.span("error_parse", trial=models_count) as span:
+                    errors = ghge_modeller.read_error_file()
+                    span["errors"] = len(errors)
+                print(errors)
+                all_errors += errors
+                valid_model = True if len(errors) == 0 else False
+
+                if valid_model:
+                    log("Simulation executed successfully")
+                    log(f"Done.\n{'-' * 50}")
+                    ghge_modeller.error_parser.delete()
+                    break
+                else:
+                    log("Bot: Errors found! Debugging errors...")
+                    with tracer.span("prompt_build", trial=models_count, kind="errors"):
+                        prompt = ghge_modeller.create_error_prompt(errors)
+                    ghge_modeller.error_parser.delete()
+
+            # adding internal gains and HVAC
+            if valid_model:
+                log("Bot: adding internal gains...")
+                with tracer.span("internal_gains", "llm", trial=models_count):
+                    ghge_modeller.add_internal_gains(user_description, idf_path)
+                with tracer.span("output_objects", trial=models_count):
+                    ghge_modeller.add_output_objects(idf_path, var_names, meter_names, sqlite=True)
+                with tracer.span("ground_temperatures", trial=models_count):
+                    ground_message = ghge_modeller.add_ground_temperatures(idf_path, epw_file)
+                log(f"Bot: {ground_message}")
+                log("Bot: adding HVAC components...")
+                with tracer.span("hvac_templates", "llm", trial=models_count) as span:
+                    ghge_modeller.add_hvac_templates(user_description, idf_path, epw_file)
+                    span["bytes_written"] = os.path.getsize(idf_path)
+                log("Bot: executing simulation...")
+                with tracer.span("fidelity", trial=models_count, stage="final") as span:
+                    try:
+                        span["profile"] = ghge_modeller.set_fidelity(idf_path, "final")
+                    except Exception as exc:
+                        log(f"Bot: fidelity profile not applied: {exc}")
+                with tracer.span("simulation", "energyplus", trial=models_count, stage="final") as span:
+                    sim_success = ghge_modeller.run_energyplus(idf_path, epw_file, progress=SimulationProgress(log))
+                    span["success"] = sim_success
+
+            # Compliance loop
+            if sim_success:
+                with tracer.span("spec_check", trial=models_count) as span:
+                    try:
+                        my_check = model_checking_for(ghge_modeller.workflow_dir)
+                        model_props = my_check.get_envelope_props()
+                        log(f"Model geometrical specs: {prep_log(model_props)}")
+                        meters = my_check.get_meters()
+                        log(f"Meters [kWh/m^2]: {prep_log(meters)}")
+                        meters_df = my_check.read_meters()
+                    except Exception:
+                        log("model specs: error found")
+
+                    user_def_props = ghge_modeller.get_groundtruth(building_description=user_description)
+                    log(f"User defined specs: {prep_log(user_def_props)}")
+                    percent_error, _ = my_check.get_anomalous_specs(model_props, user_def_props, tolerance=10)
+                    log(f"Percentage error [%]: {prep_log(percent_error)}")
+                    span["compliant"] = not percent_error
+                if percent_error:
+                    compliant = False
+                    log("Bot: Model not compliant with user input!")
+                    prompt = ghge_modeller.create_specs_prompt(user_description, percent_error)
+                else:
+                    compliant = True
+                    break
+            else:
+                log("No more possible trials. Try different input prompt.")
+                break
+
+        # Save results
+        overall_success = sim_success and compliant
+        results_summary = {
+            "success": overall_success,
+            "model_props": model_props,
+            "user_def_props": user_def_props,
+            "percent_error": percent_error,
+            "meters": meters,
+        }
+        with open(os.path.join(ghge_modeller.workflow_dir, "results_summary.json"), "w") as f:
+            json.dump(results_summary, f, indent=4)
+
+        ghge_modeller.save_chat_history()
+        with tracer.span("save_outputs"):
+            run_dir = ghge_modeller.save_outputs()
+
+    durations = tracer.durations()
+    timings = {"llm": durations.get("llm_call", 0.0), "simulation": durations.get("simulation", 0.0),
+               "checking": durations.get("spec_check", 0.0), "total": durations["workflow"]}
+    tracer.instant("tokens", "llm", **ghge_modeller.client.total_usage)
+    tracer.export_chrome(os.path.join(run_dir, TRACE_FILE))
+    if results_store is not None:
+        results_store.write_run(os.path.basename(run_dir), results_summary,
+                                {"model": ghge_modeller.client.model, "client_type": ghge_modeller.client_type,
+                                 "epw_file": os.path.basename(epw_file), "trials": models_count, "timings": timings},
+                                errors=all_errors, meters_df=meters_df)
+    log(f"Done. Results saved in {run_dir}.")
+
+    log("Summary:")
+    log(f"Success: {overall_success}")
+    log(f"Model geometrical specs: {prep_log(model_props)}")
+    log(f"User defined specs:: {prep_log(user_def_props)}")
+    log(f"Percentage error [%]: {prep_log(percent_error)}")
+
+    results_summary.update({"run_dir": run_dir, "trials": models_count, "timings": timings})
+    return results_summary
@@ -0,0 +1,273 @@
+"""
+zone_aggregation.py
+-------------------
+Thermal zone merging for fast screening simulations (retrofit scenarios), trading some accuracy for fewer zones
+and surfaces.
+
+Zones are merged when they have the same
+    orientation     facades of their exterior walls (N, E, S, W, from the Building North Axis)
+    exposure        ground contact, roof, and their zone multiplier
+    use             the internal gains, infiltration and HVAC objects naming them
+so the intermediate floors of a "5 zones" floor plan become one zone per facade and one core zone.
+
+The surfaces of the merged zones are moved to the first zone of their group:
+    - exterior surfaces and windows are kept as they are, so the envelope area and window area do not change
+    - the pairs of interzone surfaces between merged zones (walls, floors and ceilings) become one InternalMass
+      object each
+    - the floor area and volume of the merged zone are the sums of the original zones, entered in the Zone object
+      since its floors are no longer all surfaces, the ceiling height is their mean
+Objects naming a removed zone are dropped when the kept zone has one of the same class, their absolute gains
+(people, W) added to it first, else they are moved to the kept zone. Absolute gains of zone lists are scaled so the
+totals stay the same.
+
+    collapsed = ZoneAggregation(idf).aggregate()     # {kept zone: [merged zones]}
+"""
+
+import math
+
+from config import set_idd
+from geometry_compiler import facade
+
+SURFACES = "BUILDINGSURFACE:DETAILED"
+WINDOWS = "FENESTRATIONSURFACE:DETAILED"
+# internal gains: calculation method field, absolute methods with their value field
+GAINS = {
+    "PEOPLE": ("Number_of_People_Calculation_Method", {"People": "Number_of_People"}),
+    "LIGHTS": ("Design_Level_Calculation_Method", {"LightingLevel": "Lighting_Level"}),
+    "ELECTRICEQUIPMENT": ("Design_Level_Calculation_Method", {"EquipmentLevel": "Design_Level"}),
+    "GASEQUIPMENT": ("Design_Level_Calculation_Method", {"EquipmentLevel": "Design_Level"}),
+    "HOTWATEREQUIPMENT": ("Design_Level_Calculation_Method", {"EquipmentLevel": "Design_Level"}),
+    "OTHEREQUIPMENT": ("Design_Level_Calculation_Method", {"EquipmentLevel": "Design_Level"}),
+    "ZONEINFILTRATION:DESIGNFLOWRATE": ("Design_Flow_Rate_Calculation_Method", {"Flow/Zone": "Design_Flow_Rate"}),
+}
+
+
+def newell_normal(coords):
+    """
+    :return: area weighted normal of a planar polygon, its length is twice the area
+    """
+    nx = ny = nz = 0.0
+    for (x0, y0, z0), (x1, y1, z1) in zip(coords, coords[1:] + coords[:1]):
+        nx += (y0 - y1) * (z0 + z1)
+        ny += (z0 - z1) * (x0 + x1)
+        nz += (x0 - x1) * (y0 + y1)
+    return nx, ny, nz
+
+
+def surface_area(coords):
+    return 0.5 * math.hypot(*newell_normal([tuple(float(x) for x in v) for v in coords]))
+
+
+class ZoneAggregation:
+    """
+    idf: eppy IDF, edited in place
+    """
+
+    def __init__(self, idf):
+        self.idf = idf
+        relative = [x.Coordinate_System.lower() for x in idf.idfobjects["GLOBALGEOMETRYRULES"]]
+        self.relative = not relative or relative[0] != "world"
+        buildings = idf.idfobjects["BUILDING"]
+        self.north_axis = float(buildings[0].North_Axis or 0) if buildings else 0.0
+        self.zones = {zone.Name.upper(): zone for zone in idf.idfobjects["ZONE"]}
+        self.zone_lists = {x.Name.upper(): x for x in idf.idfobjects["ZONELIST"]}
+        self.surfaces = {s.Name.upper(): s for s in idf.idfobjects[SURFACES]}
+        self.windows = {}
+        for window in idf.idfobjects[WINDOWS]:
+            self.windows.setdefault(window.Building_Surface_Name.upper(), []).append(window)
+        self.zone_surfaces = {name: [] for name in self.zones}
+        for surface in self.surfaces.values():
+            self.zone_surfaces.setdefault(surface.Zone_Name.upper(), []).append(surface)
+        self.attached = self._attached_objects()
+
+    def _attached_objects(self):
+        """
+        :return: dict of zone name: list of (object, field name) of the objects other than the geometry naming it
+        """
+        attached = {}
+        skip = {"ZONE", "ZONELIST", SURFACES, WINDOWS}
+        for class_name, objects in self.idf.idfobjects.items():
+            if class_name.upper() in skip:
+                continue
+            for obj in objects:
+                for field, value in zip(obj.fieldnames[1:], obj.obj[1:]):
+                    if isinstance(value, str) and value.upper() in self.zones:
+                        attached.setdefault(value.upper(), []).append((obj, field))
+        return attached
+
+    def _origin(self, zone_name):
+        zone = self.zones[zone_name]
+        if not self.relative:
+            return 0.0, 0.0, 0.0
+        return tuple(float(x or 0) for x in (zone.X_Origin, zone.Y_Origin, zone.Z_Origin))
+
+    # ── grouping ──────────────────────────────────────────────────────────────
+
+    def orientation(self, zone_name):
+        """facades of the exterior walls of the zone"""
+        zone_north = float(self.zones[zone_name].Direction_of_Relative_North or 0) if self.relative else 0.0
+        facades = set()
+        for surface in self.zone_surfaces[zone_name]:
+            if surface.Surface_Type.lower() == "wall" and surface.Outside_Boundary_Condition.lower() == "outdoors":
+                nx, ny, _ = newell_normal([tuple(float(x) for x in v) for v in surface.coords])
+                # edge with the interior on its left and the same outward normal
+                facades.add(facade(((0.0, 0.0), (-ny, nx)), self.north_axis + zone_north))
+        return tuple(sorted(facades))
+
+    def exposure(self, zone_name):
+        zone = self.zones[zone_name]
+        boundaries = {(s.Surface_Type.lower(), s.Outside_Boundary_Condition.lower().startswith("ground"),
+                       s.Outside_Boundary_Condition.lower() == "outdoors") for s in self.zone_surfaces[zone_name]}
+        ground = any(is_ground for _, is_ground, _ in boundaries)
+        roof = any(kind == "roof" and outdoors for kind, _, outdoors in boundaries)
+        return ground, roof, int(float(zone.Multiplier or 1)), str(zone.Direction_of_Relative_North or 0)
+
+    def use(self, zone_name):
+        """objects naming the zone, without their names and absolute gains"""
+        use = []
+        for obj, field in self.attached.get(zone_name, []):
+            values = dict(zip(obj.fieldnames, obj.obj))
+            method_field, absolute = GAINS.get(obj.key.upper(), (None, {}))
+            if method_field is not None and values.get(method_field) in absolute:
+                values[absolute[values[method_field]]] = ""
+            use.append((obj.key.upper(), field) + tuple(str(v).upper() for k, v in values.items()
+                                                        if k not in ("key", "Name", field)))
+        return tuple(sorted(use))
+
+    def groups(self):
+        """
+        :return: list of lists of zone names merged together, the first one is kept
+        """
+        groups = {}
+        for name in self.zones:
+            if not self.zone_surfaces[name]:
+                continue
+            key = (self.orientation(name), self.exposure(name), self.use(name))
+            groups.setdefault(key, []).append(name)
+        return [names for names in groups.values() if len(names) > 1]
+
+    # ── merging ───────────────────────────────────────────────────────────────
+
+    def _move(self, obj, shift):
+        """shifts the vertices of a surface or window from one zone origin to another"""
+        if shift == (0.0, 0.0, 0.0):
+            return
+        for i in range(1, len(obj.coords) + 1):
+            for axis, delta in zip("XYZ", shift):
+                field = f"Vertex_{i}_{axis}coordinate"
+                obj[field] = float(obj[field]) + delta
+
+    @staticmethod
+    def _height(surfaces):
+        z = [float(v[2]) for s in surfaces for v in s.coords]
+        return max(z) - min(z)
+
+    def _floor_area(self, surfaces):
+        return sum(surface_area(s.coords) for s in surfaces if s.Surface_Type.lower() == "floor")
+
+    def merge(self, names):
+        """
+        merges the zones of names into the first one
+        """
+        kept, removed = names[0], names[1:]
+        floor_area, volume = 0.0, 0.0
+        heights = []
+        for name in names:
+            height = self._height(self.zone_surfaces[name])
+            area = self._floor_area(self.zone_surfaces[name])
+            floor_area += area
+            volume += area * height
+            heights.append(height)
+        kept_origin = self._origin(kept)
+        for name in removed:
+            origin = self._origin(name)
+            shift = tuple(a - b for a, b in zip(origin, kept_origin))
+            for surface in self.zone_surfaces[name]:
+                self._move(surface, shift)
+                for window in self.windows.get(surface.Name.upper(), []):
+                    self._move(window, shift)
+                surface.Zone_Name = self.zones[kept].Name
+            self.zone_surfaces[kept] += self.zone_surfaces.pop(name)
+
+        # interzone surfaces inside the merged zone
+        for surface in list(self.zone_surfaces[kept]):
+            partner = self.surfaces.get(surface.Outside_Boundary_Condition_Object.upper())
+            if partner is None or surface.Outside_Boundary_Condition.lower() != "surface" \
+                    or partner.Zone_Name.upper() != kept or self.windows.get(surface.Name.upper()) \
+                    or self.windows.get(partner.Name.upper()):
+                continue
+            if surface.Name.upper() in self.surfaces:
+                self.idf.newidfobject("INTERNALMASS", Name=surface.Name, Construction_Name=surface.Construction_Name,
+                                      Zone_or_ZoneList_Name=self.zones[kept].Name,
+                                      Surface_Area=round(surface_area(surface.coords), 4))
+                for obj in (surface, partner):
+                    self.idf.removeidfobject(obj)
+                    self.zone_surfaces[kept].remove(obj)
+                    self.surfaces.pop(obj.Name.upper())
+
+        zone = self.zones[kept]
+        zone.Ceiling_Height = round(sum(heights) / len(heights), 4)
+        zone.Volume = round(volume, 4)
+        zone.Floor_Area = round(floor_area, 4)
+        self._merge_objects(kept, removed)
+        for name in removed:
+            self.idf.removeidfobject(self.zones.pop(name))
+
+    def _merge_objects(self, kept, removed):
+        kept_classes = {obj.key.upper(): obj for obj, _ in self.attached.get(kept, [])}
+        for name in removed:
+            for obj, field in self.attached.pop(name, []):
+                twin = kept_classes.get(obj.key.upper())
+                if twin is None or twin is obj:
+                    obj[field] = self.zones[kept].Name
+                    continue
+                method_field, absolute = GAINS.get(obj.key.upper(), (None, {}))
+                value_field = absolute.get(obj[method_field]) if method_field else None
+                if value_field and obj[value_field] not in ("", None):
+                    twin[value_field] = float(twin[value_field] or 0) + float(obj[value_field])
+                if obj in self.idf.idfobjects[obj.key.upper()]:
+                    self.idf.removeidfobject(obj)
+
+    def aggregate(self):
+        """
+        merges every group of zones with the same orientation, exposure and use
+        :return: dict of kept zone name: list of the zones merged into it
+        """
+        list_sizes = {name: len(x.obj[2:]) for name, x in self.zone_lists.items()}
+        merged = {}
+        removed = set()
+        for names in self.groups():
+            self.merge(names)
+            merged[self.zones[names[0]].Name] = names[1:]
+            removed.update(names[1:])
+        if not merged:
+            return merged
+        for name, zone_list in self.zone_lists.items():
+            zone_list.obj = zone_list.obj[:2] + [x for x in zone_list.obj[2:] if str(x).upper() not in removed]
+            scale = list_sizes[name] / max(len(zone_list.obj) - 2, 1)
+            if scale != 1:
+                self._scale_list_gains(zone_list.Name, scale)
+        return merged
+
+    def _scale_list_gains(self, list_name, scale):
+        """absolute gains given per zone of a zone list, scaled to the new number of zones"""
+        for class_name, (method_field, absolute) in GAINS.items():
+            for obj in self.idf.idfobjects[class_name]:
+                value_field = absolute.get(obj[method_field])
+                if value_field and list_name.upper() in (str(x).upper() for x in obj.obj[1:]) \
+                        and obj[value_field] not in ("", None):
+                    obj[value_field] = float(obj[value_field]) * scale
+
+
+def aggregate_zones(idf_path, output_path=None):
+    """
+    zone aggregation of an IDF file
+    :param output_path: where the aggregated model is saved, defaults to idf_path
+    :return: dict of kept zone name: list of the zones merged into it
+    """
+    set_idd()
+    from eppy.modeleditor import IDF
+    idf = IDF(idf_path)
+    merged = ZoneAggregation(idf).aggregate()
+    idf.saveas(output_path or idf_path)
+    return merged
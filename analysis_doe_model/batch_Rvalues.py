@@ -0,0 +1,118 @@
+"""
+Batch envelope analysis of the DOE prototype building models.
+
+Walks a directory tree of prototype IDFs (e.g. ASHRAE901_OfficeSmall_STD2022_InternationalFalls.idf), extracts the
+R/U-values of every wall, roof, floor and window construction with reading_Rvalues.Building, and writes a single
+table keyed by prototype, climate zone and standard year.
+
+Usage
+-----
+    python batch_Rvalues.py --models-dir "DOE Prototype Building Models" --output envelope_Rvalues.parquet
+"""
+
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from reading_Rvalues import Building, idd_file
+
+PROTOTYPE_PATTERN = re.compile(r"^ASHRAE901_(?P<prototype>[A-Za-z0-9]+)_STD(?P<standard_year>\d{4})_(?P<city>[A-Za-z]+)")
+
+# ASHRAE 169 climate zones of the DOE prototype locations
+CLIMATE_ZONES = {
+    "Miami": "1A", "Honolulu": "1A", "Tampa": "2A", "Houston": "2A", "Tucson": "2B", "Phoenix": "2B",
+    "Atlanta": "3A", "Memphis": "3A", "ElPaso": "3B", "LasVegas": "3B", "SanDiego": "3C", "SanFrancisco": "3C",
+    "NewYork": "4A", "Baltimore": "4A", "Albuquerque": "4B", "Seattle": "4C", "Salem": "4C",
+    "Buffalo": "5A", "Chicago": "5A", "Denver": "5B", "Boise": "5B", "PortAngeles": "5C", "Vancouver": "5C",
+    "Rochester": "6A", "Burlington": "6A", "GreatFalls": "6B", "Helena": "6B",
+    "InternationalFalls": "7", "Duluth": "7", "Fairbanks": "8",
+}
+
+
+def parse_prototype_name(idf_path):
+    """
+    :param idf_path: path of a prototype idf
+    :return: dict with prototype, standard_year, city and climate_zone. Unknown fields are None
+    """
+    file_name = os.path.splitext(os.path.basename(idf_path))[0]
+    match = PROTOTYPE_PATTERN.match(file_name)
+    if not match:
+        return {"prototype": file_name, "standard_year": None, "city": None, "climate_zone": None}
+    return {"prototype": match["prototype"],
+            "standard_year": int(match["standard_year"]),
+            "city": match["city"],
+            "climate_zone": CLIMATE_ZONES.get(match["city"])}
+
+
+def find_idf_files(models_dir):
+    idf_files = []
+    for root, _, files in os.walk(models_dir):
+        for file in files:
+            if file.lower().endswith(".idf"):
+                idf_files.append(os.path.join(root, file))
+    return sorted(idf_files)
+
+
+def analyse_model(idf_path, idd_path):
+    """
+    extracts the envelope constructions of one model. Runs in a worker process.
+    :return: list of rows, one per construction
+    """
+    keys = parse_prototype_name(idf_path)
+    try:
+        building = Building(idd_path, idf_path)
+        building.find_envelope_components()
+        rows = building.get_envelope_table()
+    except Exception as exc:
+        print(f"Warning, {idf_path} could not be analysed: {exc}")
+        return []
+    for row in rows:
+        row.update(keys)
+        row["file"] = idf_path
+    return rows
+
+
+def batch_envelope_analysis(models_dir, idd_path, output_file=None, max_workers=None):
+    """
+    analyses every idf under models_dir in parallel processes
+    :param models_dir: root of the prototype models tree
+    :param idd_path: EnergyPlus .idd file matching the models version
+    :param output_file: .parquet or .csv file, optional
+    :param max_workers: number of processes, defaults to the number of cores
+    :return: df with one row per model and construction
+    """
+    idf_files = find_idf_files(models_dir)
+    rows = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for model_rows in executor.map(analyse_model, idf_files, [idd_path] * len(idf_files), chunksize=4):
+            rows.extend(model_rows)
+    if idf_files and not rows:
+        raise RuntimeError(f"none of the {len(idf_files)} models under {models_dir} could be analysed")
+    columns = ["prototype", "climate_zone", "standard_year", "city", "surface_type", "boundary_condition",
+               "construction", "layers", "R_value", "R_value_films", "U_value", "F_factor", "file"]
+    df = pd.DataFrame(rows, columns=columns)
+    df = df.sort_values(["prototype", "climate_zone", "standard_year", "surface_type"], ignore_index=True)
+    if output_file:
+        if output_file.endswith(".parquet"):
+            df.to_parquet(output_file, index=False)
+        else:
+            df.to_csv(output_file, index=False)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract envelope R/U-values from a library of prototype IDFs")
+    parser.add_argument("--models-dir", required=True)
+    parser.add_argument("--idd", default=idd_file)
+    parser.add_argument("--output", default="envelope_Rvalues.parquet")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    df = batch_envelope_analysis(args.models_dir, args.idd, args.output, args.workers)
+    print(df.groupby(["prototype", "surface_type"])["U_value"].describe())
+
+
+if __name__ == "__main__":
+    main()
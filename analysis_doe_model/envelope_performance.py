@@ -0,0 +1,258 @@
+"""
+Area-weighted envelope performance of a whole model.
+
+The surfaces, windows and construction layers of the idf are loaded once into NumPy arrays, then the overall UA,
+the effective U-value per surface type and orientation and the window contribution are computed in one
+vectorized pass.
+
+The envelope is the one of the conditioned zones (named by a thermostat, equipment connections or an HVAC template,
+all zones if none is): the surfaces of unconditioned zones such as attics are left out, and the interzone surfaces
+between a conditioned and an unconditioned zone (the ceiling under an attic) are counted instead, with an interior
+film on both sides.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+from reading_Rvalues import (Building, EXTERIOR_FILM, INTERIOR_FILM, GROUND_BOUNDARIES, INTERIOR_BOUNDARIES,
+                             EnvelopeComponent, idd_file, dir_path, folder_name, idf_file)
+
+SURFACE_TYPES = ["Wall", "Roof", "Floor", "Window"]
+ORIENTATIONS = ["North", "East", "South", "West", "Horizontal"]
+
+
+class EnvelopePerformance:
+    """
+    vectorized envelope calculator
+    building: reading_Rvalues.Building, its idf and construction lookups are reused
+    """
+    def __init__(self, building):
+        self.building = building
+        self.idf = building.idf
+        self.construction_names = []
+        self.surfaces = None
+        self.windows = None
+
+    # ── construction arrays ───────────────────────────────────────────────────
+
+    def build_construction_arrays(self):
+        """
+        layer R-value matrix (n_constructions x max_layers) and the properties that do not come from layers
+        """
+        components = []
+        for construction, construction_type in self.building.constructions.values():
+            component = EnvelopeComponent(construction, "Outdoors", "Wall", construction_type)
+            component.get_layer_names(self.idf, self.building.materials)
+            components.append(component)
+        self.construction_names = [x.name.upper() for x in components]
+        max_layers = max([len(x.layers) for x in components] + [1])
+        self.layer_r = np.zeros((len(components), max_layers))
+        # NFRC U-factor of simple glazing systems, films included
+        self.glazing_u = np.full(len(components), np.nan)
+        # F-factor slabs: F * exposed perimeter / area, films included
+        self.slab_u = np.full(len(components), np.nan)
+        for i, component in enumerate(components):
+            self.layer_r[i, :len(component.layers)] = [layer.r_value for layer in component.layers]
+            simple_glazing = [x for x in component.layers if x.u_value]
+            if simple_glazing:
+                self.glazing_u[i] = simple_glazing[0].u_value
+            if component.construction_type == "CONSTRUCTION:CFACTORUNDERGROUNDWALL":
+                self.layer_r[i, 0] = 1 / float(component.eppy_construction.CFactor)
+            elif component.construction_type == "CONSTRUCTION:FFACTORGROUNDFLOOR":
+                area = float(component.eppy_construction.Area)
+                perimeter = float(component.eppy_construction.PerimeterExposed)
+                self.slab_u[i] = float(component.eppy_construction.FFactor) * perimeter / area if area > 0 else 0
+
+    def construction_index(self, names):
+        lookup = {name: i for i, name in enumerate(self.construction_names)}
+        return np.array([lookup.get(name.upper(), -1) for name in names], dtype=int)
+
+    # ── geometry arrays ───────────────────────────────────────────────────────
+
+    def conditioned_zones(self):
+        """
+        :return: set of the names of the conditioned zones, all zones if the model has no HVAC
+        """
+        zone_lists = {x.Name.upper(): [str(z).upper() for z in x.obj[2:] if z] for x in self.idf.idfobjects["ZONELIST"]}
+        named = [x.Zone_Name for x in self.idf.idfobjects["ZONEHVAC:EQUIPMENTCONNECTIONS"]]
+        named += [x.Zone_or_ZoneList_Name for x in self.idf.idfobjects["ZONECONTROL:THERMOSTAT"]]
+        for class_name, objects in self.idf.idfobjects.items():
+            if class_name.upper().startswith("HVACTEMPLATE:ZONE:"):
+                named += [x.Zone_Name for x in objects]
+        conditioned = set()
+        for name in named:
+            conditioned.update(zone_lists.get(str(name).upper(), [str(name).upper()]))
+        if not conditioned:
+            conditioned = {x.Name.upper() for x in self.idf.idfobjects["ZONE"]}
+        return conditioned
+
+    def zone_properties(self):
+        building_north = 0.0
+        if self.idf.idfobjects["BUILDING"]:
+            building_north = float(self.idf.idfobjects["BUILDING"][0].North_Axis or 0)
+        zones = {}
+        for zone in self.idf.idfobjects["ZONE"]:
+            multiplier = float(zone.Multiplier or 1)
+            north = float(zone.Direction_of_Relative_North or 0)
+            zones[zone.Name.upper()] = (multiplier, building_north + north)
+        return zones
+
+    @staticmethod
+    def vertex_array(objects):
+        """
+        pads the vertices of all polygons into one (n, max_vertices, 3) array, repeating the first vertex
+        so that the padding adds zero length edges
+        """
+        coords = [np.asarray(obj.coords, dtype=float) for obj in objects]
+        max_vertices = max([len(x) for x in coords] + [3])
+        vertices = np.zeros((len(coords), max_vertices, 3))
+        for i, polygon in enumerate(coords):
+            vertices[i, :len(polygon)] = polygon
+            vertices[i, len(polygon):] = polygon[0]
+        return vertices
+
+    @staticmethod
+    def area_vectors(vertices):
+        # Newell's method: half the sum of the cross products of consecutive vertices
+        return 0.5 * np.cross(vertices, np.roll(vertices, -1, axis=1)).sum(axis=1)
+
+    def build_surface_arrays(self):
+        zones = self.zone_properties()
+        surfaces = self.idf.idfobjects["BUILDINGSURFACE:DETAILED"]
+        names = [x.Name.upper() for x in surfaces]
+        zone_props = np.array([zones.get(x.Zone_Name.upper(), (1.0, 0.0)) for x in surfaces]).reshape(-1, 2)
+        boundaries = np.array([x.Outside_Boundary_Condition for x in surfaces])
+        surface_types = np.array([x.Surface_Type.capitalize() for x in surfaces])
+        # zone on the other side of the interzone surfaces
+        zone_of = {x.Name.upper(): x.Zone_Name.upper() for x in surfaces}
+        other_zone = [zone_of.get(x.Outside_Boundary_Condition_Object.upper(), "")
+                      if x.Outside_Boundary_Condition == "Surface" else x.Outside_Boundary_Condition_Object.upper()
+                      if x.Outside_Boundary_Condition == "Zone" else "" for x in surfaces]
+        conditioned = self.conditioned_zones()
+        in_conditioned = np.array([x.Zone_Name.upper() in conditioned for x in surfaces], dtype=bool)
+        interior = np.isin(boundaries, INTERIOR_BOUNDARIES)
+        facing_unconditioned = interior & np.isin(boundaries, ["Surface", "Zone"]) & \
+            np.array([x != "" and x not in conditioned for x in other_zone], dtype=bool)
+        self.surfaces = {
+            "name": names,
+            "type": np.where(surface_types == "Ceiling", "Roof", surface_types),
+            "envelope": in_conditioned & (~interior | facing_unconditioned),
+            "unconditioned_side": facing_unconditioned,
+            "ground": np.isin(boundaries, GROUND_BOUNDARIES),
+            "multiplier": zone_props[:, 0],
+            "north": zone_props[:, 1],
+            "construction": self.construction_index([x.Construction_Name for x in surfaces]),
+            "area_vector": self.area_vectors(self.vertex_array(surfaces)) if surfaces else np.zeros((0, 3)),
+        }
+        surface_lookup = {name: i for i, name in enumerate(names)}
+
+        detailed = [x for x in self.idf.idfobjects["FENESTRATIONSURFACE:DETAILED"]
+                    if x.Surface_Type in ["Window", "GlassDoor"]]
+        simple = list(self.idf.idfobjects["WINDOW"]) + list(self.idf.idfobjects["GLAZEDDOOR"])
+        parent = np.array([surface_lookup.get(x.Building_Surface_Name.upper(), -1) for x in detailed + simple],
+                          dtype=int)
+        multiplier = np.array([float(x.Multiplier or 1) for x in detailed + simple])
+        area = np.concatenate([
+            np.linalg.norm(self.area_vectors(self.vertex_array(detailed)), axis=1) if detailed else np.zeros(0),
+            np.array([float(x.Length) * float(x.Height) for x in simple]),
+        ]) * multiplier
+        self.windows = {
+            "parent": parent,
+            "area": area,
+            "construction": self.construction_index([x.Construction_Name for x in detailed + simple]),
+        }
+
+    # ── calculation ───────────────────────────────────────────────────────────
+
+    def orientation_codes(self, area_vectors, north):
+        norm = np.linalg.norm(area_vectors, axis=1)
+        normal = area_vectors / np.where(norm > 0, norm, 1)[:, None]
+        azimuth = (np.degrees(np.arctan2(normal[:, 0], normal[:, 1])) + north) % 360
+        # same sectors as the Window-Wall Ratio table: North (315 to 45 deg), East (45 to 135 deg) ...
+        codes = (((azimuth + 45) % 360) // 90).astype(int)
+        return np.where(np.abs(normal[:, 2]) > 0.7, ORIENTATIONS.index("Horizontal"), codes)
+
+    def calc(self):
+        """
+        :return: summary dict and df with area, UA and effective U per surface type and orientation
+        """
+        if self.surfaces is None:
+            self.build_construction_arrays()
+            self.build_surface_arrays()
+        srf = self.surfaces
+        win = self.windows
+
+        # gross areas, net of the windows hosted by each surface
+        gross_area = np.linalg.norm(srf["area_vector"], axis=1) * srf["multiplier"]
+        valid_parent = win["parent"] >= 0
+        win_parent = win["parent"][valid_parent]
+        win_area = win["area"][valid_parent] * srf["multiplier"][win_parent]
+        hosted_area = np.bincount(win_parent, weights=win_area, minlength=len(gross_area))
+        net_area = np.clip(gross_area - hosted_area, 0, None)
+
+        # surface R-values from the layer matrix plus films
+        construction_r = self.layer_r.sum(axis=1)
+        srf_constr = srf["construction"]
+        interior_film = np.select([srf["type"] == "Roof", srf["type"] == "Floor"],
+                                  [INTERIOR_FILM["Roof"], INTERIOR_FILM["Floor"]], INTERIOR_FILM["Wall"])
+        films = interior_film + np.select([srf["ground"], srf["unconditioned_side"]], [0, interior_film], EXTERIOR_FILM)
+        known = srf_constr >= 0
+        srf_u = np.where(known, 1 / (construction_r[srf_constr] + films), np.nan)
+        srf_u = np.where(known & ~np.isnan(self.slab_u[srf_constr]), self.slab_u[srf_constr], srf_u)
+
+        # windows of the surfaces out of the envelope (unconditioned zones) are left out
+        win_constr = np.where(srf["envelope"][win_parent], win["construction"][valid_parent], -1)
+        win_films = INTERIOR_FILM["Window"] + EXTERIOR_FILM
+        win_u = np.where(win_constr >= 0, 1 / (construction_r[win_constr] + win_films), np.nan)
+        win_u = np.where((win_constr >= 0) & ~np.isnan(self.glazing_u[win_constr]), self.glazing_u[win_constr], win_u)
+
+        # envelope elements: opaque surfaces then windows
+        envelope = srf["envelope"] & ~np.isnan(srf_u)
+        srf_orient = self.orientation_codes(srf["area_vector"], srf["north"])
+        areas = np.concatenate([net_area[envelope], win_area[~np.isnan(win_u)]])
+        u_values = np.concatenate([srf_u[envelope], win_u[~np.isnan(win_u)]])
+        types = np.concatenate([srf["type"][envelope], np.full((~np.isnan(win_u)).sum(), "Window")])
+        orients = np.concatenate([srf_orient[envelope], srf_orient[win_parent][~np.isnan(win_u)]])
+
+        type_codes = np.array([SURFACE_TYPES.index(x) if x in SURFACE_TYPES else 0 for x in types], dtype=int)
+        group = type_codes * len(ORIENTATIONS) + orients
+        n_groups = len(SURFACE_TYPES) * len(ORIENTATIONS)
+        ua = areas * u_values
+        group_area = np.bincount(group, weights=areas, minlength=n_groups)
+        group_ua = np.bincount(group, weights=ua, minlength=n_groups)
+
+        df = pd.DataFrame({
+            "surface_type": np.repeat(SURFACE_TYPES, len(ORIENTATIONS)),
+            "orientation": np.tile(ORIENTATIONS, len(SURFACE_TYPES)),
+            "area": group_area,
+            "UA": group_ua,
+        })
+        df = df[df["area"] > 0].reset_index(drop=True)
+        df["U_effective"] = df["UA"] / df["area"]
+
+        total_ua = ua.sum()
+        window_ua = ua[types == "Window"].sum()
+        summary = {
+            "UA_total": total_ua,
+            "envelope_area": areas.sum(),
+            "U_overall": total_ua / areas.sum() if areas.sum() > 0 else np.nan,
+            "window_area": areas[types == "Window"].sum(),
+            "window_UA": window_ua,
+            "window_UA_fraction": window_ua / total_ua if total_ua > 0 else np.nan,
+        }
+        for surface_type in SURFACE_TYPES:
+            mask = types == surface_type
+            summary[f"{surface_type}_U_effective"] = ua[mask].sum() / areas[mask].sum() if mask.any() else np.nan
+        return summary, df
+
+
+def main():
+    small_office = Building(idd_file, os.path.join(dir_path, folder_name, idf_file))
+    summary, df = EnvelopePerformance(small_office).calc()
+    print(summary)
+    print(df)
+
+
+if __name__ == "__main__":
+    main()
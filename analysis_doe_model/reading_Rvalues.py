@@ -14,18 +14,54 @@ idf_file = "ASHRAE901_OfficeSmall_STD2022_InternationalFalls.idf"
 # IDF.setiddname(idd_file)
 # my_idf = IDF(os.path.join(dir_path, folder_name, idf_file))
 
+# surface film resistances [m2-K/W], ASHRAE 90.1 Appendix A (Table A9.4A)
+EXTERIOR_FILM = 0.03
+INTERIOR_FILM = {"Wall": 0.12, "Roof": 0.11, "Ceiling": 0.11, "Floor": 0.16, "Window": 0.12}
+# boundary conditions without an outside air film
+GROUND_BOUNDARIES = ["Ground", "GroundFCfactorMethod", "GroundSlabPreprocessorAverage",
+                     "GroundSlabPreprocessorCore", "GroundSlabPreprocessorPerimeter",
+                     "GroundBasementPreprocessorAverageWall", "GroundBasementPreprocessorAverageFloor",
+                     "GroundBasementPreprocessorUpperWall", "GroundBasementPreprocessorLowerWall", "Foundation"]
+# boundary conditions of interior surfaces, not part of the envelope
+INTERIOR_BOUNDARIES = ["Surface", "Zone", "Space", "Adiabatic", "OtherSideCoefficients",
+                       "OtherSideConditionsModel"]
+# material classes that can be a construction layer
+MATERIAL_TYPES = ["MATERIAL", "MATERIAL:NOMASS", "MATERIAL:AIRGAP", "WINDOWMATERIAL:SIMPLEGLAZINGSYSTEM",
+                  "WINDOWMATERIAL:GLAZING", "WINDOWMATERIAL:GAS"]
+# gas conductivity at 10C [W/m-K]
+GAS_CONDUCTIVITY = {"Air": 0.0250, "Argon": 0.0171, "Krypton": 0.0090, "Xenon": 0.0053}
+# linearised radiative coefficient between two uncoated panes [W/m2-K]
+GAP_RADIATIVE_COEFF = 3.7
+
+
 class Building:
     def __init__(self, idd_file, idf_file):
         IDF.setiddname(idd_file)
         self.idf = IDF(idf_file)
         self.envelope_comps = []
-
-    def add_envelope_comp(self, construction_obj, boundary_condition, type):
-        self.envelope_comps.append(EnvelopeComponent(construction_obj, boundary_condition, type))
+        # name lookups, built once instead of scanning the idf for every layer
+        self.materials = {}
+        for material_type in MATERIAL_TYPES:
+            for material in self.idf.idfobjects[material_type]:
+                self.materials[material.Name.upper()] = (material, material_type)
+        self.constructions = {}
+        for construction_type in ["CONSTRUCTION", "CONSTRUCTION:FFACTORGROUNDFLOOR",
+                                  "CONSTRUCTION:CFACTORUNDERGROUNDWALL"]:
+            for construction in self.idf.idfobjects[construction_type]:
+                self.constructions[construction.Name.upper()] = (construction, construction_type)
+
+    def add_envelope_comp(self, construction_obj, boundary_condition, type, construction_type="CONSTRUCTION"):
+        self.envelope_comps.append(EnvelopeComponent(construction_obj, boundary_condition, type, construction_type))
         # find all materials in this envelope component
-        self.envelope_comps[-1].get_layer_names(self.idf)
+        self.envelope_comps[-1].get_layer_names(self.idf, self.materials)
         self.envelope_comps[-1].calc_Rvalue()
 
+    def get_construction(self, construction_name):
+        construction = self.constructions.get(construction_name.upper())
+        if construction is None:
+            print(f"Warning, construction {construction_name} not found")
+        return construction
+
     def find_envelope_surface(self, type, boundary_condition):
         unique_constructions = []
         for surface in self.idf.idfobjects["BUILDINGSURFACE:DETAILED"]:
@@ -34,11 +70,35 @@ class Building:
                 if surface.Construction_Name not in unique_constructions:
                     unique_constructions.append(surface.Construction_Name)
                     # find the idf construction object
-                    exterior_const = [x for x in self.idf.idfobjects["CONSTRUCTION"] if x.Name == surface.Construction_Name]
-                    if len(exterior_const) > 1:
-                        print(f"Warning, multiple constructions with the name {surface.Construction_Name} found")
-                    self.add_envelope_comp(exterior_const[0], "external", type)
+                    construction = self.get_construction(surface.Construction_Name)
+                    if construction:
+                        self.add_envelope_comp(construction[0], boundary_condition, type, construction[1])
 
+    def find_window_constructions(self):
+        unique_constructions = []
+        windows = [x for x in self.idf.idfobjects["FENESTRATIONSURFACE:DETAILED"]
+                   if x.Surface_Type in ["Window", "GlassDoor"]]
+        windows += list(self.idf.idfobjects["WINDOW"]) + list(self.idf.idfobjects["GLAZEDDOOR"])
+        for window in windows:
+            if window.Construction_Name not in unique_constructions:
+                unique_constructions.append(window.Construction_Name)
+                construction = self.get_construction(window.Construction_Name)
+                if construction:
+                    self.add_envelope_comp(construction[0], "Outdoors", "Window", construction[1])
+
+    def find_envelope_components(self):
+        """
+        finds every exterior and ground-contact wall, roof and floor construction, then the window constructions
+        :return: list of EnvelopeComponent
+        """
+        found = []
+        for surface in self.idf.idfobjects["BUILDINGSURFACE:DETAILED"]:
+            key = (surface.Surface_Type, surface.Outside_Boundary_Condition)
+            if surface.Outside_Boundary_Condition not in INTERIOR_BOUNDARIES and key not in found:
+                found.append(key)
+                self.find_envelope_surface(*key)
+        self.find_window_constructions()
+        return self.envelope_comps
 
     def print_Rvalue_envelope(self):
         results = []
@@ -46,24 +106,48 @@ class Building:
             results.append({"Name":  component.name, "R_value": component.r_value})
         return results
 
+    def get_envelope_table(self):
+        results = []
+        for component in self.envelope_comps:
+            results.append({"construction": component.name,
+                            "surface_type": component.type,
+                            "boundary_condition": component.boundary_condition,
+                            "layers": "; ".join(layer.name for layer in component.layers),
+                            "R_value": component.r_value,
+                            "R_value_films": component.r_value_total,
+                            "U_value": component.u_value,
+                            "F_factor": component.f_factor})
+        return results
+
 
 class EnvelopeComponent:
     """
     an object for a single EnvelopeComponent or construction
     """
-    def __init__(self, eppy_construction, boundary_condition, type):
+    def __init__(self, eppy_construction, boundary_condition, type, construction_type="CONSTRUCTION"):
         self.eppy_construction = eppy_construction
         self.name = eppy_construction.Name
         self.boundary_condition = boundary_condition
         self.type = type
+        self.construction_type = construction_type
         self.layers = []
         self.r_value = 0
+        self.r_value_total = None  # including air films
+        self.u_value = None
+        self.f_factor = None  # slab-on-grade constructions only
 
-    def get_layer_names(self, idf):
+    def get_layer_names(self, idf, materials=None):
+        if self.construction_type != "CONSTRUCTION":
+            return
         for layer in self.eppy_construction.fieldnames[1:]:  # skip the Name field
             if "Layer" in layer: # as in Outside Layer, Layer 2 ...
                 material_name = getattr(self.eppy_construction, layer)
                 if material_name:  # if the field is not empty
+                    if materials is not None:
+                        material = materials.get(material_name.upper())
+                        if material:
+                            self.layers.append(Resistance(material[0], material[1]))
+                        continue
                     # find the layer in "MATERIAL"
                     material_obj = [x for x in idf.idfobjects["MATERIAL"] if x.Name == material_name]
                     if len(material_obj) > 0:
@@ -75,9 +159,31 @@ class EnvelopeComponent:
                         tmp_resistance = Resistance(material_obj[0], "MATERIAL:NOMASS")
                         self.layers.append(tmp_resistance)
 
+    def get_films(self):
+        interior_film = INTERIOR_FILM.get(self.type, INTERIOR_FILM["Wall"])
+        if self.boundary_condition in GROUND_BOUNDARIES:
+            return interior_film
+        return interior_film + EXTERIOR_FILM
+
     def calc_Rvalue(self):
-        for resistance in self.layers:
-            self.r_value += resistance.r_value
+        self.r_value = 0
+        if self.construction_type == "CONSTRUCTION:CFACTORUNDERGROUNDWALL":
+            # C-factor excludes soil and films
+            self.r_value = 1 / float(self.eppy_construction.CFactor)
+        elif self.construction_type == "CONSTRUCTION:FFACTORGROUNDFLOOR":
+            # F-factor is a perimeter heat loss [W/m-K], it has no area based R-value
+            self.f_factor = float(self.eppy_construction.FFactor)
+            return None
+        simple_glazing = [x for x in self.layers if x.type == "WINDOWMATERIAL:SIMPLEGLAZINGSYSTEM"]
+        if simple_glazing:
+            # the U-factor of a simple glazing system is a NFRC rating, films included
+            self.r_value_total = 1 / simple_glazing[0].u_value
+            self.r_value = self.r_value_total - self.get_films()
+        else:
+            for resistance in self.layers:
+                self.r_value += resistance.r_value
+            self.r_value_total = self.r_value + self.get_films()
+        self.u_value = 1 / self.r_value_total
         return self.r_value
 
 
@@ -88,24 +194,33 @@ class Resistance:
     def __init__(self, eppy_material, type):
         self.eppy_material = eppy_material
         self.name = eppy_material.Name
-        self.type = type  # "MATERIAL" or "MATERIAL:NOMASS"
+        self.type = type  # one of MATERIAL_TYPES
+        self.u_value = None  # simple glazing systems only
         self.r_value = self.get_Rvalue()
 
     def get_Rvalue(self):
-        if self.type == "MATERIAL":
+        if self.type in ["MATERIAL", "WINDOWMATERIAL:GLAZING"]:
             thickness = float(self.eppy_material.Thickness)  # in meters
             conductivity = float(self.eppy_material.Conductivity)  # W/m-K
             self.r_value = thickness / conductivity
-        elif self.type == "MATERIAL:NOMASS":
+        elif self.type in ["MATERIAL:NOMASS", "MATERIAL:AIRGAP"]:
             self.r_value = float(self.eppy_material.Thermal_Resistance)
+        elif self.type == "WINDOWMATERIAL:GAS":
+            # conduction through the gas in parallel with radiation between the panes
+            thickness = float(self.eppy_material.Thickness)
+            conductivity = GAS_CONDUCTIVITY.get(self.eppy_material.Gas_Type, GAS_CONDUCTIVITY["Air"])
+            self.r_value = 1 / (conductivity / thickness + GAP_RADIATIVE_COEFF)
+        elif self.type == "WINDOWMATERIAL:SIMPLEGLAZINGSYSTEM":
+            self.u_value = float(self.eppy_material.UFactor)
+            self.r_value = 1 / self.u_value
         return self.r_value
 
-small_office = Building(idd_file, os.path.join(dir_path, folder_name, idf_file))
-small_office.find_envelope_surface("Wall", "Outdoors")
-print(small_office.print_Rvalue_envelope())
-
-
-
 
+def main():
+    small_office = Building(idd_file, os.path.join(dir_path, folder_name, idf_file))
+    small_office.find_envelope_surface("Wall", "Outdoors")
+    print(small_office.print_Rvalue_envelope())
 
 
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,10 @@ from eppy import modeleditor
 from eppy.modeleditor import IDF
 import os
 
+# envelope quality options of the survey, shared with the retrofit scenarios
+INSULATION_MATERIALS = {"good": "good_insulation", "average": "average_insulation", "poor": "poor_insulation"}
+INFILTRATION_RATES = {"good": 0.00015, "average": 0.00025, "poor": 0.00035}
+
 def write_idf(input_idf_file, model_params,output_file_name):
     # Path to the EnergyPlus .idd file
     idd_file = os.path.join("EPlus_files","Energy+.idd")
@@ -49,12 +53,7 @@ def write_idf(input_idf_file, model_params,output_file_name):
         idf.idfobjects["MATERIAL"][-1].Specific_Heat = row["Specific_Heat"]
 
     # Construction
-    if model_params["envelope"] == "good":
-        insulation_mat = "good_insulation"
-    elif model_params["envelope"] == "average":
-        insulation_mat = "average_insulation"
-    elif model_params["envelope"] == "poor":
-        insulation_mat = "poor_insulation"
+    insulation_mat = INSULATION_MATERIALS[model_params["envelope"]]
     idf.newidfobject("CONSTRUCTION")
     idf.idfobjects["CONSTRUCTION"][-1].Name = "Exterior Wall"
     idf.idfobjects["CONSTRUCTION"][-1].Outside_Layer = insulation_mat
@@ -73,60 +72,17 @@ def write_idf(input_idf_file, model_params,output_file_name):
     idf.idfobjects["CONSTRUCTION"][-1].Name = "Exterior Window"
     idf.idfobjects["CONSTRUCTION"][-1].Outside_Layer = "simple_glass"
 
-    ## Building surface detail
+    ## Zones, building surfaces and windows
     bldg_layout = model_params["layout"]
-    for i in range(len(bldg_layout.surfaces)):
-        new_coordinates = bldg_layout.surfaces[i].vertices
-        idf.newidfobject("BUILDINGSURFACE:DETAILED")
-        idf.idfobjects["BUILDINGSURFACE:DETAILED"][-1].Name = bldg_layout.surfaces[i].name
-        idf.idfobjects["BUILDINGSURFACE:DETAILED"][-1].Surface_Type = bldg_layout.surfaces[i].surface_type
-        if bldg_layout.surfaces[i].surface_type == "Wall":
-            idf.idfobjects["BUILDINGSURFACE:DETAILED"][-1].Construction_Name = "Exterior Wall"
-        elif bldg_layout.surfaces[i].surface_type == "Floor":
-            idf.idfobjects["BUILDINGSURFACE:DETAILED"][-1].Construction_Name = "Exterior Floor"
-        elif bldg_layout.surfaces[i].surface_type == "Roof":
-            idf.idfobjects["BUILDINGSURFACE:DETAILED"][-1].Construction_Name = "Exterior Roof"
-
-        idf.idfobjects["BUILDINGSURFACE:DETAILED"][-1].Zone_Name = "zone1"
-        idf.idfobjects["BUILDINGSURFACE:DETAILED"][-1].Space_Name = ""
-        idf.idfobjects["BUILDINGSURFACE:DETAILED"][-1].Outside_Boundary_Condition = "Outdoors"
-        idf.idfobjects["BUILDINGSURFACE:DETAILED"][-1].Outside_Boundary_Condition_Object = ""
-        idf.idfobjects["BUILDINGSURFACE:DETAILED"][-1].Sun_Exposure = "SunExposed"
-        idf.idfobjects["BUILDINGSURFACE:DETAILED"][-1].Wind_Exposure = "WindExposed"
-        idf.idfobjects["BUILDINGSURFACE:DETAILED"][-1].View_Factor_to_Ground = ""
-        idf.idfobjects["BUILDINGSURFACE:DETAILED"][-1].Number_of_Vertices = len(new_coordinates)
-
-        for i in range(len(new_coordinates)):
-            sngl_vrtx = new_coordinates[i]
-            idf.idfobjects["BUILDINGSURFACE:DETAILED"][-1].update({"Vertex_{}_Xcoordinate".format(i+1): sngl_vrtx[0],
-                                                                   "Vertex_{}_Ycoordinate".format(i+1): sngl_vrtx[1],
-                                                                   "Vertex_{}_Zcoordinate".format(i+1): sngl_vrtx[2]})
-
-    # Windows
-    for i in range(len(bldg_layout.surfaces)):
-        if bldg_layout.surfaces[i].surface_type == "Wall":
-            x_start, y_start, window_length, window_height = bldg_layout.surfaces[i].get_window_dims(model_params["WWR"])
-            idf.newidfobject("WINDOW")
-            idf.idfobjects["WINDOW"][-1].Name = "Window_{}".format(bldg_layout.surfaces[i].name)
-            idf.idfobjects["WINDOW"][-1].Construction_Name = "Exterior Window"
-            idf.idfobjects["WINDOW"][-1].Building_Surface_Name = bldg_layout.surfaces[i].name
-            idf.idfobjects["WINDOW"][-1].Starting_X_Coordinate = x_start
-            idf.idfobjects["WINDOW"][-1].Starting_Z_Coordinate = y_start
-            idf.idfobjects["WINDOW"][-1].Length = window_length
-            idf.idfobjects["WINDOW"][-1].Height = window_height
-
+    bldg_layout.to_idf(idf)
 
     # Infiltration
     idf.newidfobject("ZONEINFILTRATION:DESIGNFLOWRATE")
     idf.idfobjects["ZONEINFILTRATION:DESIGNFLOWRATE"][-1].Name = "infiltration"
-    idf.idfobjects["ZONEINFILTRATION:DESIGNFLOWRATE"][-1].Zone_or_ZoneList_Name = "zone1"
-    idf.idfobjects["ZONEINFILTRATION:DESIGNFLOWRATE"][-1].Design_Flow_Rate_Calculation_Method = "Flow/Zone"
-    if model_params["envelope"] == "good":
-        idf.idfobjects["ZONEINFILTRATION:DESIGNFLOWRATE"][-1].Design_Flow_Rate = 0.00015
-    elif model_params["envelope"] == "average":
-        idf.idfobjects["ZONEINFILTRATION:DESIGNFLOWRATE"][-1].Design_Flow_Rate = 0.00025
-    elif model_params["envelope"] == "poor":
-        idf.idfobjects["ZONEINFILTRATION:DESIGNFLOWRATE"][-1].Design_Flow_Rate = 0.00035
+    idf.idfobjects["ZONEINFILTRATION:DESIGNFLOWRATE"][-1].Zone_or_ZoneList_Name = "all_zones"
+    # per exterior area, the zone list gives each zone the rate and not the share of a building value
+    idf.idfobjects["ZONEINFILTRATION:DESIGNFLOWRATE"][-1].Design_Flow_Rate_Calculation_Method = "Flow/ExteriorArea"
+    idf.idfobjects["ZONEINFILTRATION:DESIGNFLOWRATE"][-1].Flow_Rate_per_Exterior_Surface_Area = INFILTRATION_RATES[model_params["envelope"]]
 
     # schedule compact
     idf.newidfobject("SCHEDULE:COMPACT")
@@ -144,10 +100,12 @@ def write_idf(input_idf_file, model_params,output_file_name):
     # people
     idf.newidfobject("PEOPLE")
     idf.idfobjects["PEOPLE"][-1].Name = "people"
-    idf.idfobjects["PEOPLE"][-1].Zone_or_ZoneList_or_Space_or_SpaceList_Name = "zone1"
+    idf.idfobjects["PEOPLE"][-1].Zone_or_ZoneList_or_Space_or_SpaceList_Name = "all_zones"
     idf.idfobjects["PEOPLE"][-1].Number_of_People_Schedule_Name = "Always On"
-    idf.idfobjects["PEOPLE"][-1].Number_of_People_Calculation_Method = "People"
-    idf.idfobjects["PEOPLE"][-1].Number_of_People = model_params["people"]
+    # occupancy of the whole building spread over the floor area of all the levels
+    idf.idfobjects["PEOPLE"][-1].Number_of_People_Calculation_Method = "Area/Person"
+    idf.idfobjects["PEOPLE"][-1].Floor_Area_per_Person = (bldg_layout.floor_area * len(bldg_layout.levels())
+                                                          / float(model_params["people"]))
     idf.idfobjects["PEOPLE"][-1].Activity_Level_Schedule_Name = "Office Activity Schedule"
     idf.idfobjects["PEOPLE"][-1].Mean_Radiant_Temperature_Calculation_Type = "EnclosureAveraged"
 
@@ -1,10 +1,12 @@
 # This script reads input for the survey
 # and generates data in a transferable form to create the idf file
 import os
+import sys
 import numpy as np
 import pandas as pd
 from edit_idf_files import write_idf
-from Layouts import *
+sys.path.insert(0, "ai_for_bem_workflow")
+from geometry_compiler import GeometryCompiler
 
 # envelope
 # Internal loads
@@ -16,9 +18,9 @@ def read_ghge_survey(survey_file):
     df.info()
     if df["Shape"][0] in ["rectangle","L-shape"]:
         if df["Shape"][0] == "rectangle":
-            rect_layout = RectangularLayout(df["Shape"][0], df["Dimensions"][0], df["Dimensions"][1], df["Height"][0])
-            print(rect_layout)
-            print(rect_layout.get_surfaces()[1])
+            rect_layout = GeometryCompiler("Rectangular building", df["Dimensions"][0], df["Dimensions"][1],
+                                           ceiling_height=df["Height"][0], WWR=df["WWR"][0])
+            print(rect_layout.floor_area, rect_layout.perimeter)
 
     input_idf_file = os.path.join("EPlus_files", "empty_model.idf")
     output_file_name = os.path.join("EPlus_files", "updated_model.idf")